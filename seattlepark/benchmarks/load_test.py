@@ -0,0 +1,297 @@
+# Load test of the seattlepark Dash app.
+#
+# The app is started in a child process with a stand-in for the Google Map
+# geocoder, which places every address at the mid-point of a street of the
+# street json after a configurable delay, so a run never calls the Google
+# Geocoding API. Clients then post submits to the callback endpoint of the
+# app, the way the browser does when the submit button is clicked, at
+# increasing levels of concurrency:
+#
+#   python seattlepark/benchmarks/load_test.py --concurrency 1,4,16
+#   python seattlepark/benchmarks/load_test.py --latency 0.2 --no-cache
+#
+# Each level reports the throughput, the latency percentiles in
+# milliseconds and the rate of failed requests and of requests the app
+# answered with an error message, and the results can be saved as JSON to
+# compare runs across commits.
+
+import argparse
+import datetime
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# run_benchmarks is next to this script, the app in src
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, '..', 'src'))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from coordinates_util import CoordinatesUtil  # noqa: E402
+from geocode_cache import GeocodeCache  # noqa: E402
+from run_benchmarks import Location, git_commit  # noqa: E402
+from street_geometry import StreetGeometry  # noqa: E402
+
+# the endpoint Dash posts the inputs of a callback to
+CALLBACK_PATH = '/_dash-update-component'
+
+
+class GeoJsonGeocoder:
+    """
+    This class stands in for GoogleV3: every address is placed at the
+    mid-point of a street of the street json, the same street for the same
+    address, after waiting latency seconds like a call to the API would.
+    """
+
+    def __init__(self, geometry=None, latency=0.05):
+        """
+        Parameters
+        ----------
+        geometry: StreetGeometry, optional
+            the streets the addresses are placed on, defaults to the file
+            shipped in the resources folder.
+
+        latency: float, optional
+            the number of seconds each geocoding takes.
+        """
+        geometry = geometry if geometry is not None else StreetGeometry()
+        self.latitudes = geometry.mid_latitudes
+        self.longitudes = geometry.mid_longitudes
+        self.latency = latency
+
+    def geocode(self, address):
+        if self.latency > 0:
+            time.sleep(self.latency)
+        street = random.Random(address).randrange(len(self.latitudes))
+        return Location(float(self.latitudes[street]),
+                        float(self.longitudes[street]))
+
+
+def serve(ports, latency=0.05, cache=True):
+    """
+    Serve the Dash app, with a GeoJsonGeocoder, on a free port of
+    localhost, and put the port in the queue ports. Runs in the child
+    process until it is terminated.
+    """
+    from werkzeug.serving import make_server
+
+    import parking_app
+
+    # the app prints every request, the clients report them instead
+    sys.stdout = open(os.devnull, 'w')
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    cu = CoordinatesUtil(
+        geocode_cache=GeocodeCache() if cache else GeocodeCache(max_size=0),
+        remote_geocoding=False)
+    cu.geo_locator = GeoJsonGeocoder(latency=latency)
+    cu.local_geocoder
+    app = parking_app.create_app(
+        cu, response_cache_size=None if cache else 0, reload_interval=0)
+    server = make_server('127.0.0.1', 0, app.server, threaded=True)
+    ports.put(server.server_port)
+    server.serve_forever()
+
+
+def start_server(latency=0.05, cache=True, timeout=120):
+    """
+    Start the app in a child process and return the process and the url
+    of the app.
+    """
+    ports = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve,
+                                      args=(ports, latency, cache),
+                                      daemon=True)
+    process.start()
+    try:
+        port = ports.get(timeout=timeout)
+    except Exception:
+        process.terminate()
+        raise RuntimeError('The app did not start within %d seconds' %
+                           timeout)
+    return process, 'http://127.0.0.1:%d' % port
+
+
+def callback_payload(destination, distance, n_clicks=1):
+    """
+    Return the body of the request the browser sends when the submit
+    button is clicked.
+    """
+    return {
+        'output': '..seattle_street_map.figure...error.children..',
+        'outputs': [{'id': 'seattle_street_map', 'property': 'figure'},
+                    {'id': 'error', 'property': 'children'}],
+        'inputs': [{'id': 'submit', 'property': 'n_clicks',
+                    'value': n_clicks}],
+        'changedPropIds': ['submit.n_clicks'],
+        'state': [{'id': 'destination', 'property': 'value',
+                   'value': destination},
+                  {'id': 'accept_distance', 'property': 'value',
+                   'value': distance}],
+    }
+
+
+def submit(url, destination, distance, timeout=30):
+    """
+    Post one submit to the app and return its latency in milliseconds and
+    its outcome: 'ok', 'invalid' when the app answered with an error
+    message, or 'error' when the request failed.
+    """
+    request = urllib.request.Request(
+        url + CALLBACK_PATH,
+        data=json.dumps(callback_payload(destination, distance)).encode(),
+        headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = json.load(response)
+        outcome = 'invalid' if body['response']['error']['children'] \
+            else 'ok'
+    except (OSError, ValueError, KeyError, TypeError):
+        # urllib.error.URLError and HTTPError are OSErrors
+        outcome = 'error'
+    return (time.perf_counter() - start) * 1000, outcome
+
+
+def run_level(url, concurrency, requests, addresses, distances, rng):
+    """
+    Post requests submits from concurrency clients at once and return the
+    throughput, latency percentiles and error rates.
+    """
+    jobs = [(rng.choice(addresses), rng.choice(distances))
+            for _ in range(requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda job: submit(url, *job), jobs))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    outcomes = [outcome for _, outcome in results]
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1,
+                             int(p / 100 * len(latencies)))]
+
+    return {
+        'concurrency': concurrency,
+        'requests': len(results),
+        'seconds': elapsed,
+        'throughput_rps': len(results) / elapsed,
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'error_rate': outcomes.count('error') / len(results),
+        'invalid_rate': outcomes.count('invalid') / len(results),
+    }
+
+
+def run(concurrency=(1, 2, 4, 8, 16), requests=200, latency=0.05,
+        cache=True, n_addresses=1000, distances=('0.25', '0.5', '1'),
+        warmup=10, seed=0):
+    """
+    Start the app, load it at each level of concurrency in turn and return
+    the results as a dictionary.
+
+    Parameters
+    ----------
+    concurrency: tuple, optional
+        the numbers of concurrent clients, in the order they are run.
+
+    requests: int, optional
+        the number of submits of each level.
+
+    latency: float, optional
+        the number of seconds each geocoding takes.
+
+    cache: bool, optional
+        whether the geocode and response caches of the app are on.
+
+    n_addresses: int, optional
+        the number of distinct destinations the submits are drawn from.
+
+    distances: tuple, optional
+        the acceptable distances the submits are drawn from.
+
+    warmup: int, optional
+        the number of submits sent before the first level.
+
+    seed: int, optional
+        the seed of the destinations and distances.
+    """
+    rng = random.Random(seed)
+    addresses = ['%d Load Test Ave' % i for i in range(n_addresses)]
+    process, url = start_server(latency, cache)
+    try:
+        run_level(url, 1, warmup, addresses, distances, rng)
+        levels = [run_level(url, level, requests, addresses, distances,
+                            rng) for level in concurrency]
+    finally:
+        process.terminate()
+        process.join()
+
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'latency_s': latency,
+        'cache': cache,
+        'levels': levels,
+    }
+
+
+def report(results):
+    """
+    Return the results as a table, one row per level of concurrency.
+    """
+    lines = ['%11s %9s %9s %9s %9s %9s %8s %8s' % (
+        'concurrency', 'requests', 'req/s', 'p50', 'p95', 'p99', 'errors',
+        'invalid')]
+    for level in results['levels']:
+        lines.append('%11d %9d %9.1f %9.1f %9.1f %9.1f %7.1f%% %7.1f%%' % (
+            level['concurrency'], level['requests'],
+            level['throughput_rps'], level['p50_ms'], level['p95_ms'],
+            level['p99_ms'], level['error_rate'] * 100,
+            level['invalid_rate'] * 100))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Load test the seattlepark app with a stub geocoder.')
+    parser.add_argument('--concurrency', default='1,2,4,8,16',
+                        help='comma separated numbers of concurrent '
+                             'clients (default 1,2,4,8,16)')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='submits per level (default 200)')
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='seconds each geocoding takes (default 0.05)')
+    parser.add_argument('--no-cache', dest='cache', action='store_false',
+                        help='turn the geocode and response caches off')
+    parser.add_argument('--addresses', type=int, default=1000,
+                        help='distinct destinations (default 1000)')
+    parser.add_argument('--distances', default='0.25,0.5,1',
+                        help='comma separated acceptable distances')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--output', help='save the results to this file')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = run(
+        tuple(int(level) for level in args.concurrency.split(',')),
+        args.requests, args.latency, args.cache, args.addresses,
+        tuple(args.distances.split(',')), args.warmup, args.seed)
+    print(report(results))
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
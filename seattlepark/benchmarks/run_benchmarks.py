@@ -0,0 +1,330 @@
+# Benchmarks of the request pipeline of seattlepark.
+#
+# Every stage of a request is timed on its own, from loading the street
+# geometry to building the map figure, against a stub geocoder and a
+# synthetic parking study, so runs need no network and no copy of the
+# parking study data:
+#
+#   python seattlepark/benchmarks/run_benchmarks.py --output after.json
+#   python seattlepark/benchmarks/run_benchmarks.py --compare before.json
+#
+# Each stage reports its latency distribution in milliseconds and the peak
+# memory it allocates, and the results are saved as JSON so runs can be
+# compared across commits.
+
+import argparse
+import collections
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                       'src')
+sys.path.insert(0, SRC_DIR)
+
+import numpy as np  # noqa: E402
+
+from coordinates_util import CoordinatesUtil  # noqa: E402
+from geocode_cache import GeocodeCache  # noqa: E402
+from parking_data import ParkingData  # noqa: E402
+from parking_recommender import ParkingRecommender  # noqa: E402
+from parking_spot import ParkingSpotArray  # noqa: E402
+from parking_study import ParkingStudy  # noqa: E402
+from recommendation_tiles import RecommendationTiles  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+from street_geometry import StreetGeometry  # noqa: E402
+
+# Destinations are drawn from this box around downtown Seattle
+SEATTLE_BOX = ((47.59, 47.67), (-122.36, -122.30))
+
+RADII = (0.25, 0.5, 1.0)
+
+Location = collections.namedtuple('Location', ['latitude', 'longitude'])
+
+
+class StubGeocoder:
+    """
+    This class stands in for GoogleV3: every address is placed at a fixed,
+    made up location inside SEATTLE_BOX, without a network call.
+    """
+
+    def geocode(self, address):
+        rng = random.Random(address)
+        return Location(rng.uniform(*SEATTLE_BOX[0]),
+                        rng.uniform(*SEATTLE_BOX[1]))
+
+
+def write_synthetic_study(path, street_names, rows_per_street=30, seed=0):
+    """
+    Write a parking study csv with the columns ParkingStudy reads, with
+    observations of every street between 8:00 and 20:00.
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    n = len(street_names) * rows_per_street
+    df = pd.DataFrame({
+        'Unitdesc': np.repeat(np.asarray(street_names, dtype=object),
+                              rows_per_street),
+        'Side': rng.choice(['N', 'S', 'E', 'W'], n),
+        'Hour': rng.integers(8, 21, n),
+        'Free_Spaces': rng.integers(-2, 15, n).astype(float),
+    })
+    df.to_csv(path, index=False)
+
+
+def measure(function, repeat):
+    """
+    Return the running times of function in milliseconds, and the peak
+    memory in bytes it allocates on one more run.
+    """
+    function()  # warm up caches and lazy imports
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return timings, peak
+
+
+def summarize(timings, peak):
+    """
+    Return the latency distribution and peak memory of a stage.
+    """
+    ordered = sorted(timings)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    return {
+        'runs': len(ordered),
+        'mean_ms': statistics.mean(ordered),
+        'median_ms': statistics.median(ordered),
+        'p90_ms': percentile(90),
+        'p99_ms': percentile(99),
+        'min_ms': ordered[0],
+        'max_ms': ordered[-1],
+        'peak_memory_kb': peak / 1024,
+    }
+
+
+def build_stages(workdir, seed=0):
+    """
+    Return the stages to benchmark, as an ordered dictionary with the key
+    as stage name and value a function running the stage once.
+    """
+    import parking_app
+
+    rng = random.Random(seed)
+    geometry = StreetGeometry()
+    study_path = os.path.join(workdir, 'study.csv')
+    write_synthetic_study(study_path, geometry.street_names)
+    ParkingStudy.set_instance(ParkingStudy(study_path))
+
+    cu = CoordinatesUtil(geocode_cache=GeocodeCache(max_size=0),
+                         remote_geocoding=False, use_tiles=False)
+    cu.geo_locator = StubGeocoder()
+    walking_cu = CoordinatesUtil(geocode_cache=GeocodeCache(max_size=0),
+                                 remote_geocoding=False,
+                                 walking_distance=True)
+    walking_cu.geo_locator = cu.geo_locator
+    walking_cu.data.walking_network
+    segment_cu = CoordinatesUtil(geocode_cache=GeocodeCache(max_size=0),
+                                 remote_geocoding=False,
+                                 segment_distance=True)
+    segment_cu.geo_locator = cu.geo_locator
+    addresses = ['%d Benchmark Ave' % i for i in range(200)]
+    destination = cu.get_destination_coordinates(addresses[0])
+    when = datetime.datetime(2021, 1, 1, 12, 30)
+
+    # the streets within a mile of one destination
+    street_ids = cu.spatial_index.query(destination, 1.0)
+    distances = cu.cal_distances(destination, cu.mid_latitudes[street_ids],
+                                 cu.mid_longitudes[street_ids])
+    street_ids = street_ids[distances <= 1.0]
+    distances = distances[distances <= 1.0]
+    spot_array = ParkingSpotArray(
+        cu.street_names[street_ids], distances,
+        cu.line_coordinates[street_ids], cu.mid_latitudes[street_ids],
+        cu.mid_longitudes[street_ids], street_ids)
+    spot_list = spot_array.to_spots()
+    recommender = ParkingRecommender(spot_list, when)
+
+    def import_coordinates_util():
+        # in a fresh interpreter, like the cold start of a worker process
+        subprocess.run([sys.executable, '-c', 'import coordinates_util'],
+                       env=dict(os.environ, PYTHONPATH=SRC_DIR), check=True)
+
+    def geojson_load():
+        CoordinatesUtil(data=ParkingData()).sea_parking_geocode()
+
+    def radius_scan(radius):
+        return lambda: cu.get_parking_spots(rng.choice(addresses), radius)
+
+    tiles_cu = []
+
+    def tiles_scan():
+        if not tiles_cu:
+            # the tiles are built by the warm up run, only when this stage
+            # runs
+            study = ParkingStudy.get_instance()
+            RecommendationTiles.build(geometry, study,
+                                      radii=(0.5,)).save(geometry)
+            tiles_cu.append(CoordinatesUtil(
+                geocode_cache=GeocodeCache(max_size=0),
+                remote_geocoding=False, data=ParkingData(study, geometry)))
+            tiles_cu[0].geo_locator = cu.geo_locator
+        return tiles_cu[0].get_parking_spots(rng.choice(addresses), 0.5)
+
+    def slice_by_hour():
+        ParkingRecommender(spot_list, when).slice_by_hour(when.hour)
+
+    stages = collections.OrderedDict()
+    stages['import_coordinates_util'] = import_coordinates_util
+    stages['street_geometry_json'] = \
+        lambda: StreetGeometry(use_snapshot=False)
+    stages['street_geometry_snapshot'] = StreetGeometry
+    stages['sea_parking_geocode'] = geojson_load
+    stages['study_csv_load'] = \
+        lambda: ParkingStudy(study_path, use_snapshot=False)
+    stages['study_snapshot_load'] = lambda: ParkingStudy(study_path)
+    stages['parking_data_reload'] = \
+        lambda: ParkingData.load(study_path).validate()
+    for radius in RADII:
+        stages['get_parking_spots_%gmi' % radius] = radius_scan(radius)
+    stages['get_parking_spots_walking_0.5mi'] = \
+        lambda: walking_cu.get_parking_spots(rng.choice(addresses), 0.5)
+    stages['get_parking_spots_segment_0.5mi'] = \
+        lambda: segment_cu.get_parking_spots(rng.choice(addresses), 0.5)
+    stages['get_parking_spots_tiles_0.5mi'] = tiles_scan
+    stages['recommender_init'] = lambda: ParkingRecommender(spot_list, when)
+    stages['recommender_init_array'] = \
+        lambda: ParkingRecommender(spot_array, when)
+    stages['slice_by_hour'] = slice_by_hour
+    stages['max_freespace'] = recommender.max_freespace
+    stages['recommend'] = recommender.recommend
+    stages['recommend_300'] = lambda: recommender.recommend(300)
+    stages['create_parking_spots'] = \
+        lambda: parking_app.create_parking_spots(
+            1, rng.choice(addresses), '0.5', cu)
+    stages['create_parking_spots_single_trace'] = \
+        lambda: parking_app.create_parking_spots(
+            1, rng.choice(addresses), '0.5', cu, single_trace=True)
+    response_cache = ResponseCache()
+    stages['create_parking_spots_cached'] = \
+        lambda: parking_app.create_parking_spots(
+            1, addresses[0], '0.5', cu, response_cache)
+    return stages
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            check=True).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(repeat=50, only=None, seed=0):
+    """
+    Run the benchmarks and return the results as a dictionary.
+
+    Parameters
+    ----------
+    repeat: int, optional
+        the number of timed runs of each stage.
+
+    only: list, optional
+        the names of the stages to run, every stage by default.
+
+    seed: int, optional
+        the seed of the synthetic study and the destinations.
+    """
+    workdir = tempfile.mkdtemp()
+    previous_study = ParkingStudy._instance
+    try:
+        stages = build_stages(workdir, seed)
+        results = collections.OrderedDict()
+        for name, function in stages.items():
+            if only and name not in only:
+                continue
+            results[name] = summarize(*measure(function, repeat))
+    finally:
+        ParkingStudy.set_instance(previous_study)
+        shutil.rmtree(workdir)
+
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'repeat': repeat,
+        'stages': results,
+    }
+
+
+def report(results, baseline=None):
+    """
+    Return the results as a table, with the change of the median against
+    baseline if given.
+    """
+    lines = ['%-34s %9s %9s %9s %11s%s' % (
+        'stage', 'median', 'p90', 'max', 'peak KiB',
+        '  vs baseline' if baseline else '')]
+    for name, stage in results['stages'].items():
+        line = '%-34s %9.3f %9.3f %9.3f %11.1f' % (
+            name, stage['median_ms'], stage['p90_ms'], stage['max_ms'],
+            stage['peak_memory_kb'])
+        if baseline and name in baseline['stages']:
+            before = baseline['stages'][name]['median_ms']
+            line += '  %+7.1f%%' % ((stage['median_ms'] - before) /
+                                    before * 100 if before else 0)
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the seattlepark request pipeline.')
+    parser.add_argument('--repeat', type=int, default=50,
+                        help='timed runs of each stage (default 50)')
+    parser.add_argument('--stage', action='append',
+                        help='only run this stage, may be repeated')
+    parser.add_argument('--output', help='save the results to this file')
+    parser.add_argument('--compare', help='results file of an earlier run')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat, args.stage, args.seed)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+    print(report(results, baseline))
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
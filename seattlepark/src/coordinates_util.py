@@ -1,12 +1,20 @@
-import json
+# geopy, haversine, asyncio and pandas (through parking_recommender) are
+# imported where they are first used, so that importing this module for a
+# batch job or a test stays cheap.
+import numbers
 import os
 import sys
 
-from geopy import GoogleV3
-import haversine as hs
+import numpy as np
 
-from parking_recommender import ParkingRecommender
-from parking_spot import ParkingSpot
+from geocode_cache import GeocodeCache
+from metrics import Metrics
+from parking_data import ParkingData
+from parking_recommender import (InvalidStreetError,
+                                 NoParkingSpotsInListError,
+                                 ParkingRecommender)
+from parking_spot import ParkingSpotArray
+from spatial_index import EARTH_RADIUS_MI, SEATTLE_LATITUDE
 import base64
 import datetime
 
@@ -17,75 +25,258 @@ class CoordinatesUtil:
 
     Attributes
     ----------
+    data: Instance of ParkingData
+        the version of the street locations and Parking Study tables the
+        requests read, the current process-wide version unless given. A
+        request reads it once, so a reload never mixes two versions in one
+        response.
     coordinates_mapping: dictionary
         a dictionary with the key as street name, and value is a list of
         1) a list of coordinates of start and end of a street
         2) mid-point of a street
+    street_names: ndarray
+        the street names of coordinates_mapping, in the same order as
+        line_coordinates, mid_latitudes and mid_longitudes.
+    line_coordinates: ndarray
+        a (street, 2, 2) array of the coordinates of the start and end of
+        each street.
+    mid_latitudes: ndarray
+        the latitude of the mid-point of each street.
+    mid_longitudes: ndarray
+        the longitude of the mid-point of each street.
+    spatial_index: Instance of GridIndex
+        a grid index of the street mid-points, to find the streets near
+        the destination without measuring every street.
+    local_geocoder: Instance of IntersectionGeocoder
+        geocodes intersections and street names of the street dataset
+        without a network call.
     geo_locator: Instance of GoogleV3
         GoogleV3 is a class of library geopy. It helps to get the coordinates
-        of the user input destination address.
+        of the user input destination address. None when running offline.
+        Created on first use in each process, so that the workers of a
+        pre-fork server don't share the connections of the master.
+    geocode_cache: Instance of GeocodeCache
+        the coordinates of addresses already geocoded, so that a repeated
+        destination doesn't call the Google Map API again.
+    walking_distance: bool
+        whether the acceptable distance is walked along the streets, see
+        WalkingNetwork, rather than measured in a straight line.
+    segment_distance: bool
+        whether the distance to a street is measured to the nearest point
+        of its segment, see cal_segment_distances, rather than to its
+        mid-point.
+    use_tiles: bool
+        whether the requests are answered from the RecommendationTiles of
+        data when it has them, with the same result as the live path.
 
     Methods
     -------
     sea_parking_geocode()
-        Load the json file and return the coordinates_mapping.
+        Load the street locations and return the coordinates_mapping.
 
     get_parking_spots(destination_address, acceptable_distance)
         Return the top 5 recommended parking spots and the coordinates of the
         user input destination address.
 
+    rank_parking_spots(destination_coordinates, distance)
+        Return the top 5 recommended parking spots within distance of the
+        destination coordinates.
+
+    recommend_from_tiles(data, destination_coordinates, distance, when)
+        Return the recommended parking spots from the RecommendationTiles
+        of data.
+
+    within_walking_distance(data, destination_coordinates, street_ids,
+                            distances, distance)
+        Return the streets within walking distance of the destination.
+
+    recommend_streets(street_ids, distances, destination_coordinates, when,
+                      num_returns, data)
+        Return the recommended parking spots among the given streets.
+
+    get_parking_spots_batch(requests, num_returns, max_workers)
+        Return the recommended parking spots of many destinations at once.
+
+    aget_parking_spots(destination_address, acceptable_distance)
+        Coroutine version of get_parking_spots.
+
     get_destination_coordinates(destination_address)
         Using Google Map API to return the coordinates of the user input
         destination address.
 
+    aget_destination_coordinates(destination_address)
+        Coroutine version of get_destination_coordinates.
+
+    get_destinations_coordinates(destination_addresses, max_workers)
+        Return the coordinates of many destination addresses.
+
+    find_known_coordinates(destination_address)
+        Return the coordinates of the destination if they are known without
+        a network call.
+
+    geocode_remote(destination_address)
+        Return the coordinates of the destination from the Google Map API.
+
+    create_geo_locator()
+        Return a new GoogleV3 geocoder.
+
     cal_distance(coordinates1, coordinates2)
         Calculate the distance between the user input destination and each
         parking street.
         Return the calculated distance.
 
+    cal_distances(coordinates, latitudes, longitudes)
+        Calculate the distances between the user input destination and many
+        points at once.
+
+    cal_distance_matrix(coordinates_list, latitudes, longitudes)
+        Calculate the distances between many destinations and many points in
+        one pass.
+
+    cal_segment_distances(coordinates, line_coordinates)
+        Calculate the distances between the user input destination and the
+        nearest point of many street segments at once.
+
+    cal_segment_distance_matrix(coordinates_list, line_coordinates)
+        Calculate the distances between many destinations and the nearest
+        point of many street segments in one pass.
+
+    valid_coordinates(coordinates_list)
+        Return the coordinates of many destinations as columns, and whether
+        each is valid.
+
     decode_data(file_location)
         Decode the required base64 encoded data.
     """
 
-    coordinates_mapping = {}
+    def __init__(self, geocode_cache=None, remote_geocoding=True, data=None,
+                 walking_distance=False, segment_distance=False,
+                 use_tiles=True):
+        """
+        Parameters
+        ----------
+        geocode_cache: GeocodeCache, optional
+            the cache of geocoding results, defaults to an in-memory cache.
+
+        remote_geocoding: bool, optional
+            whether to call the Google Map API for destinations the local
+            geocoder can't place. With False, no network call is made.
+
+        data: ParkingData, optional
+            a fixed version of the data to read, by default the current
+            version, which DataReloader may replace.
+
+        walking_distance: bool, optional
+            whether to measure the distance to the streets along the walking
+            network. Distances longer than the radius of its shortest path
+            index are still measured in a straight line.
+
+        segment_distance: bool, optional
+            whether to measure the distance to the nearest point of each
+            street rather than to its mid-point.
+
+        use_tiles: bool, optional
+            whether to look the requests up in the recommendation tiles
+            first. The tiles are built for the distance to the mid-points,
+            so they are not used with walking_distance or segment_distance.
+        """
+        self._data = data
+        self.walking_distance = walking_distance
+        self.segment_distance = segment_distance
+        self.use_tiles = use_tiles and not (walking_distance or
+                                            segment_distance)
+        self._coordinates_mapping = None
+        self._geo_locator = None
+        self._geo_locator_pid = None
+        self._geo_locator_factory = \
+            self.create_geo_locator if remote_geocoding else None
+        self.geocode_cache = geocode_cache or GeocodeCache()
+        self.sea_parking_geocode()
+
+    @property
+    def geo_locator(self):
+        """
+        The geocoder of the Google Map API, created on first use in each
+        process.
+        """
+        if self._geo_locator_factory is not None and \
+                self._geo_locator_pid != os.getpid():
+            self._geo_locator = self._geo_locator_factory()
+            self._geo_locator_pid = os.getpid()
+        return self._geo_locator
+
+    @geo_locator.setter
+    def geo_locator(self, geo_locator):
+        # a geocoder set by the caller is used as is, also after a fork
+        self._geo_locator = geo_locator
+        self._geo_locator_factory = None
+
+    def create_geo_locator(self):
+        """
+        Return a new GoogleV3 geocoder, with the google api key of the
+        resources folder.
+        """
+        from geopy import GoogleV3
 
-    def __init__(self):
         key = self.decode_data('resources/google_map_api.key')
-        # Initializing the geo location to the GoogleV3 in the constructor
-        #   with the google api key extracted above
-        self.geo_locator = GoogleV3(api_key=key)
-        self.sea_parking_geocode()
+        return GoogleV3(api_key=key)
+
+    @property
+    def data(self):
+        """
+        The version of the data the next request reads.
+        """
+        if self._data is not None:
+            return self._data
+        return ParkingData.get_instance()
+
+    @property
+    def coordinates_mapping(self):
+        """
+        The streets of data as a dictionary.
+        """
+        if self._coordinates_mapping is not None:
+            return self._coordinates_mapping
+        return self.data.coordinates_mapping
+
+    @coordinates_mapping.setter
+    def coordinates_mapping(self, coordinates_mapping):
+        # a mapping set by the caller is returned as is
+        self._coordinates_mapping = coordinates_mapping
+
+    @property
+    def street_names(self):
+        return self.data.street_names
+
+    @property
+    def line_coordinates(self):
+        return self.data.line_coordinates
+
+    @property
+    def mid_latitudes(self):
+        return self.data.mid_latitudes
+
+    @property
+    def mid_longitudes(self):
+        return self.data.mid_longitudes
+
+    @property
+    def spatial_index(self):
+        return self.data.spatial_index
+
+    @property
+    def local_geocoder(self):
+        """
+        The IntersectionGeocoder of data, built on first use.
+        """
+        return self.data.local_geocoder
 
     def sea_parking_geocode(self):
         """
-        Load the json file and return the coordinates_mapping.
-        """
-        if self.coordinates_mapping and len(
-                self.coordinates_mapping) > 0:
-            return self.coordinates_mapping
-        else:
-            path = os.path.join(os.path.dirname(__file__),
-                                'resources/Midpoints_and_LineCoords.json')
-            with open(path) as json_data:
-                seattle_data = json.load(json_data)
-                features = seattle_data["features"]
-                for feature in features:
-                    properties = feature["properties"]
-                    geometry = feature["geometry"]
-                    coordinates = geometry["coordinates"]
-                    mid_point = geometry["midpoint"]
-                    address = properties["UNITDESC"]
-                    lat_start = coordinates[0][1]
-                    lat_end = coordinates[1][1]
-                    log_start = coordinates[0][0]
-                    log_end = coordinates[1][0]
-                    line_latitudes = [lat_start, lat_end]
-                    line_longitudes = [log_start, log_end]
-                    dot_mid_street_lat = mid_point[1]
-                    dot_mid_street_log = mid_point[0]
-                    self.coordinates_mapping[address] = \
-                        [[line_latitudes, line_longitudes],
-                         [dot_mid_street_lat, dot_mid_street_log]]
+        Load the street locations and return the coordinates_mapping.
+        """
+        # the json file is parsed once, later starts load its snapshot
+        return self.coordinates_mapping
 
     def get_parking_spots(self, destination_address, acceptable_distance):
         """
@@ -116,51 +307,301 @@ class CoordinatesUtil:
             coordinates of the user input destination
             address.
         """
-
+        metrics = Metrics.get_instance()
+        metrics.increment('requests')
         distance = float(acceptable_distance)
 
         try:
-            destination_coordinates = self.get_destination_coordinates(
-                destination_address
-            )
+            with metrics.time('geocode'):
+                destination_coordinates = self.get_destination_coordinates(
+                    destination_address
+                )
             print(f"Destination Coordinates: {destination_coordinates}")
         except Exception:
+            metrics.increment('errors', stage='geocode')
             print(f"Invalid Destination: {destination_address}")
             return [], None
 
-        street_meet_expect = []
-        for street in self.sea_parking_geocode():
-            street_mid_coordinates = self.coordinates_mapping[street][1]
-            street_start_and_end_coordinates = \
-                self.coordinates_mapping[street][0]
-
-            distance_in_between = self.cal_distance(
-                destination_coordinates, street_mid_coordinates)
-
-            if distance_in_between <= distance:
-                ps = ParkingSpot(
-                    distance_in_between,
-                    street_start_and_end_coordinates,
-                    street,
-                    street_mid_coordinates[0],
-                    street_mid_coordinates[1])
-                street_meet_expect.append(ps)
-
-        if len(street_meet_expect) == 0:
+        return self.rank_parking_spots(destination_coordinates, distance)
+
+    def rank_parking_spots(self, destination_coordinates, distance):
+        """
+        Return the top 5 recommended parking spots within distance of the
+        destination coordinates. This is the part of get_parking_spots that
+        runs after geocoding, and it makes no network calls.
+
+        Parameters
+        ----------
+        destination_coordinates: list, required
+            a list of the latitude and longitude of the destination.
+
+        distance: float, required
+            the acceptable walking distance in miles.
+
+        Returns
+        -------
+        Tuple
+            the same tuple as get_parking_spots.
+        """
+        data = self.data
+        when = datetime.datetime.now()
+        if self.use_tiles:
+            response = self.recommend_from_tiles(
+                data, destination_coordinates, distance, when)
+            if response is not None:
+                return response
+
+        with Metrics.get_instance().time('radius_scan'):
+            # only measure the streets the grid index can't rule out
+            if self.segment_distance:
+                # the index holds the mid-points, a segment may come closer
+                # than its mid-point by up to segment_reach
+                candidates = data.spatial_index.query(
+                    destination_coordinates, distance + data.segment_reach)
+                distances = self.cal_segment_distances(
+                    destination_coordinates,
+                    data.line_coordinates[candidates])
+            else:
+                candidates = data.spatial_index.query(
+                    destination_coordinates, distance)
+                distances = self.cal_distances(
+                    destination_coordinates, data.mid_latitudes[candidates],
+                    data.mid_longitudes[candidates])
+            within = distances <= distance
+            street_ids, distances = self.within_walking_distance(
+                data, destination_coordinates, candidates[within],
+                distances[within], distance)
+        return self.recommend_streets(street_ids, distances,
+                                      destination_coordinates, when,
+                                      data=data)
+
+    def recommend_from_tiles(self, data, destination_coordinates, distance,
+                             when, num_returns=5):
+        """
+        Return the recommended parking spots from the RecommendationTiles
+        of data, the same ones recommend_streets returns for the streets
+        within distance of the destination.
+
+        Parameters
+        ----------
+        data: ParkingData, required
+            the version of the data to read.
+
+        destination_coordinates: list, required
+            a list of the latitude and longitude of the destination.
+
+        distance: float, required
+            the acceptable walking distance in miles.
+
+        when: datetime, required
+            the time the parking is wanted.
+
+        num_returns: int, optional
+            the number of parking spots returned.
+
+        Returns
+        -------
+        Tuple
+            None if data has no tiles or they can't answer the request,
+            otherwise the same tuple as get_parking_spots.
+        """
+        tiles = data.tiles
+        if tiles is None or tiles.study is not data.study:
+            return None
+        metrics = Metrics.get_instance()
+        with metrics.time('tile_lookup'):
+            found = tiles.lookup(destination_coordinates, distance,
+                                 when.hour, num_returns, self.cal_distances)
+        metrics.increment('tiles', result='miss' if found is None else 'hit')
+        if found is None:
+            return None
+
+        street_ids, free_spaces = found
+        if len(street_ids) == 0:
+            metrics.increment('empty_results')
+            return [], None
+        spots = ParkingSpotArray(
+            data.street_names[street_ids],
+            self.cal_distances(destination_coordinates,
+                               data.mid_latitudes[street_ids],
+                               data.mid_longitudes[street_ids]),
+            data.line_coordinates[street_ids],
+            data.mid_latitudes[street_ids], data.mid_longitudes[street_ids],
+            street_ids, free_spaces)
+        return spots.to_spots(), destination_coordinates
+
+    def within_walking_distance(self, data, destination_coordinates,
+                                street_ids, distances, distance):
+        """
+        Return the streets within walking distance of the destination and
+        their walking distances, among the streets within distance of it in
+        a straight line. Without walking_distance, the streets and the
+        straight-line distances are returned as they are.
+
+        Parameters
+        ----------
+        data: ParkingData, required
+            the version of the data street_ids refer to.
+
+        destination_coordinates: list, required
+            a list of the latitude and longitude of the destination.
+
+        street_ids: ndarray, required
+            the positions in street_names of the streets within distance.
+
+        distances: ndarray, required
+            the straight-line distance to each of the streets.
+
+        distance: float, required
+            the acceptable walking distance in miles.
+
+        Returns
+        -------
+        Tuple
+            the street ids and the distances of the streets within
+            distance.
+        """
+        if not self.walking_distance or len(street_ids) == 0:
+            return street_ids, distances
+        # a walk is never shorter than the straight line, so the streets
+        # further away in a straight line are already ruled out
+        walking = data.walking_network.walking_distances(
+            destination_coordinates, street_ids, distances, distance)
+        if walking is None:
+            return street_ids, distances
+        within = walking <= distance
+        return street_ids[within], walking[within]
+
+    def recommend_streets(self, street_ids, distances,
+                          destination_coordinates, when, num_returns=5,
+                          data=None):
+        """
+        Return the recommended parking spots among the given streets.
+
+        Parameters
+        ----------
+        street_ids: ndarray, required
+            the positions in street_names of the streets within the
+            acceptable distance, in increasing order.
+
+        distances: ndarray, required
+            the distance between the destination and each of the streets.
+
+        destination_coordinates: list, required
+            a list of the latitude and longitude of the destination.
+
+        when: datetime or str, required
+            the time the parking is wanted.
+
+        num_returns: int, optional
+            the number of parking spots returned.
+
+        data: ParkingData, optional
+            the version of the data street_ids refer to, defaults to data.
+
+        Returns
+        -------
+        Tuple
+            the same tuple as get_parking_spots.
+        """
+        metrics = Metrics.get_instance()
+        if len(street_ids) == 0:
+            metrics.increment('empty_results')
             return [], None
-        else:
-            current_utc_time = datetime.datetime.now()
-            pr = ParkingRecommender(street_meet_expect, current_utc_time)
+
+        if data is None:
+            data = self.data
+        street_meet_expect = ParkingSpotArray(
+            data.street_names[street_ids], distances,
+            data.line_coordinates[street_ids],
+            data.mid_latitudes[street_ids], data.mid_longitudes[street_ids],
+            street_ids)
+        with metrics.time('recommend'):
             try:
-                recommended_spots = pr.recommend()
+                pr = ParkingRecommender(street_meet_expect, when, data.study)
+                recommended_spots = pr.recommend(num_returns)
                 return recommended_spots, destination_coordinates
-            except Exception:
-                return street_meet_expect[0:5], destination_coordinates
+            except (InvalidStreetError, NoParkingSpotsInListError) as error:
+                # a street missing from the Parking Study falls back to the
+                # closest streets
+                metrics.increment('fallbacks', reason=type(error).__name__)
+                closest = np.argsort(distances, kind='stable')[:num_returns]
+                return street_meet_expect.to_spots(closest), \
+                    destination_coordinates
+
+    def get_parking_spots_batch(self, requests, num_returns=5,
+                                max_workers=8):
+        """
+        Return the recommended parking spots of many destinations at once.
+
+        Every distinct destination address is geocoded once, the distances
+        between all destinations and all streets are computed in one pass,
+        and every recommendation reads the same aggregated Parking Study
+        tables.
+
+        Parameters
+        ----------
+        requests: list, required
+            a list of (destination_address, acceptable_distance) or
+            (destination_address, acceptable_distance, datetime) tuples.
+            Without a datetime, or with None, the current time is used.
+
+        num_returns: int, optional
+            the number of parking spots returned per destination.
+
+        max_workers: int, optional
+            the number of addresses sent to the Google Map API at once.
+
+        Returns
+        -------
+        list
+            a tuple per request, in the order of requests, the same tuple
+            as get_parking_spots.
+        """
+        metrics = Metrics.get_instance()
+        requests = [tuple(request) + (None,) * (3 - len(request))
+                    for request in requests]
+        metrics.increment('requests', len(requests))
+        coordinates = self.get_destinations_coordinates(
+            [address for address, _, _ in requests], max_workers)
+        # every request of the batch reads the same version
+        data = self.data
+
+        results = []
+        # bound the size of the distance matrix on very large batches
+        for start in range(0, len(requests), 256):
+            chunk = requests[start:start + 256]
+            destinations = [coordinates[address] for address, _, _ in chunk]
+            if self.segment_distance:
+                matrix = self.cal_segment_distance_matrix(
+                    destinations, data.line_coordinates)
+            else:
+                matrix = self.cal_distance_matrix(
+                    destinations, data.mid_latitudes, data.mid_longitudes)
+            now = datetime.datetime.now()
+            for (address, distance, when), destination, distances in \
+                    zip(chunk, destinations, matrix):
+                if destination is None:
+                    metrics.increment('errors', stage='geocode')
+                    print(f"Invalid Destination: {address}")
+                    results.append(([], None))
+                    continue
+                street_ids = np.flatnonzero(distances <= float(distance))
+                street_ids, street_distances = \
+                    self.within_walking_distance(
+                        data, destination, street_ids,
+                        distances[street_ids], float(distance))
+                results.append(self.recommend_streets(
+                    street_ids, street_distances, destination,
+                    now if when is None else when, num_returns, data))
+        return results
 
     def get_destination_coordinates(self, destination_address):
         """
         Using Google Map API to return the coordinates of the user input
-        destination address.
+        destination address. Intersections and street names of the street
+        dataset are geocoded locally, and addresses found in geocode_cache
+        are not sent to the API again.
 
         Parameters
         ----------
@@ -173,8 +614,148 @@ class CoordinatesUtil:
             a list of the latitude and longitude of the user input
             destination address.
         """
-        coordinates = self.geo_locator.geocode(destination_address)
-        return [coordinates.latitude, coordinates.longitude]
+        coordinates = self.find_known_coordinates(destination_address)
+        if coordinates is None:
+            coordinates = self.geocode_remote(destination_address)
+        return coordinates
+
+    def get_destinations_coordinates(self, destination_addresses,
+                                     max_workers=8):
+        """
+        Return the coordinates of many destination addresses, geocoding
+        each distinct address once. Addresses that need the Google Map API
+        are sent max_workers at a time.
+
+        Returns
+        -------
+        dictionary
+            a dictionary with the key as destination address and value a
+            list of its latitude and longitude, or None if it could not be
+            geocoded.
+        """
+        coordinates = {}
+        remote = []
+        for address in dict.fromkeys(destination_addresses):
+            coordinates[address] = self.find_known_coordinates(address)
+            if coordinates[address] is None:
+                remote.append(address)
+
+        def geocode(address):
+            try:
+                return self.geocode_remote(address)
+            except Exception:
+                return None
+
+        if len(remote) == 1:
+            coordinates[remote[0]] = geocode(remote[0])
+        elif remote:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                coordinates.update(zip(remote, executor.map(geocode, remote)))
+        return coordinates
+
+    def find_known_coordinates(self, destination_address):
+        """
+        Return the coordinates of the destination if they are known without
+        a network call, from the local geocoder or geocode_cache, else None.
+        """
+        location = self.local_geocoder.geocode(destination_address)
+        if location is not None:
+            return [location.latitude, location.longitude]
+        return self.geocode_cache.get(destination_address)
+
+    def geocode_remote(self, destination_address):
+        """
+        Return the coordinates of the destination from the Google Map API,
+        and add them to geocode_cache.
+        """
+        if self.geo_locator is None:
+            raise LookupError(
+                'No offline location for %s' % destination_address)
+        location = self.geo_locator.geocode(destination_address)
+        coordinates = [location.latitude, location.longitude]
+        self.geocode_cache.put(destination_address, coordinates)
+        return coordinates
+
+    async def aget_parking_spots(self, destination_address,
+                                 acceptable_distance, executor=None):
+        """
+        Coroutine version of get_parking_spots, for use from an event loop
+        such as an ASGI server.
+
+        Geocoding waits on the network in a worker thread, and ranking the
+        streets runs in a worker thread too, so the event loop stays free
+        to serve other requests while either is in progress.
+
+        Parameters
+        ----------
+        destination_address: str, required
+            User input destination address
+
+        acceptable_distance: int or float, required
+            User input acceptable walking distance from the destination
+            address.
+
+        executor: concurrent.futures.Executor, optional
+            the executor running the blocking work, defaults to the event
+            loop's default executor.
+
+        Returns
+        -------
+        Tuple
+            the same tuple as get_parking_spots.
+        """
+        metrics = Metrics.get_instance()
+        metrics.increment('requests')
+        distance = float(acceptable_distance)
+
+        try:
+            with metrics.time('geocode'):
+                destination_coordinates = \
+                    await self.aget_destination_coordinates(
+                        destination_address, executor)
+        except Exception:
+            metrics.increment('errors', stage='geocode')
+            print(f"Invalid Destination: {destination_address}")
+            return [], None
+
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.rank_parking_spots,
+                                          destination_coordinates, distance)
+
+    async def aget_destination_coordinates(self, destination_address,
+                                           executor=None):
+        """
+        Coroutine version of get_destination_coordinates. Only a lookup that
+        needs the Google Map API leaves the event loop.
+
+        Parameters
+        ----------
+        destination_address: str, required
+            User input destination address.
+
+        executor: concurrent.futures.Executor, optional
+            the executor waiting on the Google Map API, defaults to the
+            event loop's default executor.
+
+        Returns
+        -------
+        list
+            a list of the latitude and longitude of the user input
+            destination address.
+        """
+        coordinates = self.find_known_coordinates(destination_address)
+        if coordinates is not None:
+            return coordinates
+
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, self.geocode_remote, destination_address)
 
     def cal_distance(self, coordinates1, coordinates2):
         """
@@ -199,6 +780,8 @@ class CoordinatesUtil:
             otherwise, return the distance between coordinates1 and
             coordinates2 in miles.
         """
+        import haversine as hs
+
         try:
             calculated_distance = hs.haversine(
                 coordinates1, coordinates2, unit="mi"
@@ -210,7 +793,169 @@ class CoordinatesUtil:
             # filter the coordinate out.
         return calculated_distance
 
-    def decode_data(self, file_location):
+    def cal_distances(self, coordinates, latitudes, longitudes):
+        """
+        Calculate the distances between the user input destination and many
+        points at once, with the same haversine formula as cal_distance.
+
+        Parameters
+        ----------
+        coordinates: list, required
+            a list of latitude and longitude
+
+        latitudes: ndarray, required
+            the latitudes of the points.
+
+        longitudes: ndarray, required
+            the longitudes of the points.
+
+        Returns
+        -------
+        ndarray
+            if coordinates is not a valid latitude and longitude, every
+            distance is the system max size.
+
+            otherwise, the distance between coordinates and each point in
+            miles.
+        """
+        return self.cal_distance_matrix(
+            [coordinates], latitudes, longitudes)[0]
+
+    def cal_distance_matrix(self, coordinates_list, latitudes, longitudes):
+        """
+        Calculate the distances between many destinations and many points in
+        one pass, with the same haversine formula as cal_distance.
+
+        Parameters
+        ----------
+        coordinates_list: list, required
+            a list of destinations, each a list of latitude and longitude.
+
+        latitudes: ndarray, required
+            the latitudes of the points.
+
+        longitudes: ndarray, required
+            the longitudes of the points.
+
+        Returns
+        -------
+        ndarray
+            a (destination, point) matrix of distances in miles. The row of
+            a destination that is not a valid latitude and longitude is the
+            system max size.
+        """
+        lat, lon, valid = self.valid_coordinates(coordinates_list)
+        lat1 = np.radians(lat)
+        lat2 = np.radians(np.asarray(latitudes, dtype=float))
+        d_lat = lat2 - lat1
+        d_lon = np.radians(np.asarray(longitudes, dtype=float)) - \
+            np.radians(lon)
+        d = np.sin(d_lat * 0.5) ** 2 + \
+            np.cos(lat1) * np.cos(lat2) * np.sin(d_lon * 0.5) ** 2
+        distances = 2 * EARTH_RADIUS_MI * np.arcsin(np.sqrt(d))
+        # filter every point out for an invalid destination, like
+        # cal_distance does
+        distances[~valid] = float(sys.maxsize)
+        return distances
+
+    def cal_segment_distances(self, coordinates, line_coordinates):
+        """
+        Calculate the distances between the user input destination and the
+        nearest point of many street segments at once.
+
+        Parameters
+        ----------
+        coordinates: list, required
+            a list of latitude and longitude
+
+        line_coordinates: ndarray, required
+            a (street, 2, 2) array of the latitudes and the longitudes of
+            the start and end of each street, see StreetGeometry.
+
+        Returns
+        -------
+        ndarray
+            the same distances as cal_segment_distance_matrix.
+        """
+        return self.cal_segment_distance_matrix(
+            [coordinates], line_coordinates)[0]
+
+    def cal_segment_distance_matrix(self, coordinates_list,
+                                    line_coordinates):
+        """
+        Calculate the distances between many destinations and the nearest
+        point of many street segments in one pass.
+
+        The destinations and segments are projected on an equirectangular
+        projection at SEATTLE_LATITUDE, where a segment is a straight line
+        and the distance to it a plane distance.
+
+        Parameters
+        ----------
+        coordinates_list: list, required
+            a list of destinations, each a list of latitude and longitude.
+
+        line_coordinates: ndarray, required
+            a (street, 2, 2) array of the latitudes and the longitudes of
+            the start and end of each street, see StreetGeometry.
+
+        Returns
+        -------
+        ndarray
+            a (destination, street) matrix of distances in miles. The row
+            of a destination that is not a valid latitude and longitude is
+            the system max size.
+        """
+        lat, lon, valid = self.valid_coordinates(coordinates_list)
+        line_coordinates = np.asarray(line_coordinates, dtype=float)
+        y_scale = np.radians(EARTH_RADIUS_MI)
+        x_scale = y_scale * np.cos(np.radians(SEATTLE_LATITUDE))
+
+        # the start of each segment is the origin of its coordinates
+        start_y = line_coordinates[:, 0, 0]
+        start_x = line_coordinates[:, 1, 0]
+        segment_y = (line_coordinates[:, 0, 1] - start_y) * y_scale
+        segment_x = (line_coordinates[:, 1, 1] - start_x) * x_scale
+        y = (lat - start_y) * y_scale
+        x = (lon - start_x) * x_scale
+
+        # the position of the nearest point along each segment, from 0 at
+        # its start to 1 at its end
+        length2 = segment_x * segment_x + segment_y * segment_y
+        t = x * segment_x + y * segment_y
+        # a segment of length 0 is its start
+        np.divide(t, length2, out=t, where=length2 > 0)
+        np.clip(t, 0, 1, out=t)
+        distances = np.hypot(x - t * segment_x, y - t * segment_y)
+        distances[~valid] = float(sys.maxsize)
+        return distances
+
+    @staticmethod
+    def valid_coordinates(coordinates_list):
+        """
+        Return the latitudes and longitudes of many destinations as columns,
+        zero for a destination that is not a valid latitude and longitude,
+        and whether each destination is valid.
+        """
+        n = len(coordinates_list)
+        lat = np.zeros((n, 1))
+        lon = np.zeros((n, 1))
+        valid = np.zeros(n, dtype=bool)
+        for i, coordinates in enumerate(coordinates_list):
+            try:
+                lat1, lon1 = coordinates
+                if not isinstance(lat1, numbers.Real) or \
+                        not isinstance(lon1, numbers.Real) or \
+                        abs(lat1) > 90 or abs(lon1) > 180:
+                    raise ValueError
+            except (TypeError, ValueError):
+                continue
+            lat[i, 0], lon[i, 0] = lat1, lon1
+            valid[i] = True
+        return lat, lon, valid
+
+    @staticmethod
+    def decode_data(file_location):
         """
         Decode the required base64 encoded data.
 
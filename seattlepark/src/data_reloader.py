@@ -0,0 +1,200 @@
+import os
+import threading
+import time
+
+from metrics import Metrics
+from parking_data import ParkingData
+from parking_study import ParkingStudy
+from street_geometry import StreetGeometry
+
+
+class DataReloader:
+    """
+    This class replaces the parking data the requests read when its source
+    files change, without restarting the process.
+
+    The new version is loaded and validated in a background thread, off the
+    request path, then swapped in with ParkingData.set_instance(). Requests
+    in progress finish on the version they started with. A version that
+    fails to load or to validate is never served; the old version stays in
+    place until the files change again.
+
+    Each process checks its own files, so the workers of a pre-fork server
+    reload independently, and the workers after the first one map the
+    snapshots the first one wrote.
+
+    Attributes
+    ----------
+    study_path: str
+        the location of the Parking Study csv file.
+
+    json_path: str
+        the location of the street json file.
+
+    interval: float
+        the minimum number of seconds between two checks of the files by
+        poll(), 0 or less turns poll() off.
+
+    clock: function
+        returns the current time in seconds, replaceable in tests.
+
+    listeners: list
+        the functions called with the new ParkingData after each swap, for
+        example to clear the caches of responses built from the old one.
+
+    last_error: Exception
+        the reason the last reload failed, None if it succeeded.
+
+    Methods
+    -------
+    add_listener(listener)
+        Call listener with the new ParkingData after each swap.
+
+    stamps()
+        Return the modification time and size of the source files.
+
+    changed()
+        Return whether the source files changed since the last reload.
+
+    poll()
+        Reload in the background if the source files changed, checking
+        them at most every interval seconds.
+
+    reload_in_background()
+        Start a reload in a background thread.
+
+    reload()
+        Load, validate and swap in a new version of the parking data.
+    """
+
+    def __init__(self, study_path=None, json_path=None, interval=60.0,
+                 clock=time.monotonic):
+        """
+        Parameters
+        ----------
+        study_path: str, optional
+            the location of the csv file, defaults to the file shipped in
+            the resources folder.
+
+        json_path: str, optional
+            the location of the json file, defaults to the file shipped in
+            the resources folder.
+
+        interval: float, optional
+            the minimum number of seconds between two checks of poll().
+
+        clock: function, optional
+            returns the current time in seconds.
+        """
+        self.study_path = study_path or ParkingStudy.default_path
+        self.json_path = json_path or StreetGeometry.default_path
+        self.interval = interval
+        self.clock = clock
+        self.listeners = []
+        self.last_error = None
+        # the data being served was loaded from the files as they are now
+        self._stamps = self.stamps()
+        self._next_check = clock() + interval
+        self._thread = None
+        self._state_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+
+    def add_listener(self, listener):
+        """
+        Call listener with the new ParkingData after each swap.
+        """
+        self.listeners.append(listener)
+
+    def stamps(self):
+        """
+        Return the modification time and size of each source file, None
+        for a missing file.
+        """
+        stamps = []
+        for path in (self.study_path, self.json_path):
+            try:
+                stat = os.stat(path)
+                stamps.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    def changed(self):
+        """
+        Return whether the source files changed since the last reload.
+        """
+        return self.stamps() != self._stamps
+
+    def poll(self):
+        """
+        Start a reload in the background if the source files changed,
+        checking them at most every interval seconds. Cheap enough to call
+        on every request.
+
+        Returns
+        -------
+        Thread
+            the thread of the reload started, None if none was started.
+        """
+        if self.interval <= 0 or self.clock() < self._next_check:
+            return None
+        with self._state_lock:
+            now = self.clock()
+            if now < self._next_check:
+                return None
+            self._next_check = now + self.interval
+        if not self.changed():
+            return None
+        return self.reload_in_background()
+
+    def reload_in_background(self):
+        """
+        Start a reload in a background thread, unless one is in progress.
+
+        Returns
+        -------
+        Thread
+            the thread of the reload, None if one was already in progress.
+        """
+        with self._state_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return None
+            self._thread = threading.Thread(
+                target=self.reload, name='seattlepark-reload', daemon=True)
+            self._thread.start()
+            return self._thread
+
+    def reload(self):
+        """
+        Load a new version of the parking data from the source files,
+        validate it, and swap it in.
+
+        Returns
+        -------
+        bool
+            True if the new version is now served, False if it failed to
+            load or to validate, see last_error.
+        """
+        with self._reload_lock:
+            metrics = Metrics.get_instance()
+            # taken first, a change made while loading is seen next time
+            stamps = self.stamps()
+            try:
+                with metrics.time('reload'):
+                    data = ParkingData.load(self.study_path, self.json_path)
+                    data.validate()
+            except Exception as error:
+                # not retried until the files change again
+                self._stamps = stamps
+                self.last_error = error
+                metrics.increment('reloads', result='failed')
+                print(f"Reload of the parking data failed: {error}")
+                return False
+
+            ParkingData.set_instance(data)
+            self._stamps = stamps
+            self.last_error = None
+            metrics.increment('reloads', result='swapped')
+            for listener in self.listeners:
+                listener(data)
+            return True
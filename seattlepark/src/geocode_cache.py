@@ -0,0 +1,180 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from lru_cache import LRUCache
+
+
+def normalize_address(address):
+    """
+    Return the cache key of an address: lower case, with punctuation and
+    repeated whitespace removed, so "4000 15th Ave NE,  Seattle" and
+    "4000 15TH AVE NE Seattle" share an entry.
+    """
+    address = re.sub(r"[^\w\s&#/]", " ", str(address).lower())
+    return " ".join(address.split())
+
+
+class GeocodeCache:
+    """
+    This class caches the coordinates of geocoded addresses.
+
+    Lookups go to a bounded in-memory LRU cache first, then to an optional
+    SQLite database that survives restarts. Both tiers drop entries older
+    than ttl seconds.
+
+    Attributes
+    ----------
+    memory: Instance of LRUCache
+        the in-memory tier.
+
+    db_path: str
+        the location of the SQLite database, None for no persistent tier.
+        Each process opens its own connection to it on first use.
+
+    ttl: float
+        the number of seconds a geocoding result is kept.
+
+    hits: int
+        the number of lookups answered by either tier.
+
+    misses: int
+        the number of lookups neither tier could answer.
+
+    disk_hits: int
+        the number of lookups answered by the persistent tier.
+
+    Methods
+    -------
+    get(address)
+        Return the cached coordinates of address, or None.
+
+    put(address, coordinates)
+        Cache the coordinates of address.
+
+    stats()
+        Return the hit and miss counters of the cache.
+    """
+
+    def __init__(self, max_size=1024, ttl=30 * 24 * 3600, db_path=None,
+                 clock=time.time):
+        """
+        Parameters
+        ----------
+        max_size: int, optional
+            the number of addresses kept in memory.
+
+        ttl: float, optional
+            the number of seconds a geocoding result is kept.
+
+        db_path: str, optional
+            the location of the SQLite database of the persistent tier.
+
+        clock: function, optional
+            returns the current time in seconds, replaceable in tests.
+        """
+        self.ttl = ttl
+        self.clock = clock
+        self.memory = LRUCache(max_size, ttl, clock)
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._db = None
+        self._db_pid = None
+        self._db_lock = threading.Lock()
+        if db_path:
+            self.connection()
+
+    def connection(self):
+        """
+        Return the connection of this process to the SQLite database, None
+        for no persistent tier. A SQLite connection must not be used across
+        a fork, so a forked process opens a new one.
+        """
+        if not self.db_path:
+            return None
+        if self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db_pid = os.getpid()
+            with self._db:
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS geocode ("
+                    "address TEXT PRIMARY KEY, latitude REAL, "
+                    "longitude REAL, stored_at REAL)")
+        return self._db
+
+    def get(self, address):
+        """
+        Return the cached coordinates of address.
+
+        Parameters
+        ----------
+        address: str, required
+            the address as the user typed it.
+
+        Returns
+        -------
+        list
+            None if the address is not cached, otherwise a list of the
+            latitude and longitude of the address.
+        """
+        key = normalize_address(address)
+        coordinates = self.memory.get(key)
+        if coordinates is None and self.db_path:
+            coordinates, expires_at = self._db_get(key)
+            if coordinates is not None:
+                self.disk_hits += 1
+                self.memory.put(key, coordinates, expires_at)
+        if coordinates is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return list(coordinates)
+
+    def put(self, address, coordinates):
+        """
+        Cache the coordinates of address.
+
+        Parameters
+        ----------
+        address: str, required
+            the address as the user typed it.
+
+        coordinates: list, required
+            a list of the latitude and longitude of the address.
+        """
+        key = normalize_address(address)
+        coordinates = (float(coordinates[0]), float(coordinates[1]))
+        self.memory.put(key, coordinates)
+        if self.db_path:
+            with self._db_lock:
+                db = self.connection()
+                with db:
+                    db.execute(
+                        "INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?)",
+                        (key, coordinates[0], coordinates[1], self.clock()))
+
+    def _db_get(self, key):
+        with self._db_lock:
+            row = self.connection().execute(
+                "SELECT latitude, longitude, stored_at FROM geocode "
+                "WHERE address = ?", (key,)).fetchone()
+        if row is None or row[2] + self.ttl <= self.clock():
+            return None, None
+        return (row[0], row[1]), row[2] + self.ttl
+
+    def stats(self):
+        """
+        Return the hit and miss counters of the cache.
+
+        Returns
+        -------
+        dictionary
+            the number of hits, misses and persistent tier hits, and the
+            number of addresses held in memory.
+        """
+        return {'hits': self.hits, 'misses': self.misses,
+                'disk_hits': self.disk_hits, 'size': len(self.memory)}
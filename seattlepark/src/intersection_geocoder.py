@@ -0,0 +1,195 @@
+import collections
+import itertools
+import math
+import re
+
+# Spellings users type, mapped to the abbreviations of the street dataset
+ABBREVIATIONS = {
+    'AVENUE': 'AVE', 'AV': 'AVE', 'STREET': 'ST', 'PLACE': 'PL',
+    'DRIVE': 'DR', 'COURT': 'CT', 'BOULEVARD': 'BV', 'BLVD': 'BV',
+    'PARKWAY': 'PY', 'PKWY': 'PY', 'ROAD': 'RD', 'LANE': 'LN',
+    'TERR': 'TERRACE', 'NORTH': 'N', 'SOUTH': 'S', 'EAST': 'E', 'WEST': 'W',
+    'NORTHEAST': 'NE', 'NORTHWEST': 'NW', 'SOUTHEAST': 'SE',
+    'SOUTHWEST': 'SW', 'FIRST': '1ST', 'SECOND': '2ND', 'THIRD': '3RD',
+    'FOURTH': '4TH', 'FIFTH': '5TH', 'SIXTH': '6TH', 'SEVENTH': '7TH',
+    'EIGHTH': '8TH', 'NINTH': '9TH', 'TENTH': '10TH',
+}
+
+# Tokens dropped to compare street names loosely, "Pike" for "PIKE ST"
+STREET_TYPES = {'AVE', 'ST', 'PL', 'DR', 'CT', 'BV', 'PY', 'RD', 'LN', 'WAY'}
+DIRECTIONS = {'N', 'S', 'E', 'W', 'NE', 'NW', 'SE', 'SW'}
+
+# What separates the two streets of an intersection query
+INTERSECTION_SEPARATOR = re.compile(r"\s*(?:&|@|/|\bAND\b|\bAT\b)\s*")
+
+LocalLocation = collections.namedtuple(
+    'LocalLocation', ['address', 'latitude', 'longitude'])
+
+
+def normalize_street(name):
+    """
+    Return a street name in the spelling of the street dataset, upper case
+    and abbreviated, e.g. "1st Avenue North" becomes "1ST AVE N".
+    """
+    tokens = re.sub(r"[^\w\s]", " ", name.upper()).split()
+    return " ".join(ABBREVIATIONS.get(token, token) for token in tokens)
+
+
+def street_core(name):
+    """
+    Return a normalized street name without its type and direction, e.g.
+    "E PIKE ST" becomes "PIKE".
+    """
+    tokens = [token for token in name.split()
+              if token not in STREET_TYPES and token not in DIRECTIONS]
+    return " ".join(tokens) or name
+
+
+class IntersectionGeocoder:
+    """
+    This class geocodes intersections and street names of the street
+    dataset without calling an online service.
+
+    Every street in the dataset is named "X BETWEEN Y AND Z" and its two
+    end points are the intersections of X with Y and of X with Z, so the
+    dataset doubles as a table of intersection coordinates.
+
+    Attributes
+    ----------
+    intersections: dictionary
+        a dictionary with the key as a frozenset of two street names and
+        value the latitude and longitude of their intersection.
+
+    streets: dictionary
+        a dictionary with the key as street name and value the latitude and
+        longitude of a point on that street.
+
+    Methods
+    -------
+    geocode(query)
+        Return the location of an intersection or street name.
+    """
+
+    def __init__(self, coordinates_mapping):
+        """
+        Parameters
+        ----------
+        coordinates_mapping: dictionary, required
+            the coordinates_mapping of CoordinatesUtil.
+        """
+        segments = []
+        for unitdesc, (line, mid_point) in coordinates_mapping.items():
+            match = re.match(r"^(.+?) BETWEEN (.+?) AND (.+)$", unitdesc)
+            if match is None:
+                continue
+            start = (line[0][0], line[1][0])
+            end = (line[0][1], line[1][1])
+            segments.append((match.groups(), start, end, tuple(mid_point)))
+
+        self.intersections = self._locate_intersections(segments)
+
+        # a bare street name resolves to the middle of its most central
+        # segment, so the location is always on the street
+        mid_points = collections.defaultdict(list)
+        for (street, _, _), _, _, mid_point in segments:
+            mid_points[street].append(mid_point)
+        self.streets = {}
+        for street, points in mid_points.items():
+            lat = sum(p[0] for p in points) / len(points)
+            lon = sum(p[1] for p in points) / len(points)
+            self.streets[street] = min(
+                points, key=lambda p: _distance(p, (lat, lon)))
+
+        self._names = set(self.streets)
+        self._names.update(itertools.chain.from_iterable(self.intersections))
+        self._by_core = collections.defaultdict(set)
+        for name in self._names:
+            self._by_core[street_core(name)].add(name)
+
+    @staticmethod
+    def _locate_intersections(segments):
+        # Street X between Y and Z usually starts at Y, but not always.
+        # Orient each segment by how close its end points are to the end
+        # points of the other segments meeting at X/Y and X/Z.
+        touching = collections.defaultdict(list)
+        for i, ((street, first, second), start, end, _) in \
+                enumerate(segments):
+            for cross in (first, second):
+                touching[frozenset((street, cross))].append((i, start, end))
+
+        def others(key, i):
+            return [point for j, start, end in touching[key] if j != i
+                    for point in (start, end)]
+
+        points = collections.defaultdict(list)
+        for i, ((street, first, second), start, end, _) in \
+                enumerate(segments):
+            first_key = frozenset((street, first))
+            second_key = frozenset((street, second))
+            others_first = others(first_key, i)
+            others_second = others(second_key, i)
+            as_named = (_nearest(start, others_first) +
+                        _nearest(end, others_second))
+            reversed_ = (_nearest(end, others_first) +
+                         _nearest(start, others_second))
+            if reversed_ < as_named:
+                start, end = end, start
+            points[first_key].append(start)
+            points[second_key].append(end)
+
+        return {key: (sum(p[0] for p in pts) / len(pts),
+                      sum(p[1] for p in pts) / len(pts))
+                for key, pts in points.items()}
+
+    def _candidates(self, part):
+        name = normalize_street(part)
+        if name in self._names:
+            return [name]
+        return sorted(self._by_core.get(street_core(name), ()))
+
+    def geocode(self, query):
+        """
+        Return the location of an intersection or street name.
+
+        Parameters
+        ----------
+        query: str, required
+            an intersection such as "1st Ave & Pike St" or a street name
+            such as "Dexter Ave N". Text after the first comma, such as the
+            city, is ignored.
+
+        Returns
+        -------
+        LocalLocation
+            None if the query is not an intersection or street of the
+            dataset, otherwise its address, latitude and longitude.
+        """
+        query = str(query).split(',')[0].upper().strip()
+        parts = [part for part in INTERSECTION_SEPARATOR.split(query)
+                 if part]
+        if len(parts) == 2:
+            for first, second in itertools.product(
+                    self._candidates(parts[0]), self._candidates(parts[1])):
+                location = self.intersections.get(frozenset((first, second)))
+                if location is not None:
+                    return LocalLocation(f"{first} & {second}", *location)
+        elif len(parts) == 1 and not re.match(r"^\d+\s", parts[0]):
+            # a leading house number means a street address, which the
+            # dataset can't place
+            for street in self._candidates(parts[0]):
+                if street in self.streets:
+                    return LocalLocation(street, *self.streets[street])
+        return None
+
+
+def _distance(point1, point2):
+    # small distances only, in degrees of latitude
+    return math.hypot(point1[0] - point2[0],
+                      (point1[1] - point2[1]) *
+                      math.cos(math.radians(point1[0])))
+
+
+def _nearest(point, others):
+    if not others:
+        return 0.0
+    return min(_distance(point, other) for other in others)
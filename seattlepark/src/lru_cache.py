@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    This class is a thread-safe, bounded, least-recently-used cache whose
+    entries expire.
+
+    Attributes
+    ----------
+    max_size: int
+        the number of entries kept, the least recently used entry is evicted
+        when a new one doesn't fit.
+
+    ttl: float
+        the default number of seconds an entry is kept, None to keep it
+        until it is evicted.
+
+    hits: int
+        the number of lookups that found a live entry.
+
+    misses: int
+        the number of lookups that found nothing or an expired entry.
+
+    Methods
+    -------
+    get(key)
+        Return the value stored for key, or None.
+
+    put(key, value, expires_at)
+        Store value for key.
+
+    clear()
+        Remove every entry.
+
+    stats()
+        Return the hit and miss counters and the number of entries.
+    """
+
+    def __init__(self, max_size=1024, ttl=None, clock=time.time):
+        """
+        Parameters
+        ----------
+        max_size: int, optional
+            the number of entries kept.
+
+        ttl: float, optional
+            the default number of seconds an entry is kept.
+
+        clock: function, optional
+            returns the current time in seconds, replaceable in tests.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Return the value stored for key, or None if there is no live entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, expires_at=None):
+        """
+        Store value for key.
+
+        Parameters
+        ----------
+        key: hashable, required
+            the key of the entry.
+
+        value: object, required
+            the value to store.
+
+        expires_at: float, optional
+            the time at which the entry expires, defaults to ttl seconds
+            from now.
+        """
+        if self.max_size <= 0:
+            return
+        if expires_at is None and self.ttl is not None:
+            expires_at = self.clock() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove every entry.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Return the hit and miss counters and the number of entries.
+        """
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._entries)}
@@ -0,0 +1,234 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Metrics:
+    """
+    This class collects the latency of each stage of a request and counters
+    of the requests, errors, empty results and fallbacks, and renders them
+    in the Prometheus text exposition format.
+
+    Attributes
+    ----------
+    prefix: str
+        the prefix of every metric name.
+
+    buckets: tuple
+        the upper bounds in seconds of the stage latency histogram buckets.
+
+    clock: function
+        returns the current time in seconds, replaceable in tests.
+
+    Methods
+    -------
+    get_instance()
+        Return the process-wide Metrics.
+
+    set_instance(metrics)
+        Replace the process-wide Metrics.
+
+    increment(name, amount=1, **labels)
+        Add amount to the counter name with the given labels.
+
+    observe(stage, seconds)
+        Record that stage took seconds.
+
+    time(stage)
+        Context manager recording the time spent in its block.
+
+    add_cache(name, stats)
+        Export the counters of a cache.
+
+    render()
+        Return every metric in the Prometheus text exposition format.
+    """
+
+    default_buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                       0.5, 1.0, 2.5, 5.0, 10.0)
+
+    # the help text of the counters, counters not listed here are exported
+    # with their name as help text
+    descriptions = {
+        'requests': 'Parking spot requests received.',
+        'errors': 'Requests that failed, by stage.',
+        'empty_results': 'Requests with no street within the distance.',
+        'fallbacks': 'Recommendations that fell back to the closest '
+                     'streets, by reason.',
+        'reloads': 'Reloads of the parking data, by result.',
+        'tiles': 'Requests looked up in the recommendation tiles, by '
+                 'result.',
+    }
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, prefix='seattlepark', buckets=None,
+                 clock=time.perf_counter):
+        """
+        Parameters
+        ----------
+        prefix: str, optional
+            the prefix of every metric name.
+
+        buckets: tuple, optional
+            the upper bounds in seconds of the histogram buckets.
+
+        clock: function, optional
+            returns the current time in seconds.
+        """
+        self.prefix = prefix
+        self.buckets = tuple(buckets or self.default_buckets)
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._counters = {name: {} for name in self.descriptions}
+        # stage -> [bucket counts, sum, count]
+        self._stages = {}
+        self._caches = {}
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Return the process-wide Metrics, created on first use.
+        """
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def set_instance(cls, metrics):
+        """
+        Replace the process-wide Metrics.
+
+        Parameters
+        ----------
+        metrics: Metrics or None
+            the metrics to share, or None to start from zero on next use.
+        """
+        with cls._instance_lock:
+            cls._instance = metrics
+
+    def increment(self, name, amount=1, **labels):
+        """
+        Add amount to the counter name with the given labels.
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counter = self._counters.setdefault(name, {})
+            counter[key] = counter.get(key, 0) + amount
+
+    def observe(self, stage, seconds):
+        """
+        Record that stage took seconds.
+        """
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = \
+                    [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    @contextmanager
+    def time(self, stage):
+        """
+        Record the time spent in the block, also when it raises.
+        """
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.observe(stage, self.clock() - start)
+
+    def add_cache(self, name, stats):
+        """
+        Export the counters of a cache, read when the metrics are rendered.
+
+        Parameters
+        ----------
+        name: str
+            the value of the cache label.
+
+        stats: function
+            returns a dictionary of counters such as the stats() of
+            LRUCache, the entries 'size' and 'hit_ratio' are exported as
+            gauges.
+        """
+        with self._lock:
+            self._caches[name] = stats
+
+    def render(self):
+        """
+        Return every metric in the Prometheus text exposition format.
+        """
+        with self._lock:
+            counters = {name: dict(values)
+                        for name, values in self._counters.items()}
+            stages = {stage: (list(histogram[0]), histogram[1], histogram[2])
+                      for stage, histogram in self._stages.items()}
+            caches = dict(self._caches)
+
+        lines = []
+        name = self.prefix + '_stage_seconds'
+        lines.append('# HELP %s Time spent in each stage of a request.'
+                     % name)
+        lines.append('# TYPE %s histogram' % name)
+        for stage in sorted(stages):
+            bucket_counts, total, count = stages[stage]
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                lines.append('%s_bucket%s %d' % (name, format_labels(
+                    (('stage', stage), ('le', repr(float(bound))))),
+                    bucket_count))
+            lines.append('%s_bucket%s %d' % (name, format_labels(
+                (('stage', stage), ('le', '+Inf'))), count))
+            labels = format_labels((('stage', stage),))
+            lines.append('%s_sum%s %r' % (name, labels, total))
+            lines.append('%s_count%s %d' % (name, labels, count))
+
+        for counter in sorted(counters):
+            name = '%s_%s_total' % (self.prefix, counter)
+            lines.append('# HELP %s %s' % (
+                name, self.descriptions.get(counter, counter)))
+            lines.append('# TYPE %s counter' % name)
+            values = counters[counter] or {(): 0}
+            for key in sorted(values):
+                lines.append('%s%s %s' % (name, format_labels(key),
+                                          values[key]))
+
+        cache_stats = {}
+        for cache in sorted(caches):
+            for stat, value in caches[cache]().items():
+                cache_stats.setdefault(stat, []).append((cache, value))
+        for stat in sorted(cache_stats):
+            if stat == 'size':
+                name, kind = self.prefix + '_cache_entries', 'gauge'
+            elif stat == 'hit_ratio':
+                name, kind = self.prefix + '_cache_hit_ratio', 'gauge'
+            else:
+                name, kind = '%s_cache_%s_total' % (self.prefix, stat), \
+                    'counter'
+            lines.append('# HELP %s Cache %s.' % (name, stat))
+            lines.append('# TYPE %s %s' % (name, kind))
+            for cache, value in cache_stats[stat]:
+                lines.append('%s%s %s' % (
+                    name, format_labels((('cache', cache),)), value))
+
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    """
+    Return the labels, a sequence of (name, value) pairs, as a Prometheus
+    label set.
+    """
+    if not labels:
+        return ''
+    return '{%s}' % ','.join(
+        '%s="%s"' % (label, str(value).replace('\\', '\\\\')
+                     .replace('"', '\\"').replace('\n', '\\n'))
+        for label, value in labels)
@@ -1,172 +1,295 @@
 # -*- coding: utf-8 -*-
+# Importing this module has no side effects: the Dash app, the map and the
+# CoordinatesUtil are only built by create_app(), and dash and plotly are
+# imported there.
 import math
+import os
 
-import dash  # (version 1.11.0)
-import dash_core_components as dcc
-import dash_html_components as html
-import plotly.graph_objects as go
-from dash.dependencies import Input, Output, State
+import numpy as np
 
 from coordinates_util import CoordinatesUtil
+from data_reloader import DataReloader
+from geocode_cache import GeocodeCache
+from metrics import Metrics
+from parking_spot import ParkingSpotArray
+from response_cache import ResponseCache
+from parking_study import ParkingStudy
 
 
-print("Reading GeoJson Config..")
-cu = CoordinatesUtil()
-
-# mapbox token
-mapbox_access_token = cu.decode_data('resources/mapbox_token')
-
-maps = [go.Scattermapbox(
-    lat=[],  # []
-    lon=[],  # []
-    mode='lines',  # Determine the drawing mode for the scatter trace.
-    marker=go.scattermapbox.Marker(
-        size=4,
-        color="green",
-    ),
-    hoverinfo="text",
-    hoverlabel=dict(
-        bgcolor="white",
-        font_size=10
-    ),
-    visible=True
-)]
-
 # Seattle latitude and longitude values
 latitude = 47.620506
 longitude = -122.349274
 
-# Set up the map layout
-layout = go.Layout(
-    margin=dict(
-        l=0,  # left margin
-        r=20,  # right margin
-        b=20,  # bottom margin
-        t=50,  # top margin
-    ),
-
-    mapbox1=dict(
-        domain={'x': [0.1, 1], 'y': [0, 1]},
-        center=dict(lat=latitude, lon=longitude),
-        accesstoken=mapbox_access_token,
-        zoom=11,
-    ),
-
-    xaxis2={
-        'zeroline': False,
-        "showline": False,
-        "showticklabels": True,
-        'showgrid': False,
-        'domain': [0, 1],
-        'side': 'left',
-        'anchor': 'x2',
-    },
-    yaxis2={
-        'domain': [0, 1],
-        'anchor': 'y2',
-        'autorange': 'reversed',
-    },
-    paper_bgcolor='rgb(255, 255, 255)',
-    plot_bgcolor='rgb(204, 204, 204)'
-)
-
-fig = go.Figure(data=maps, layout=layout)
-
-dash_app = dash.Dash(__name__)
-
-dash_app.layout = html.Div(children=[
-    html.Div(html.H1("Seattle Parking"), style={'text-align': 'center',
-                                                'color': 'blue'}),
-    html.Div(children=[
+# the hover text of a street in the single trace, filled in by Plotly from
+# the customdata of each point: mid-point latitude and longitude, street
+# name, distance and spaces available
+street_hovertemplate = (
+    "Address: <a href=\"https://www.google.com/maps/place/"
+    "%{customdata[0]},%{customdata[1]}\" target=_blank>%{customdata[2]}"
+    "</a> <br />Distance: %{customdata[3]} miles"
+    "<br />Spots Available: %{customdata[4]}<extra></extra>")
+
+_layout = None
+
+
+def map_layout():
+    """
+    Return the layout of the map, built on first use.
+    """
+    global _layout
+    if _layout is None:
+        import plotly.graph_objects as go
+
+        # mapbox token
+        mapbox_access_token = CoordinatesUtil.decode_data(
+            'resources/mapbox_token')
+
+        # Set up the map layout
+        _layout = go.Layout(
+            margin=dict(
+                l=0,  # left margin
+                r=20,  # right margin
+                b=20,  # bottom margin
+                t=50,  # top margin
+            ),
+
+            mapbox1=dict(
+                domain={'x': [0.1, 1], 'y': [0, 1]},
+                center=dict(lat=latitude, lon=longitude),
+                accesstoken=mapbox_access_token,
+                zoom=11,
+            ),
+
+            xaxis2={
+                'zeroline': False,
+                "showline": False,
+                "showticklabels": True,
+                'showgrid': False,
+                'domain': [0, 1],
+                'side': 'left',
+                'anchor': 'x2',
+            },
+            yaxis2={
+                'domain': [0, 1],
+                'anchor': 'y2',
+                'autorange': 'reversed',
+            },
+            paper_bgcolor='rgb(255, 255, 255)',
+            plot_bgcolor='rgb(204, 204, 204)'
+        )
+    return _layout
+
+
+def env_flag(name):
+    """
+    Return whether the environment variable name turns an option on.
+    """
+    return os.environ.get(name, '0').lower() in ('1', 'true', 'yes')
+
+
+def create_app(cu=None, response_cache_size=None, single_trace=True,
+               reload_interval=None):
+    """
+    This function builds the Dash app of seattlepark.
+
+    Parameters
+    ----------
+    cu: object, optional
+        object to call the functions in CoordinatesUtil, created with a
+        GeocodeCache if not given.
+
+    response_cache_size: int, optional
+        the number of map figures kept for repeated requests, 0 turns the
+        response cache off. Defaults to SEATTLEPARK_RESPONSE_CACHE_SIZE, or
+        1024.
+
+    single_trace: bool, optional
+        draw the recommended parking spots in one trace of the map, see
+        street_trace(), rather than a trace per parking spot.
+
+    reload_interval: float, optional
+        the number of seconds between two checks of the parking study and
+        street files, which are reloaded in the background when they
+        change, see DataReloader. 0 turns reloading off. Defaults to
+        SEATTLEPARK_RELOAD_INTERVAL, or 60.
+
+    Returns
+    -------
+    Dash
+        the Dash app, serve it with run_server() or its Flask server, which
+        also serves the metrics of the app at /metrics.
+    """
+    import dash  # (version 1.11.0)
+    import dash_core_components as dcc
+    import dash_html_components as html
+    import flask
+    import plotly.graph_objects as go
+    from dash.dependencies import Input, Output, State
+
+    if cu is None:
+        print("Reading GeoJson Config..")
+        # Set SEATTLEPARK_GEOCODE_DB to a file path to keep geocoding results
+        # across restarts, SEATTLEPARK_WALKING_DISTANCE=1 to walk the
+        # acceptable distance along the streets, and
+        # SEATTLEPARK_SEGMENT_DISTANCE=1 to measure it to the nearest point
+        # of each street
+        cu = CoordinatesUtil(
+            geocode_cache=GeocodeCache(
+                db_path=os.environ.get('SEATTLEPARK_GEOCODE_DB')),
+            walking_distance=env_flag('SEATTLEPARK_WALKING_DISTANCE'),
+            segment_distance=env_flag('SEATTLEPARK_SEGMENT_DISTANCE'))
+
+    # Figures of requests repeated within the same hour are reused
+    if response_cache_size is None:
+        response_cache_size = int(
+            os.environ.get('SEATTLEPARK_RESPONSE_CACHE_SIZE', 1024))
+    response_cache = None
+    if response_cache_size > 0:
+        response_cache = ResponseCache(max_size=response_cache_size)
+
+    # Parse the parking study once here rather than on the first submit
+    print("Reading Parking Study Data..")
+    ParkingStudy.get_instance()
+
+    # New parking data is swapped in without restarting the server, the
+    # figures built from the old data are dropped
+    if reload_interval is None:
+        reload_interval = float(
+            os.environ.get('SEATTLEPARK_RELOAD_INTERVAL', 60))
+    reloader = DataReloader(interval=reload_interval)
+    if response_cache is not None:
+        reloader.add_listener(lambda data: response_cache.clear())
+
+    maps = [go.Scattermapbox(
+        lat=[],  # []
+        lon=[],  # []
+        mode='lines',  # Determine the drawing mode for the scatter trace.
+        marker=go.scattermapbox.Marker(
+            size=4,
+            color="green",
+        ),
+        hoverinfo="text",
+        hoverlabel=dict(
+            bgcolor="white",
+            font_size=10
+        ),
+        visible=True
+    )]
+
+    fig = go.Figure(data=maps, layout=map_layout())
+
+    dash_app = dash.Dash(__name__)
+
+    dash_app.layout = html.Div(children=[
+        html.Div(html.H1("Seattle Parking"), style={'text-align': 'center',
+                                                    'color': 'blue'}),
         html.Div(children=[
             html.Div(children=[
-                dcc.Input(
-                    id='destination',
-                    type='text',
-                    placeholder="Destination?",
-                    debounce=True,
-                    autoComplete="on",
-                    inputMode='latin',
-                    name='text',
-                    autoFocus=True,
-                ),
-                html.Br(),  # break lines
-                html.Br(),
-                dcc.Input(
-                    id='accept_distance',
-                    type='text',
-                    # value=0.5,
-                    placeholder="Acceptable Distance (mi)",
-                    pattern=r"^[0-9]\d*(\.\d+)?$",
-                    debounce=True,
-                    autoComplete="on",
-                    inputMode='latin',
-                    name='text',
-                    autoFocus=True,
-                ),
-                html.Br(),
-                html.Br(),
-                html.Button('Submit', id='submit', n_clicks=0),
-                html.Div([
-                    html.P(id="error", children=[""])
+                html.Div(children=[
+                    dcc.Input(
+                        id='destination',
+                        type='text',
+                        placeholder="Destination?",
+                        debounce=True,
+                        autoComplete="on",
+                        inputMode='latin',
+                        name='text',
+                        autoFocus=True,
+                    ),
+                    html.Br(),  # break lines
+                    html.Br(),
+                    dcc.Input(
+                        id='accept_distance',
+                        type='text',
+                        # value=0.5,
+                        placeholder="Acceptable Distance (mi)",
+                        pattern=r"^[0-9]\d*(\.\d+)?$",
+                        debounce=True,
+                        autoComplete="on",
+                        inputMode='latin',
+                        name='text',
+                        autoFocus=True,
+                    ),
+                    html.Br(),
+                    html.Br(),
+                    html.Button('Submit', id='submit', n_clicks=0),
+                    html.Div([
+                        html.P(id="error", children=[""])
+                    ],
+                        style={'height': '30px', 'color': 'red'}
+                    )
                 ],
-                    style={'height': '30px', 'color': 'red'}
-                )
+                    style={'height': '400px', 'text-align': 'center',
+                           'display': 'inline-block'}),
             ],
-                style={'height': '400px', 'text-align': 'center',
-                       'display': 'inline-block'}),
-        ],
-            style={'width': '20%', 'display': 'inline-block',
-                   'text-align': 'center', 'vertical-align': 'top',
-                   'margin-top': '100px', 'margin-left': '150px'}
-        ),
-        html.Div(
-            dcc.Graph(
-                id='seattle_street_map',
-                figure=fig,
-                style={"height": "95vh", "margin-top": "-20px"},
-                config={
-                    'displayModeBar': False
-                }
+                style={'width': '20%', 'display': 'inline-block',
+                       'text-align': 'center', 'vertical-align': 'top',
+                       'margin-top': '100px', 'margin-left': '150px'}
             ),
-            style={'width': '70%', 'display': 'inline-block',
-                   'margin-right': '-20vh'}
+            html.Div(
+                dcc.Graph(
+                    id='seattle_street_map',
+                    figure=fig,
+                    style={"height": "95vh", "margin-top": "-20px"},
+                    config={
+                        'displayModeBar': False
+                    }
+                ),
+                style={'width': '70%', 'display': 'inline-block',
+                       'margin-right': '-20vh'}
+            ),
+        ],
+            style={'width': '100%', 'display': 'inline-block'}
         ),
-    ],
-        style={'width': '100%', 'display': 'inline-block'}
-    ),
 
-    html.Div(children='''
-        Data source from Seattle GIS Gov
-    ''')
-]
-)
+        html.Div(children='''
+            Data source from Seattle GIS Gov
+        ''')
+    ]
+    )
 
-# ------------------------------------------------------------------------
-# By writing this decorator, we're telling Dash to call this function for
-# us whenever the value of the "input" component (the text box) changes
-# in order to update the children of the "output" component on the page
-# (the HTML div). Whenever an input property changes, the function that
-# the callback decorator wraps will get called automatically. Dash
-# provides the function with the new value of the input property as an
-# input argument and Dash updates the property of the output component
-# with whatever was returned by the function.
-
-
-@dash_app.callback(
-    Output(component_id='seattle_street_map',
-           component_property='figure'),
-    Output("error", "children"),
-    [Input(component_id='submit', component_property='n_clicks')],
-    state=[State(component_id='destination', component_property='value'),
-           State(component_id='accept_distance',
-                 component_property='value')]
-)
-def submit_data(n_clicks, destination, accept_distance):
-    return create_parking_spots(n_clicks, destination, accept_distance, cu)
-
-
-def create_parking_spots(n_clicks, destination, accept_distance, cu_instance):
+    # ------------------------------------------------------------------------
+    # By writing this decorator, we're telling Dash to call this function for
+    # us whenever the value of the "input" component (the text box) changes
+    # in order to update the children of the "output" component on the page
+    # (the HTML div). Whenever an input property changes, the function that
+    # the callback decorator wraps will get called automatically. Dash
+    # provides the function with the new value of the input property as an
+    # input argument and Dash updates the property of the output component
+    # with whatever was returned by the function.
+
+    @dash_app.callback(
+        Output(component_id='seattle_street_map',
+               component_property='figure'),
+        Output("error", "children"),
+        [Input(component_id='submit', component_property='n_clicks')],
+        state=[State(component_id='destination', component_property='value'),
+               State(component_id='accept_distance',
+                     component_property='value')]
+    )
+    def submit_data(n_clicks, destination, accept_distance):
+        reloader.poll()
+        with Metrics.get_instance().time('submit'):
+            return create_parking_spots(n_clicks, destination,
+                                        accept_distance, cu, response_cache,
+                                        single_trace)
+
+    # Prometheus scrapes the stage latencies and counters from /metrics
+    if isinstance(getattr(cu, 'geocode_cache', None), GeocodeCache):
+        Metrics.get_instance().add_cache('geocode', cu.geocode_cache.stats)
+    if response_cache is not None:
+        Metrics.get_instance().add_cache('response', response_cache.stats)
+
+    @dash_app.server.route('/metrics')
+    def metrics():
+        return flask.Response(Metrics.get_instance().render(),
+                              mimetype='text/plain; version=0.0.4')
+
+    return dash_app
+
+
+def create_parking_spots(n_clicks, destination, accept_distance, cu_instance,
+                         response_cache=None, single_trace=False):
     """
     This function refreshes the map when the submit button is clicked with
     user input destination address and acceptable distance.
@@ -186,6 +309,13 @@ def create_parking_spots(n_clicks, destination, accept_distance, cu_instance):
     cu_instance: object
         object to call the functions in CoordinatesUtil
 
+    response_cache: ResponseCache, optional
+        the figures of earlier requests, reused for the same destination
+        and distance within the same hour. No caching if not given.
+
+    single_trace: bool, optional
+        draw the recommended parking spots in one trace, see street_trace().
+
     Returns
     -------
     JSON
@@ -193,7 +323,18 @@ def create_parking_spots(n_clicks, destination, accept_distance, cu_instance):
     """
     if destination and accept_distance:
         if n_clicks > 0:
-            top_spots_on_map = []
+            metrics = Metrics.get_instance()
+            if response_cache is not None:
+                cached = response_cache.get(destination, accept_distance)
+                if cached is not None:
+                    # get_parking_spots counts the requests it answers
+                    metrics.increment('requests')
+                    street_traces, destination_coordinates = cached
+                    return {
+                               "data": street_traces + [destination_trace(
+                                   destination, destination_coordinates)],
+                               "layout": map_layout()
+                           }, ""
             spots, destination_coordinates = \
                 cu_instance.get_parking_spots(destination, accept_distance)
             if not destination_coordinates or not spots or len(spots) == 0:
@@ -212,76 +353,19 @@ def create_parking_spots(n_clicks, destination, accept_distance, cu_instance):
                                    "visible": True
                                }
                            ],
-                           "layout": layout
+                           "layout": map_layout()
                        }, "Input Address is Invalid!"
-            for spot in spots:
-                lats = spot.street_meet_expect_coordinates[0]
-                longs = spot.street_meet_expect_coordinates[1]
-                street_details = f"Address: " \
-                                 f"<a " \
-                                 f"href=\"https://www.google.com/maps/" \
-                                 f"place/" \
-                                 f"{spot.street_lat_mid}," \
-                                 f"{spot.street_lon_mid}\" " \
-                                 f"target=_blank>" + \
-                                 spot.street_name + f"</a> <br />" \
-                                 f"Distance: " \
-                                 f"{round(spot.calculated_distance, 2)} " \
-                                 f"miles" \
-                                 f"<br />Spots Available: " \
-                                 f"{math.floor(spot.spaceavail)}"
-                top_spots_on_map.append(
-                    {
-                        "type": "scattermapbox",
-                        "lat": lats,
-                        "lon": longs,
-                        "mode": "lines",
-                        "marker": {
-                            "size": 4,
-                            "color": "green"
-                        },
-                        "hovertemplate": f"{street_details}<extra></extra>",
-                        "hoverlabel": {
-                            "bgcolor": "white",
-                            "font_size": 10,
-                            "align": "left"
-                        },
-                        "showlegend": False,
-
-                        "visible": True
-                    }
-                )
-            destination_address_link = f"Address: <a href=" \
-                                       f"\"https://www.google.com/" \
-                                       f"maps/place/" \
-                                       f"{destination_coordinates[0]}," \
-                                       f"{destination_coordinates[1]}\" " \
-                                       f"target=_blank>" + destination + \
-                                       "</a>"
-            top_spots_on_map.append(
-                {
-                    "type": "scattermapbox",
-                    "lat": [destination_coordinates[0]],
-                    "lon": [destination_coordinates[1]],
-                    "mode": "point",
-                    "marker": {
-                        "size": 8,
-                        "color": "red"
-                    },
-                    "hovertemplate": f"{destination_address_link}"
-                                     f"<extra></extra>",
-                    "hoverlabel": {
-                        "bgcolor": "white",
-                        "font_size": 10
-                    },
-                    "showlegend": False,
-
-                    "visible": True
-                }
-            )
+            with metrics.time('figure'):
+                street_traces = spot_traces(spots, single_trace)
+                top_spots_on_map = street_traces + [destination_trace(
+                    destination, destination_coordinates)]
+            if response_cache is not None:
+                # the destination is drawn as typed, it is not cached
+                response_cache.put(destination, accept_distance,
+                                   (street_traces, destination_coordinates))
             return {
                        "data": top_spots_on_map,
-                       "layout": layout
+                       "layout": map_layout()
                    }, ""
         else:
             return {
@@ -299,7 +383,7 @@ def create_parking_spots(n_clicks, destination, accept_distance, cu_instance):
                                "visible": True
                            }
                        ],
-                       "layout": layout
+                       "layout": map_layout()
                    }, ""
     else:
         return {
@@ -317,11 +401,204 @@ def create_parking_spots(n_clicks, destination, accept_distance, cu_instance):
                            "visible": True
                        }
                    ],
-                   "layout": layout
+                   "layout": map_layout()
                }, ""
 
 
+def spot_traces(spots, single_trace=False):
+    """
+    This function builds the lines of the recommended parking spots on the
+    map.
+
+    Parameters
+    ----------
+    spots: list
+        the recommended ParkingSpot objects.
+
+    single_trace: bool, optional
+        draw every parking spot in one trace, see street_trace(), instead
+        of a trace per parking spot.
+
+    Returns
+    -------
+    list
+        the scattermapbox traces, as dictionaries.
+    """
+    top_spots_on_map = []
+    if single_trace:
+        top_spots_on_map.append(street_trace(spots))
+    else:
+        for spot in spots:
+            lats = spot.street_meet_expect_coordinates[0]
+            longs = spot.street_meet_expect_coordinates[1]
+            street_details = f"Address: " \
+                             f"<a " \
+                             f"href=\"https://www.google.com/maps/" \
+                             f"place/" \
+                             f"{spot.street_lat_mid}," \
+                             f"{spot.street_lon_mid}\" " \
+                             f"target=_blank>" + \
+                             spot.street_name + f"</a> <br />" \
+                             f"Distance: " \
+                             f"{round(spot.calculated_distance, 2)} " \
+                             f"miles" \
+                             f"<br />Spots Available: " \
+                             f"{math.floor(spot.spaceavail)}"
+            top_spots_on_map.append(
+                {
+                    "type": "scattermapbox",
+                    "lat": lats,
+                    "lon": longs,
+                    "mode": "lines",
+                    "marker": {
+                        "size": 4,
+                        "color": "green"
+                    },
+                    "hovertemplate": f"{street_details}<extra></extra>",
+                    "hoverlabel": {
+                        "bgcolor": "white",
+                        "font_size": 10,
+                        "align": "left"
+                    },
+                    "showlegend": False,
+
+                    "visible": True
+                }
+            )
+    return top_spots_on_map
+
+
+def destination_trace(destination, destination_coordinates):
+    """
+    This function builds the point of the destination on the map.
+
+    Parameters
+    ----------
+    destination: str
+        the user input destination address, shown as typed.
+
+    destination_coordinates: list
+        the latitude and longitude of the destination.
+
+    Returns
+    -------
+    dictionary
+        the scattermapbox trace.
+    """
+    destination_address_link = f"Address: <a href=" \
+                               f"\"https://www.google.com/" \
+                               f"maps/place/" \
+                               f"{destination_coordinates[0]}," \
+                               f"{destination_coordinates[1]}\" " \
+                               f"target=_blank>" + destination + \
+                               "</a>"
+    return {
+        "type": "scattermapbox",
+        "lat": [destination_coordinates[0]],
+        "lon": [destination_coordinates[1]],
+        "mode": "point",
+        "marker": {
+            "size": 8,
+            "color": "red"
+        },
+        "hovertemplate": f"{destination_address_link}"
+                         f"<extra></extra>",
+        "hoverlabel": {
+            "bgcolor": "white",
+            "font_size": 10
+        },
+        "showlegend": False,
+
+        "visible": True
+    }
+
+
+def street_trace(spots):
+    """
+    This function draws every recommended parking spot in a single
+    scattermapbox trace: the segments are separated by None, and the hover
+    text of each point is filled in from its customdata by
+    street_hovertemplate, so the payload holds no per-street markup.
+
+    Parameters
+    ----------
+    spots: list or ParkingSpotArray
+        the recommended ParkingSpot objects.
+
+    Returns
+    -------
+    dictionary
+        the scattermapbox trace.
+    """
+    if isinstance(spots, ParkingSpotArray):
+        coordinates = spots.coordinates.reshape(-1, 2, 2)
+        mid_latitudes, mid_longitudes = spots.mid_latitudes, \
+            spots.mid_longitudes
+        street_names, distances, spaces = spots.street_names, \
+            spots.distances, spots.spaceavail
+    else:
+        coordinates = np.array(
+            [spot.street_meet_expect_coordinates for spot in spots],
+            dtype=float).reshape(-1, 2, 2)
+        mid_latitudes, mid_longitudes, street_names, distances, spaces = (
+            [getattr(spot, name) for spot in spots] for name in (
+                'street_lat_mid', 'street_lon_mid', 'street_name',
+                'calculated_distance', 'spaceavail'))
+    spaces = np.asarray(spaces, dtype=float)
+
+    # three points per street: start, end and a None to break the line
+    n = len(coordinates)
+    lats = np.full((n, 3), None, dtype=object)
+    lons = np.full((n, 3), None, dtype=object)
+    lats[:, :2] = coordinates[:, 0]
+    lons[:, :2] = coordinates[:, 1]
+
+    details = np.empty((n, 5), dtype=object)
+    details[:, 0] = np.asarray(mid_latitudes, dtype=float)
+    details[:, 1] = np.asarray(mid_longitudes, dtype=float)
+    details[:, 2] = np.asarray(street_names, dtype=object)
+    details[:, 3] = np.round(np.asarray(distances, dtype=float), 2)
+    details[:, 4] = np.where(np.isnan(spaces), None, np.floor(spaces))
+    customdata = np.full((n, 3, 5), None, dtype=object)
+    customdata[:, :2] = details[:, np.newaxis]
+
+    return {
+        "type": "scattermapbox",
+        "lat": lats.ravel().tolist(),
+        "lon": lons.ravel().tolist(),
+        "mode": "lines",
+        "marker": {
+            "size": 4,
+            "color": "green"
+        },
+        "customdata": customdata.reshape(-1, 5).tolist(),
+        "hovertemplate": street_hovertemplate,
+        "hoverlabel": {
+            "bgcolor": "white",
+            "font_size": 10,
+            "align": "left"
+        },
+        "showlegend": False,
+
+        "visible": True
+    }
+
+
+_dash_app = None
+
+
+def __getattr__(name):
+    # parking_app.dash_app, for code written before create_app()
+    global _dash_app
+    if name == 'dash_app':
+        if _dash_app is None:
+            _dash_app = create_app()
+        return _dash_app
+    raise AttributeError(
+        "module %r has no attribute %r" % (__name__, name))
+
+
 # ------------------------------------------------------------------------
 
 if __name__ == '__main__':
-    dash_app.run_server(debug=False)
+    create_app().run_server(debug=False)
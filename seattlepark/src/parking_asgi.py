@@ -0,0 +1,152 @@
+# A small ASGI application serving parking recommendations as JSON, to run
+# next to the Dash app on any ASGI server, for example:
+#
+#   cd seattlepark/src
+#   uvicorn parking_asgi:app --port 8051
+#
+# GET /parking?destination=1st+Ave+%26+Pike+St&distance=0.5 answers with
+#
+#   {"destination": [47.60, -122.34],
+#    "spots": [{"street_name": ..., "distance": ..., ...}, ...]}
+#
+# Each request awaits CoordinatesUtil.aget_parking_spots, so geocoding and
+# ranking run in a thread pool and one event loop can keep many lookups in
+# flight. The parking data is loaded in the same thread pool when the server
+# starts the app, before the first request.
+
+import asyncio
+import json
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from coordinates_util import CoordinatesUtil
+
+
+def spot_to_dict(spot):
+    """
+    Return a ParkingSpot as a dictionary that can be serialized to JSON.
+    """
+    spaceavail = float(spot.spaceavail)
+    return {
+        'street_name': spot.street_name,
+        'distance': float(spot.calculated_distance),
+        'coordinates': spot.street_meet_expect_coordinates,
+        'mid_point': [float(spot.street_lat_mid),
+                      float(spot.street_lon_mid)],
+        'spaces_available':
+            None if math.isnan(spaceavail) else math.floor(spaceavail),
+    }
+
+
+class ParkingASGIApp:
+    """
+    This class is an ASGI application answering GET /parking requests with
+    the recommended parking spots of a destination.
+
+    Attributes
+    ----------
+    cu: Instance of CoordinatesUtil
+        provides the parking spots, created at the lifespan startup, or on
+        the first request by servers without lifespan events, if not
+        given.
+
+    executor: Instance of ThreadPoolExecutor
+        runs the geocoding and ranking of the requests.
+    """
+
+    def __init__(self, cu=None, max_workers=64):
+        """
+        Parameters
+        ----------
+        cu: CoordinatesUtil, optional
+            provides the parking spots.
+
+        max_workers: int, optional
+            the number of geocoding and ranking jobs run at once.
+        """
+        self.cu = cu
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._cu_lock = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        if scope['path'] != '/parking':
+            await self.respond(send, 404, {'error': 'Not found'})
+            return
+        if scope['method'] != 'GET':
+            await self.respond(send, 405, {'error': 'Method not allowed'})
+            return
+
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        destination = query.get('destination', [''])[0]
+        distance = query.get('distance', [''])[0]
+        try:
+            distance = float(distance)
+        except ValueError:
+            distance = None
+        if not destination or distance is None:
+            await self.respond(
+                send, 400,
+                {'error': 'destination and distance are required'})
+            return
+
+        cu = await self.coordinates_util()
+        spots, destination_coordinates = \
+            await cu.aget_parking_spots(destination, distance, self.executor)
+        await self.respond(send, 200, {
+            'destination': destination_coordinates,
+            'spots': [spot_to_dict(spot) for spot in spots],
+        })
+
+    async def coordinates_util(self):
+        """
+        Return cu, creating it in the executor so loading the parking data
+        doesn't block the event loop.
+        """
+        if self.cu is None:
+            await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._create_coordinates_util)
+        return self.cu
+
+    def _create_coordinates_util(self):
+        # concurrent first requests create a single CoordinatesUtil
+        with self._cu_lock:
+            if self.cu is None:
+                self.cu = CoordinatesUtil()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self.coordinates_util()
+                except Exception as error:
+                    await send({'type': 'lifespan.startup.failed',
+                                'message': repr(error)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def respond(send, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'),
+                        (b'content-length', str(len(payload)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': payload})
+
+
+app = ParkingASGIApp()
@@ -0,0 +1,269 @@
+import threading
+
+import numpy as np
+
+from intersection_geocoder import IntersectionGeocoder
+from parking_study import HOURS_PER_DAY, ParkingStudy
+from recommendation_tiles import RecommendationTiles
+from spatial_index import GridIndex, haversine
+from street_geometry import StreetGeometry
+from walking_network import WalkingNetwork
+
+
+class InvalidDataError(ValueError):
+    pass
+
+
+class ParkingData:
+    """
+    This class holds one version of the data the requests read: the
+    Parking Study tables and the street locations with their spatial index.
+
+    A request reads the current version once and uses it until it returns,
+    so replacing the version with set_instance() while requests are in
+    progress never mixes two versions in one response. The old version is
+    freed once the last request reading it returns.
+
+    Attributes
+    ----------
+    study: Instance of ParkingStudy
+        the Parking Study tables, the process-wide ParkingStudy unless
+        given.
+
+    geometry: Instance of StreetGeometry
+        the location of every street.
+
+    street_names: ndarray
+        the street name of each street of geometry.
+
+    line_coordinates: ndarray
+        a (street, 2, 2) array of the coordinates of the start and end of
+        each street.
+
+    mid_latitudes: ndarray
+        the latitude of the mid-point of each street.
+
+    mid_longitudes: ndarray
+        the longitude of the mid-point of each street.
+
+    spatial_index: Instance of GridIndex
+        a grid index of the street mid-points.
+
+    segment_reach: float
+        the longest distance in miles from the mid-point of a street to a
+        point of its segment, how much closer than its mid-point a segment
+        can be.
+
+    coordinates_mapping: dictionary
+        the streets as the coordinates_mapping of CoordinatesUtil, built on
+        first use.
+
+    local_geocoder: Instance of IntersectionGeocoder
+        geocodes intersections and street names of geometry, built on first
+        use.
+
+    walking_network: Instance of WalkingNetwork
+        the walking network of geometry, loaded on first use.
+
+    tiles: Instance of RecommendationTiles
+        the recommendations precomputed for study and geometry, loaded on
+        first use, None if they were not built for these files.
+
+    Methods
+    -------
+    get_instance()
+        Return the current version, loading it on first use.
+
+    set_instance(data)
+        Replace the current version.
+
+    load(study_path, json_path)
+        Load a new version from the source files.
+
+    validate()
+        Raise InvalidDataError if the version can't serve requests.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, study=None, geometry=None):
+        """
+        Parameters
+        ----------
+        study: ParkingStudy, optional
+            the Parking Study tables, defaults to the process-wide
+            ParkingStudy.
+
+        geometry: StreetGeometry, optional
+            the street locations, defaults to the file shipped in the
+            resources folder.
+        """
+        self._study = study
+        self.geometry = geometry if geometry is not None else StreetGeometry()
+        self.street_names = self.geometry.street_names
+        self.line_coordinates = self.geometry.line_coordinates()
+        self.mid_latitudes = self.geometry.mid_latitudes
+        self.mid_longitudes = self.geometry.mid_longitudes
+        self.spatial_index = GridIndex(self.mid_latitudes,
+                                       self.mid_longitudes)
+        # the furthest point of a segment from its mid-point is an endpoint
+        geometry = self.geometry
+        self.segment_reach = float(np.max(np.maximum(
+            haversine(geometry.mid_latitudes, geometry.mid_longitudes,
+                      geometry.start_latitudes, geometry.start_longitudes),
+            haversine(geometry.mid_latitudes, geometry.mid_longitudes,
+                      geometry.end_latitudes, geometry.end_longitudes)),
+            initial=0.0))
+        self._coordinates_mapping = None
+        self._local_geocoder = None
+        self._walking_network = None
+        self._tiles = None
+        self._tiles_loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def study(self):
+        """
+        The Parking Study tables of this version.
+        """
+        if self._study is None:
+            # parsing the csv file is left to the first recommendation
+            return ParkingStudy.get_instance()
+        return self._study
+
+    @property
+    def coordinates_mapping(self):
+        """
+        The streets as the coordinates_mapping of CoordinatesUtil.
+        """
+        if self._coordinates_mapping is None:
+            with self._lock:
+                if self._coordinates_mapping is None:
+                    self._coordinates_mapping = self.geometry.to_mapping()
+        return self._coordinates_mapping
+
+    @property
+    def local_geocoder(self):
+        """
+        The IntersectionGeocoder of the streets of this version.
+        """
+        if self._local_geocoder is None:
+            mapping = self.coordinates_mapping
+            with self._lock:
+                if self._local_geocoder is None:
+                    self._local_geocoder = IntersectionGeocoder(mapping)
+        return self._local_geocoder
+
+    @property
+    def walking_network(self):
+        """
+        The WalkingNetwork of the streets of this version.
+        """
+        if self._walking_network is None:
+            with self._lock:
+                if self._walking_network is None:
+                    self._walking_network = WalkingNetwork(self.geometry)
+        return self._walking_network
+
+    @property
+    def tiles(self):
+        """
+        The RecommendationTiles of this version, None if there are none.
+        """
+        if not self._tiles_loaded:
+            study = self.study
+            with self._lock:
+                if not self._tiles_loaded:
+                    # never built here, building them takes seconds
+                    self._tiles = RecommendationTiles.load(self.geometry,
+                                                           study)
+                    self._tiles_loaded = True
+        return self._tiles
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Return the current version, loading it on first use.
+        """
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def set_instance(cls, data):
+        """
+        Replace the current version. Requests already reading the old
+        version finish with it.
+
+        Parameters
+        ----------
+        data: ParkingData or None
+            the version to serve, or None to load the default files again
+            on next use.
+        """
+        with cls._instance_lock:
+            cls._instance = data
+        # ParkingRecommenders built without a ParkingData read the same
+        # study
+        if data is not None and data._study is not None:
+            ParkingStudy.set_instance(data._study)
+
+    @classmethod
+    def load(cls, study_path=None, json_path=None):
+        """
+        Load a new version from the source files, sharing nothing with the
+        current version.
+
+        Parameters
+        ----------
+        study_path: str, optional
+            the location of the Parking Study csv file.
+
+        json_path: str, optional
+            the location of the street json file.
+
+        Returns
+        -------
+        ParkingData
+            the new version, with its study, coordinates_mapping,
+            local_geocoder, walking_network and tiles already loaded.
+        """
+        data = cls(ParkingStudy(study_path), StreetGeometry(json_path))
+        data.local_geocoder
+        data.walking_network
+        data.tiles
+        return data
+
+    def validate(self):
+        """
+        Raise InvalidDataError if this version can't serve requests: no
+        street, tables of the wrong shape, coordinates that are not a
+        latitude and longitude, or no street of geometry in the study.
+        """
+        study = self.study
+        n_streets = len(study.street_names)
+        if n_streets == 0:
+            raise InvalidDataError('The Parking Study has no street')
+        for name in ('freespace_table', 'observed_table', 'first_row_table',
+                     'effective_hour_table'):
+            shape = getattr(study, name).shape
+            if shape != (n_streets, HOURS_PER_DAY):
+                raise InvalidDataError('%s has shape %s, expected %s' % (
+                    name, shape, (n_streets, HOURS_PER_DAY)))
+
+        if len(self.geometry) == 0:
+            raise InvalidDataError('The street geometry has no street')
+        latitudes = self.geometry.coordinates[0::2]
+        longitudes = self.geometry.coordinates[1::2]
+        if not (np.all(np.abs(latitudes) <= 90) and
+                np.all(np.abs(longitudes) <= 180)):
+            # also false for NaN
+            raise InvalidDataError(
+                'The street geometry has invalid coordinates')
+
+        if study.unitdescs.isdisjoint(self.street_names):
+            raise InvalidDataError(
+                'No street of the geometry is in the Parking Study')
@@ -10,6 +10,8 @@
 # The __init__ method is the constructor of the ParkingRecommender object
 # and parses the datetime input and filters the full parking study dataset
 # down to just the streets in the ParkingSpot list, using method slice_df().
+# The dataset itself is read only once per process and shared between
+# recommenders, see parking_study.py.
 
 # The max_freespace method uses that filtered dataset and returns the 5
 # streets with the highest estimated parking availability, based on average
@@ -23,10 +25,17 @@
 # output = pr.recommend()
 # Here, output is a list of 5 ParkingSpot objects, with their .spaceavail
 # attributes filled in.
+# "ps" may also be a ParkingSpotArray, then only the ParkingSpot objects
+# of the output are created.
+
+import datetime
+import heapq
 
-import os
 import numpy as np
-import pandas as pd
+
+from metrics import Metrics
+from parking_spot import ParkingSpotArray
+from parking_study import ParkingStudy, fallback_hours
 
 
 class NoParkingSpotsInListError(Exception):
@@ -42,12 +51,13 @@ class InvalidStreetError(Exception):
 
 
 class ParkingRecommender:
-    def __init__(self, parkingspotlist, datetimestr):
+    def __init__(self, parkingspotlist, datetimestr, study=None):
         """
-        parkingspotlist is a List object containing ParkingSpot objects, the
-        output of the coordinates_util module.
+        parkingspotlist is a List object containing ParkingSpot objects, or
+        a ParkingSpotArray, the output of the coordinates_util module.
         datetimestr is the user's requested date/time for parking data
         (computer time at time request is made?)
+        study is the ParkingStudy to read, the process-wide one by default
         """
         self.initial_list = parkingspotlist
 
@@ -56,163 +66,183 @@ class ParkingRecommender:
                 'No streets were passed to the recommender'
             )
 
-        datetime = pd.to_datetime(datetimestr)
-        self.hr = datetime.hour
+        if isinstance(datetimestr, datetime.datetime):
+            # already parsed, pd.to_datetime would only copy it
+            self.hr = datetimestr.hour
+        else:
+            import pandas as pd
 
-        self.initial_df = self.slice_by_street()
+            self.hr = pd.to_datetime(datetimestr).hour
 
-    def slice_by_street(self):
+        self.study = study if study is not None else \
+            ParkingStudy.get_instance()
+        if isinstance(parkingspotlist, ParkingSpotArray):
+            self.spot_names = parkingspotlist.street_names
+        else:
+            self.spot_names = [st.street_name for st in self.initial_list]
+        self.spot_street_ids = self.find_street_ids()
+        # the street ids without duplicates, and the first spot of each
+        self.street_ids, self.first_spots = np.unique(
+            self.spot_street_ids, return_index=True)
+        self._initial_df = None
+
+    @property
+    def initial_df(self):
         """
-        Import the Parking Study dataset and filter it down to the streets
-        contained in parkingspotlist
+        The Parking Study observations of the streets in parkingspotlist,
+        filtered from the shared dataset the first time they are needed.
         """
-        # Extract street names from list of ParkingSpot objects
-        street_names = []
-        for st in self.initial_list:
-            street_names.append(st.street_name)
-
-        filepath = os.path.join(
-            os.path.dirname(__file__),
-            "resources/Annual_Parking_Study_Data_Cleaned2.csv")
+        if self._initial_df is None:
+            self._initial_df = self.slice_by_street()
+        return self._initial_df
 
-        # Import the dataset
-        df = pd.read_csv(filepath, low_memory=False)
-
-        # check if all the requested street names are in the database
-        unitdescs = df['Unitdesc'].unique()
-        for name in street_names:
-            if name not in unitdescs:
-                raise InvalidStreetError(
-                    'Street %s not found in Parking Study database' % name
-                )
+    def find_street_ids(self):
+        """
+        Return the street id of each spot in parkingspotlist, raise
+        InvalidStreetError if a street is not in the dataset
+        """
+        street_index = self.study.street_index
+        try:
+            return np.array([street_index[name] for name in self.spot_names],
+                            dtype=np.int64)
+        except KeyError as error:
+            raise InvalidStreetError(
+                'Street %s not found in Parking Study database' % error.args
+            )
 
-        df_sliced = df[df['Unitdesc'].isin(street_names)]
-        return df_sliced
+    def slice_by_street(self):
+        """
+        Filter the shared Parking Study dataset down to the streets
+        contained in parkingspotlist
+        """
+        return self.study.slice_by_street(list(self.spot_names))
 
     def slice_by_hour(self, req_hr):
         """
-        Slice initial_df to the requested hour, return further sliced df
-        """
-        # filter initial_df down to the requested hour
-        df_this_hour = self.initial_df[
-            self.initial_df['Hour'] == req_hr
-        ]
-
-        # check if there were any results
-        if df_this_hour.shape[0] == 0:
-            # no observations at specified hour, try one hour later
-            # print('no results at %d' % req_hr)
-            if req_hr < 23:
-                new_hr = req_hr + 1
-            else:  # there is no hour 24, wraps around to 0
-                new_hr = 0
-            # print('trying %d' % new_hr)
-            df_this_hour = self.initial_df[
-                self.initial_df['Hour'] == new_hr
-            ]
-
-        # check again to see if that worked
-        if df_this_hour.shape[0] == 0:
-            # still no observations, try one hour earlier
-            # print('no results at %d' % new_hr)
-            if req_hr > 0:
-                new_hr = req_hr - 1
-            else:  # there is no hour -1, wraps around to 23
-                new_hr = 23
-            # print('trying %d' % new_hr)
-            df_this_hour = self.initial_df[
-                self.initial_df['Hour'] == new_hr
-            ]
-
-        # check again to see if that worked
-        if df_this_hour.shape[0] == 0:
-            # still no observations, raise an error that we can catch
-            # print('no results at %d' % new_hr)
-            raise NoSearchResultsError
-        else:
-            return df_this_hour
+        Slice initial_df to the requested hour, or to the hour find_hour
+        falls back to, return further sliced df
+        """
+        hr = self.find_hour(req_hr)
+        return self.initial_df[self.initial_df['Hour'] == hr]
 
     def max_freespace(self):
         """
         Return a tuple (streets,free_spaces) for all the streets
         in the initial list
         """
-        # slice df to the requested hour
-        df2 = self.slice_by_hour(self.hr)
+        street_ids, free_spaces = self.freespace_by_street_id()
+        return self.study.street_names[street_ids], free_spaces
 
-        # List of unique streets in initial_df
-        streets = df2['Unitdesc'].unique()
-
-        # initialize a list to keep track of free spaces on each street
-        free_spaces = np.zeros((len(streets),))
-        # loop through each street and calculate free spaces
-        for i, street in enumerate(streets):
-            # filter the df to list observations from street (unitdesc) i only
-            this_street = df2[df2['Unitdesc'] == street]
+    def freespace_by_street_id(self):
+        """
+        Return a tuple (street_ids,free_spaces) for all the streets in the
+        initial list, the same streets in the same order as max_freespace
+        """
+        # find the hour to report, same fallback rules as slice_by_hour
+        hr = self.find_hour(self.hr)
 
-            # how many sides does this street have? At most 2
-            sides = this_street['Side'].unique()
+        # keep the streets observed at that hour, in the order they appear
+        # in the dataset
+        observed = self.study.observed_table[self.street_ids, hr]
+        street_ids = self.street_ids[observed]
+        order = np.argsort(
+            self.study.first_row_table[street_ids, hr], kind='stable')
+        street_ids = street_ids[order]
 
-            for side in sides:
-                # filter to just this side
-                this_side = this_street[this_street['Side'] == side]
-                num_obs = this_side.shape[0]
-                if num_obs > 0:
-                    # This calculation gives "free spaces per observation,"
-                    # an estimate of how many spaces are available
-                    avg_freespace = this_side['Free_Spaces'].mean()
-                    free_spaces[i] += avg_freespace
+        # free spaces per street are precomputed by the ParkingStudy
+        return street_ids, self.study.freespace_table[street_ids, hr]
 
-        return streets, free_spaces
+    def find_hour(self, req_hr):
+        """
+        Return the hour whose observations answer a request at req_hr:
+        req_hr itself, else one hour later, else one hour earlier.
+        Raise NoSearchResultsError if none of them has observations.
+        """
+        # the fallback of each street is precomputed, the hour of the
+        # streets together is the first hour any of them falls back to
+        effective = self.study.effective_hour_table[self.street_ids, req_hr]
+        for hr in fallback_hours(req_hr):
+            if (effective == hr).any():
+                return hr
+        raise NoSearchResultsError
 
     def recommend(self, num_returns=5):
         """
         Returns a num_returns-length list of parking spots
         with the highest estimated number of available spaces
         """
+        spot_array = self.initial_list \
+            if isinstance(self.initial_list, ParkingSpotArray) else None
         try:
-            (streets, free_spaces) = self.max_freespace()
+            (street_ids, free_spaces) = self.freespace_by_street_id()
         except NoSearchResultsError:
 
             # no observations in self.hr +/- 1
             # just return the num_returns closest streets
-            newlist = sorted(self.initial_list,
-                             key=lambda x: x.calculated_distance,
-                             reverse=False)
-            n_entries = min(len(self.initial_list), num_returns)
-            # print('Returning %d closest spots' % n_entries)
-            # for i in range(n_entries):
-            #     print(newlist[i].street_name)
-            return newlist[0:n_entries]
+            Metrics.get_instance().increment(
+                'fallbacks', reason='NoSearchResultsError')
+            n_entries = max(num_returns, 0)
+            if spot_array is not None:
+                order = np.argsort(spot_array.distances, kind='stable')
+                return spot_array.to_spots(order[:n_entries])
+            # (heapq.nsmallest is a stable partial sort)
+            return heapq.nsmallest(n_entries, self.initial_list,
+                                   key=lambda x: x.calculated_distance)
 
         # Assuming no exception was raised:
-        sort_index = np.argsort(free_spaces)
-        free_spaces_sorted = free_spaces[sort_index]
-        streets_sorted = streets[sort_index]
-        # The sort is in ascending order, so take the last num_returns entries
-        n_entries = min(len(streets), num_returns)
-        streets_select = streets_sorted[-n_entries:]
-        free_spaces_select = free_spaces_sorted[-n_entries:]
-
-        # Now, downselect the list of ParkingSpots to just the ones selected
+        # the num_returns streets with the most free spaces, in ascending
+        # order of free spaces
+        select = largest_indices(free_spaces, num_returns)
+        free_spaces = free_spaces[select]
+
+        # Now, downselect the parking spots to just the ones selected,
+        # taking the first spot of each street
+        spots = self.first_spots[
+            np.searchsorted(self.street_ids, street_ids[select])]
+
+        # Fill in the .spaceavail attribute
+        if spot_array is not None:
+            spot_array.spaceavail[spots] = free_spaces
+            return spot_array.to_spots(spots)
+
         output_list = []
-        for i, select in enumerate(streets_select):
-            #  find "select" in self.initial_list
-            for j in range(len(self.initial_list)):
-                if self.initial_list[j].street_name == select:
-                    # Fill in the .spaceavail attribute
-                    self.initial_list[j].spaceavail = free_spaces_select[i]
-
-                    # Copy this entry over to the output list
-                    output_list.append(self.initial_list[j])
-                    break  # don't continue searching for "select" after found
-
-        # # some debugging print statements
-        # for i in range(len(output_list)):
-        #     print('%s: %4.1f spaces' % (
-        #         output_list[i].street_name,
-        #         output_list[i].spaceavail
-        #     )
-        #           )
+        for i, free_space in zip(spots, free_spaces):
+            spot = self.initial_list[i]
+            spot.spaceavail = free_space
+            output_list.append(spot)
 
         return output_list
+
+
+def largest_indices(values, k):
+    """
+    Return the indices of the k largest values, in the order a stable
+    ascending sort of values would list them, with NaN sorting after every
+    number.
+
+    Only the k selected values are sorted, so this takes O(n + k log k)
+    time instead of the O(n log n) of sorting all values.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    k = max(0, min(k, n))
+    if k == 0:
+        return np.arange(0)
+
+    # NaN is the largest value, the last NaNs are taken first
+    nan_indices = np.flatnonzero(np.isnan(values))
+    if len(nan_indices) >= k:
+        return nan_indices[-k:]
+    k_numbers = k - len(nan_indices)
+    number_indices = np.flatnonzero(~np.isnan(values))
+    numbers = values[number_indices]
+
+    # the k_numbers-th largest number, ties with it are broken in favour
+    # of later indices, like taking the tail of a stable sort
+    threshold = np.partition(numbers, len(numbers) - k_numbers)[
+        len(numbers) - k_numbers]
+    above = number_indices[numbers > threshold]
+    at = number_indices[numbers == threshold]
+    selected = np.concatenate([above, at[len(at) - (k_numbers - len(above)):]])
+    selected = selected[np.lexsort((selected, values[selected]))]
+    return np.concatenate([selected, nan_indices])
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class ParkingSpot:
     """
     This class represents a parking spot on the map.
@@ -24,6 +27,11 @@ class ParkingSpot:
         provide the number of spaces that are available in a parking street.
 
     """
+    # no per-instance __dict__, a request may create many spots
+    __slots__ = ('calculated_distance', 'street_meet_expect_coordinates',
+                 'street_name', 'street_lat_mid', 'street_lon_mid',
+                 'spaceavail')
+
     def __init__(self, distance, coordinates, street_name,
                  street_lat_mid, street_lon_mid):
         """
@@ -52,3 +60,117 @@ class ParkingSpot:
         self.street_lat_mid = street_lat_mid
         self.street_lon_mid = street_lon_mid
         self.spaceavail = 0
+
+
+class ParkingSpotArray:
+    """
+    This class represents many parking spots as parallel arrays, one entry
+    per street, so that the streets near a destination can be filtered and
+    ranked without creating a ParkingSpot for each of them.
+
+    Attributes
+    ----------
+    street_names: ndarray
+        the street address of each parking spot.
+
+    distances: ndarray
+        the calculated distance between destination and each parking spot.
+
+    coordinates: ndarray
+        a (spot, 2, 2) array of the latitudes and the longitudes of the
+        start and end of each parking street.
+
+    mid_latitudes: ndarray
+        the latitude of the middle point of each street.
+
+    mid_longitudes: ndarray
+        the longitude of the middle point of each street.
+
+    spaceavail: ndarray
+        the number of spaces that are available on each street.
+
+    street_ids: ndarray
+        the position of each street in the arrays the spots were taken
+        from.
+
+    Methods
+    -------
+    take(indices)
+        Return the parking spots at the given positions.
+
+    to_spots(indices)
+        Return the parking spots at the given positions as ParkingSpot
+        objects.
+    """
+
+    def __init__(self, street_names, distances, coordinates, mid_latitudes,
+                 mid_longitudes, street_ids=None, spaceavail=None):
+        """
+        Parameters
+        ----------
+        street_names: ndarray, required
+            the street address of each parking spot.
+
+        distances: ndarray, required
+            the calculated distance between destination and each spot.
+
+        coordinates: ndarray, required
+            a (spot, 2, 2) array of the coordinates of the start and end of
+            each parking street.
+
+        mid_latitudes: ndarray, required
+            the latitude of the middle point of each street.
+
+        mid_longitudes: ndarray, required
+            the longitude of the middle point of each street.
+
+        street_ids: ndarray, optional
+            the position of each street in the arrays the spots were taken
+            from, defaults to 0, 1, 2, ...
+
+        spaceavail: ndarray, optional
+            the number of spaces available on each street, defaults to 0.
+        """
+        self.street_names = np.asarray(street_names, dtype=object)
+        n = len(self.street_names)
+        self.distances = np.asarray(distances, dtype=float)
+        self.coordinates = np.asarray(coordinates, dtype=float).reshape(
+            n, 2, 2)
+        self.mid_latitudes = np.asarray(mid_latitudes, dtype=float)
+        self.mid_longitudes = np.asarray(mid_longitudes, dtype=float)
+        self.street_ids = np.arange(n) if street_ids is None else \
+            np.asarray(street_ids)
+        self.spaceavail = np.zeros(n) if spaceavail is None else \
+            np.asarray(spaceavail, dtype=float)
+
+    def __len__(self):
+        return len(self.street_names)
+
+    def take(self, indices):
+        """
+        Return the parking spots at the given positions as a new
+        ParkingSpotArray.
+        """
+        return ParkingSpotArray(
+            self.street_names[indices], self.distances[indices],
+            self.coordinates[indices], self.mid_latitudes[indices],
+            self.mid_longitudes[indices], self.street_ids[indices],
+            self.spaceavail[indices])
+
+    def to_spots(self, indices=None):
+        """
+        Return the parking spots at the given positions, every spot by
+        default, as a list of ParkingSpot objects.
+        """
+        if indices is None:
+            indices = range(len(self))
+        spots = []
+        for i in indices:
+            spot = ParkingSpot(float(self.distances[i]),
+                               self.coordinates[i].tolist(),
+                               self.street_names[i],
+                               float(self.mid_latitudes[i]),
+                               float(self.mid_longitudes[i]))
+            spot.spaceavail = self.spaceavail[i]
+            spots.append(spot)
+        return spots
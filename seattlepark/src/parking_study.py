@@ -0,0 +1,350 @@
+import os
+import threading
+
+import numpy as np
+
+import snapshot
+
+# pandas is imported where it is used: a process that loads the snapshot
+# and only reads the (street, hour) tables never needs it
+
+HOURS_PER_DAY = 24
+
+# the hours tried for a request at hour h, in order: h itself, one hour
+# later, then one hour earlier, wrapping around midnight
+FALLBACK_OFFSETS = (0, 1, -1)
+
+
+class ParkingStudy:
+    """
+    This class holds the Annual Parking Study dataset in memory.
+
+    The csv file is parsed once per process, the first time the dataset is
+    requested, and every ParkingRecommender filters that same copy instead
+    of reading the file again. The parsed columns are also written to a
+    binary snapshot next to the csv file, which later processes load
+    instead of parsing the csv, until the csv changes. The tables and
+    columns loaded from the snapshot are read-only memory maps, shared by
+    every process that loads the same snapshot.
+
+    Attributes
+    ----------
+    study_path: str
+        the location of the cleaned Annual Parking Study csv file.
+
+    study_df: DataFrame
+        the full Annual Parking Study dataset.
+
+    unitdescs: set
+        the street names (Unitdesc) that have observations in the dataset.
+
+    street_names: ndarray
+        the street names in order of first appearance in the dataset, the
+        position of a street in this array is its street id.
+
+    street_index: dictionary
+        a dictionary with the key as street name and value its street id.
+
+    freespace_table: ndarray
+        a (street, hour) table of the estimated free spaces on a street,
+        the mean Free_Spaces of each side of the street summed over sides.
+
+    observed_table: ndarray
+        a (street, hour) table, True where the street has observations at
+        that hour.
+
+    first_row_table: ndarray
+        a (street, hour) table of the first row of study_df holding an
+        observation of the street at that hour, used to keep the order
+        in which streets appear in the dataset.
+
+    effective_hour_table: ndarray
+        a (street, hour) table of the hour whose observations answer a
+        request for the street at that hour, -1 if there is none, see
+        effective_hours().
+
+    Methods
+    -------
+    get_instance()
+        Return the process-wide ParkingStudy, loading it on first use.
+
+    set_instance(study)
+        Replace the process-wide ParkingStudy.
+
+    slice_by_street(street_names)
+        Return the observations of the given streets.
+
+    build_freespace_tables()
+        Aggregate study_df into the (street, hour) tables.
+
+    tables_to_arrays()
+        Return the (street, hour) tables as arrays to store in a snapshot.
+
+    tables_from_arrays(arrays)
+        Set the (street, hour) tables from the arrays of a snapshot.
+    """
+
+    default_path = os.path.join(
+        os.path.dirname(__file__),
+        "resources/Annual_Parking_Study_Data_Cleaned2.csv")
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, study_path=None, use_snapshot=True):
+        """
+        Parameters
+        ----------
+        study_path: str, optional
+            the location of the csv file, defaults to the file shipped in
+            the resources folder.
+
+        use_snapshot: bool, optional
+            whether to load and write the binary snapshot of the csv file.
+        """
+        self.study_path = study_path or self.default_path
+        self._study_df = None
+        self._frame_arrays = None
+        self._frame_lock = threading.Lock()
+
+        arrays = None
+        if use_snapshot:
+            # the arrays are mapped, not copied, so that every process
+            # shares them
+            arrays = snapshot.load_snapshot(self.study_path, mmap=True)
+
+        if arrays is None:
+            import pandas as pd
+
+            self._study_df = pd.read_csv(self.study_path, low_memory=False)
+            self.build_freespace_tables()
+            if use_snapshot:
+                arrays = frame_to_arrays(self._study_df) or {}
+                arrays.update(self.tables_to_arrays())
+                snapshot.save_snapshot(self.study_path, arrays)
+        else:
+            # the DataFrame is only decoded once something needs it
+            self.tables_from_arrays(arrays)
+            if 'columns' in arrays:
+                self._frame_arrays = arrays
+
+        self.unitdescs = set(self.street_names)
+
+    @property
+    def study_df(self):
+        """
+        The full Annual Parking Study dataset.
+        """
+        if self._study_df is None:
+            with self._frame_lock:
+                if self._study_df is None:
+                    if self._frame_arrays is not None:
+                        self._study_df = arrays_to_frame(self._frame_arrays)
+                    else:
+                        import pandas as pd
+
+                        self._study_df = pd.read_csv(self.study_path,
+                                                     low_memory=False)
+        return self._study_df
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Return the process-wide ParkingStudy, loading it on first use.
+        """
+        if cls._instance is None:
+            with cls._instance_lock:
+                # another thread may have loaded it while we were waiting
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def set_instance(cls, study):
+        """
+        Replace the process-wide ParkingStudy.
+
+        Parameters
+        ----------
+        study: ParkingStudy or None
+            the study to share, or None to load the default file again on
+            next use.
+        """
+        with cls._instance_lock:
+            cls._instance = study
+
+    def slice_by_street(self, street_names):
+        """
+        Return the observations of the given streets.
+
+        Parameters
+        ----------
+        street_names: list, required
+            a list of street names (Unitdesc).
+
+        Returns
+        -------
+        DataFrame
+            the rows of study_df whose Unitdesc is in street_names.
+        """
+        return self.study_df[self.study_df['Unitdesc'].isin(street_names)]
+
+    def build_freespace_tables(self):
+        """
+        Aggregate study_df into the (street, hour) tables.
+
+        The free spaces of a street at an hour are computed the same way
+        ParkingRecommender always did it: the mean of Free_Spaces over the
+        observations of each side, summed over the sides of the street.
+        """
+        import pandas as pd
+
+        df = self.study_df
+        codes, names = pd.factorize(df['Unitdesc'])
+        self.street_names = np.asarray(names, dtype=object)
+        self.street_index = {name: i for i, name in enumerate(names)}
+
+        hours = pd.to_numeric(df['Hour'], errors='coerce').to_numpy()
+        # only whole hours of the day can ever be requested
+        valid = (codes >= 0) & np.isin(hours, np.arange(HOURS_PER_DAY))
+        obs = pd.DataFrame({
+            'street': codes[valid],
+            'hour': hours[valid].astype(np.int64),
+            'side': df['Side'].to_numpy()[valid],
+            'free': df['Free_Spaces'].to_numpy(dtype=float)[valid],
+            'row': np.flatnonzero(valid),
+        })
+
+        shape = (len(names), HOURS_PER_DAY)
+        self.observed_table = np.zeros(shape, dtype=bool)
+        self.first_row_table = np.zeros(shape, dtype=np.int64)
+        self.freespace_table = np.zeros(shape)
+
+        first_rows = obs.groupby(['street', 'hour'])['row'].min()
+        street_ids = first_rows.index.get_level_values(0)
+        hour_ids = first_rows.index.get_level_values(1)
+        self.observed_table[street_ids, hour_ids] = True
+        self.first_row_table[street_ids, hour_ids] = first_rows.to_numpy()
+
+        # observations without a side are never counted
+        side_means = obs.groupby(['street', 'hour', 'side'])['free'].mean()
+        totals = side_means.groupby(level=[0, 1]).sum()
+        # a side without any valid observation makes the total unknown
+        unknown = side_means.isna().groupby(level=[0, 1]).any()
+        totals[unknown] = np.nan
+        self.freespace_table[totals.index.get_level_values(0),
+                             totals.index.get_level_values(1)] = \
+            totals.to_numpy()
+        self.effective_hour_table = effective_hours(self.observed_table)
+
+    def tables_to_arrays(self):
+        """
+        Return the (street, hour) tables as arrays to store in a snapshot.
+        """
+        return {
+            'street_names': np.array(list(self.street_names), dtype=str),
+            'freespace_table': self.freespace_table,
+            'observed_table': self.observed_table,
+            'first_row_table': self.first_row_table,
+        }
+
+    def tables_from_arrays(self, arrays):
+        """
+        Set the (street, hour) tables from the arrays of a snapshot.
+        """
+        self.street_names = arrays['street_names'].astype(object)
+        self.street_index = {name: i
+                             for i, name in enumerate(self.street_names)}
+        self.freespace_table = arrays['freespace_table']
+        self.observed_table = arrays['observed_table']
+        self.first_row_table = arrays['first_row_table']
+        self.effective_hour_table = effective_hours(self.observed_table)
+
+
+def fallback_hours(hour):
+    """
+    Return the hours tried for a request at hour, in order.
+    """
+    return tuple((hour + offset) % HOURS_PER_DAY
+                 for offset in FALLBACK_OFFSETS)
+
+
+def effective_hours(observed_table):
+    """
+    Return a (street, hour) table of the first of fallback_hours() at
+    which the street has observations, -1 where none of them has.
+
+    Parameters
+    ----------
+    observed_table: ndarray
+        a (street, hour) table, True where the street has observations at
+        that hour.
+
+    Returns
+    -------
+    ndarray
+        the int8 table of effective hours.
+    """
+    hours = np.arange(HOURS_PER_DAY)
+    table = np.full(observed_table.shape, -1)
+    # the preferred hours are written last, over the others
+    for offset in reversed(FALLBACK_OFFSETS):
+        fallback = (hours + offset) % HOURS_PER_DAY
+        table = np.where(observed_table[:, fallback], fallback, table)
+    return table.astype(np.int8)
+
+
+def frame_to_arrays(df):
+    """
+    Convert the columns of df into numpy arrays that can be stored in a
+    snapshot without pickling.
+
+    Numeric and datetime columns are stored as they are. Text columns are
+    stored as integer codes into a table of their distinct values, with -1
+    for missing values.
+
+    Returns
+    -------
+    dictionary
+        None if a column holds values that can't be stored this way,
+        otherwise a dictionary with the key as array name and value the
+        array.
+    """
+    import pandas as pd
+
+    arrays = {'columns': np.array([str(col) for col in df.columns])}
+    if list(arrays['columns']) != list(df.columns):
+        return None
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if series.dtype.kind in 'biufcM':
+            arrays['values_%d' % i] = series.to_numpy()
+            continue
+        values = series.to_numpy(dtype=object)
+        present = pd.notna(values)
+        if not all(isinstance(value, str) for value in values[present]):
+            return None
+        codes, categories = pd.factorize(values)
+        arrays['codes_%d' % i] = codes.astype(np.int32)
+        arrays['categories_%d' % i] = np.array(list(categories), dtype=str)
+    return arrays
+
+
+def arrays_to_frame(arrays):
+    """
+    Rebuild the DataFrame stored by frame_to_arrays.
+    """
+    import pandas as pd
+
+    data = {}
+    for i, col in enumerate(arrays['columns']):
+        if 'values_%d' % i in arrays:
+            data[str(col)] = arrays['values_%d' % i]
+            continue
+        codes = arrays['codes_%d' % i]
+        categories = arrays['categories_%d' % i].astype(object)
+        values = np.full(len(codes), np.nan, dtype=object)
+        present = codes >= 0
+        values[present] = categories[codes[present]]
+        data[str(col)] = values
+    return pd.DataFrame(data)
@@ -0,0 +1,437 @@
+# Precomputed recommendations of the parking study.
+#
+# A recommendation only depends on the streets within the acceptable
+# distance of the destination and on the hour, so the recommendations of
+# every destination in a small cell of the map, at a standard distance and
+# hour, are known ahead of time, except near the edge of the distance. The
+# tiles store, per (cell, distance, hour), the recommended streets among
+# those within the distance of every point of the cell, and, per (cell,
+# distance), the few streets near the edge, which a lookup measures
+# exactly. A lookup answers the same streets the recommender would, or
+# nothing, and then the request takes the live path.
+#
+# The tiles are built offline, for the current study and street json, with:
+#
+#   python seattlepark/src/recommendation_tiles.py
+#
+# and are ignored once either file changes, until they are built again.
+
+import math
+import os
+import sys
+
+import numpy as np
+
+import snapshot
+from parking_study import (FALLBACK_OFFSETS, HOURS_PER_DAY, ParkingStudy,
+                           fallback_hours)
+from spatial_index import haversine
+from street_geometry import StreetGeometry
+
+# the acceptable distances in miles the tiles are built for
+TILE_RADII = (0.25, 0.5, 1.0)
+
+# the hour of a tile that can't be answered ahead of time
+NOT_TILED = -2
+
+
+class RecommendationTiles:
+    """
+    This class holds the recommendations of the parking study precomputed
+    on a grid of square cells of cell_size degrees over the street
+    mid-points, for each acceptable distance of radii and each hour.
+
+    For a cell and a radius, the streets within radius of every point of
+    the cell are the inner streets, and the streets within radius of some
+    points of the cell only are the band. The tile of a cell, a radius and
+    an hour holds the num_returns recommended streets among the inner
+    streets and the hour of their free spaces; a lookup adds the streets of
+    the band within the distance of the destination and ranks those few
+    streets again.
+
+    Attributes
+    ----------
+    study: Instance of ParkingStudy
+        the Parking Study tables the tiles were built from.
+
+    cell_size: float
+        the width and height of a cell in degrees.
+
+    radii: ndarray
+        the acceptable distances in miles of the tiles.
+
+    num_returns: int
+        the number of streets of each tile.
+
+    study_ids: ndarray
+        the street id in study of each street of the geometry, -1 for the
+        streets not in the study.
+
+    rank_table: ndarray
+        a (street, hour) table of the position of each street of study in
+        the order ParkingRecommender.recommend ranks the streets at that
+        hour, -1 where the street has no observations, see rank_streets().
+
+    tile_rows: ndarray
+        a (cell * radius, hour) table of the row of each tile in
+        row_streets and row_hours, -1 where the tile can't be answered
+        ahead of time.
+
+    row_streets: ndarray
+        the recommended inner streets of each row, in the order of the
+        recommendation, padded with -1 at the start.
+
+    row_hours: ndarray
+        the hour whose free spaces rank the streets of each row, -1 for a
+        cell without inner street.
+
+    band_indptr, band_streets: ndarray
+        the band of each (cell, radius), in compressed sparse row format:
+        the band of cell i at radius j is band_streets[band_indptr[k]:
+        band_indptr[k + 1]], with k = i * len(radii) + j.
+
+    Methods
+    -------
+    build(geometry, study, cell_size, radii, num_returns)
+        Return the tiles of geometry and study.
+
+    load(geometry, study)
+        Return the tiles built for geometry and study, if any.
+
+    save(geometry)
+        Write the tiles next to the study csv file.
+
+    lookup(coordinates, distance, hour, num_returns, cal_distances)
+        Return the recommended streets of a request from the tiles.
+    """
+
+    parameter_names = ('lat_min', 'lon_min', 'cell_size', 'n_rows',
+                       'n_cols', 'num_returns')
+
+    array_names = ('radii', 'study_ids', 'rank_table', 'tile_rows',
+                   'row_streets', 'row_hours', 'band_indptr',
+                   'band_streets')
+
+    def __init__(self, arrays, geometry, study):
+        """
+        Parameters
+        ----------
+        arrays: dictionary, required
+            the arrays of the tiles, as build() returns them.
+
+        geometry: StreetGeometry, required
+            the street locations the tiles were built from.
+
+        study: ParkingStudy, required
+            the Parking Study tables the tiles were built from.
+        """
+        self.study = study
+        self.mid_latitudes = geometry.mid_latitudes
+        self.mid_longitudes = geometry.mid_longitudes
+        self.arrays = arrays
+        for name, value in zip(self.parameter_names, arrays['parameters']):
+            setattr(self, name, value.item())
+        self.n_rows, self.n_cols, self.num_returns = \
+            int(self.n_rows), int(self.n_cols), int(self.num_returns)
+        for name in self.array_names:
+            setattr(self, name, arrays[name])
+
+    def __len__(self):
+        return self.n_rows * self.n_cols
+
+    @classmethod
+    def build(cls, geometry, study, cell_size=0.001, radii=TILE_RADII,
+              num_returns=5):
+        """
+        Return the tiles of geometry and study.
+
+        Parameters
+        ----------
+        geometry: StreetGeometry, required
+            the street locations.
+
+        study: ParkingStudy, required
+            the Parking Study tables.
+
+        cell_size: float, optional
+            the width and height of a cell in degrees.
+
+        radii: tuple, optional
+            the acceptable distances in miles to build the tiles for.
+
+        num_returns: int, optional
+            the number of streets of each tile.
+
+        Returns
+        -------
+        RecommendationTiles
+            the tiles, covering the box of the street mid-points.
+        """
+        latitudes, longitudes = geometry.mid_latitudes, geometry.mid_longitudes
+        radii = np.asarray(radii, dtype=float)
+        study_ids = np.array([study.street_index.get(name, -1)
+                              for name in geometry.street_names],
+                             dtype=np.int32)
+        rank_table = rank_streets(study)
+
+        if len(geometry):
+            lat_min, lon_min = latitudes.min(), longitudes.min()
+            n_rows = int((latitudes.max() - lat_min) // cell_size) + 1
+            n_cols = int((longitudes.max() - lon_min) // cell_size) + 1
+        else:
+            lat_min = lon_min = 0.0
+            n_rows = n_cols = 0
+
+        tiles = np.empty((n_rows * n_cols, len(radii), HOURS_PER_DAY,
+                          num_returns + 1), dtype=np.int32)
+        band_indptr = [0]
+        band_streets = []
+        for cell in range(n_rows * n_cols):
+            row, col = divmod(cell, n_cols)
+            latitude = lat_min + (row + 0.5) * cell_size
+            longitude = lon_min + (col + 0.5) * cell_size
+            if col == 0:
+                # every point of the cells of the row is within half of
+                # their centre, so a street is at most half closer or
+                # further from it; the margin covers the rounding
+                half = haversine(latitude, 0, latitude + np.array(
+                    [-0.5, 0.5]) * cell_size, cell_size / 2).max() + 1e-9
+            distances = haversine(latitude, longitude, latitudes, longitudes)
+            for i, radius in enumerate(radii):
+                inner = np.flatnonzero(distances <= radius - half)
+                band = np.flatnonzero((distances > radius - half) &
+                                      (distances <= radius + half))
+                band_streets.append(band)
+                band_indptr.append(band_indptr[-1] + len(band))
+                tiles[cell, i] = top_streets(inner, study_ids, study,
+                                             rank_table, num_returns)
+
+        # the tiles of neighbouring cells and hours are mostly the same,
+        # each distinct tile is stored once
+        tiles = tiles.reshape(-1, num_returns + 1)
+        order = np.lexsort(tiles.T[::-1])
+        tiles = tiles[order]
+        distinct = np.ones(len(tiles), dtype=bool)
+        distinct[1:] = (tiles[1:] != tiles[:-1]).any(axis=1)
+        rows = tiles[distinct]
+        tiled = rows[:, -1] != NOT_TILED
+        renumber = np.where(tiled, np.cumsum(tiled) - 1, -1)
+        tile_rows = np.empty(len(order), dtype=np.int64)
+        tile_rows[order] = renumber[np.cumsum(distinct) - 1]
+        tile_rows = tile_rows.reshape(-1, HOURS_PER_DAY)
+        rows = rows[tiled]
+
+        n_streets = len(geometry)
+        arrays = {
+            'parameters': np.array([lat_min, lon_min, cell_size, n_rows,
+                                    n_cols, num_returns], dtype=float),
+            'radii': radii,
+            'study_ids': study_ids,
+            'rank_table': rank_table,
+            'tile_rows': tile_rows.astype(index_dtype(len(rows))),
+            'row_streets': rows[:, :-1].astype(index_dtype(n_streets)),
+            'row_hours': rows[:, -1].astype(np.int8),
+            'band_indptr': np.array(band_indptr, dtype=np.int32),
+            'band_streets': np.concatenate(
+                band_streets + [np.arange(0)]).astype(
+                    index_dtype(n_streets)),
+        }
+        return cls(arrays, geometry, study)
+
+    @classmethod
+    def load(cls, geometry, study):
+        """
+        Return the tiles built for geometry and study, None if there are
+        none or they were built for other versions of the files.
+        """
+        # read into memory, not mapped: the shared maps of a snapshot are
+        # named after one source file, and the tiles depend on two
+        arrays = snapshot.load_snapshot(study.study_path,
+                                        tiles_path(study.study_path))
+        if arrays is None or any(name not in arrays for name in
+                                 cls.array_names + ('geometry_sha1',)):
+            return None
+        try:
+            digest = snapshot.file_digest(geometry.json_path)
+        except OSError:
+            return None
+        if str(arrays.pop('geometry_sha1')) != digest:
+            return None
+        return cls(arrays, geometry, study)
+
+    def save(self, geometry):
+        """
+        Write the tiles next to the study csv file, for the street json of
+        geometry, and return whether they were written.
+        """
+        arrays = dict(self.arrays)
+        arrays['geometry_sha1'] = np.array(
+            snapshot.file_digest(geometry.json_path))
+        return snapshot.save_snapshot(self.study.study_path, arrays,
+                                      tiles_path(self.study.study_path))
+
+    def lookup(self, coordinates, distance, hour, num_returns=5,
+               cal_distances=haversine):
+        """
+        Return the streets ParkingRecommender recommends within distance of
+        coordinates at hour, from the tiles.
+
+        Parameters
+        ----------
+        coordinates: list, required
+            a list of the latitude and longitude of the destination.
+
+        distance: float, required
+            the acceptable walking distance in miles.
+
+        hour: int, required
+            the hour the parking is wanted.
+
+        num_returns: int, optional
+            the number of recommended streets.
+
+        cal_distances: function, optional
+            measures the distance from coordinates to the given latitudes
+            and longitudes, the way the live path does.
+
+        Returns
+        -------
+        Tuple
+            None if the tiles can't answer the request: a distance or a
+            location the tiles don't cover, or a recommendation that falls
+            back to the closest streets. Otherwise the positions of the
+            recommended streets in the geometry, in the order of the
+            recommendation, and the free spaces of each, both empty when no
+            street is within distance.
+        """
+        radius = np.flatnonzero(self.radii == distance)
+        if len(radius) == 0 or num_returns > self.num_returns:
+            return None
+        try:
+            latitude, longitude = (float(c) for c in coordinates)
+            row = math.floor((latitude - self.lat_min) / self.cell_size)
+            col = math.floor((longitude - self.lon_min) / self.cell_size)
+        except (TypeError, ValueError, OverflowError):
+            return None
+        if not (0 <= row < self.n_rows and 0 <= col < self.n_cols):
+            return None
+
+        key = (row * self.n_cols + col) * len(self.radii) + radius[0]
+        tile = self.tile_rows[key, hour]
+        if tile < 0:
+            return None
+        streets = self.row_streets[tile]
+        streets = streets[streets >= 0]
+        tile_hour = self.row_hours[tile]
+        band = self.band_streets[
+            self.band_indptr[key]:self.band_indptr[key + 1]]
+        if len(band):
+            band = band[cal_distances(
+                coordinates, self.mid_latitudes[band],
+                self.mid_longitudes[band]) <= distance]
+        if (self.study_ids[band] < 0).any():
+            return None
+
+        # the hour the recommender falls back to, over the inner streets
+        # and the band together
+        effective = self.study.effective_hour_table[self.study_ids[band],
+                                                    hour]
+        found = next((candidate for candidate in fallback_hours(hour)
+                      if candidate == tile_hour or
+                      (effective == candidate).any()), None)
+        if found is None:
+            if len(streets) or len(band):
+                return None
+            return streets, np.zeros(0)
+        if found != tile_hour:
+            # no inner street has observations at an hour tried before its
+            # own
+            streets = streets[:0]
+
+        candidates = np.concatenate([streets, band]).astype(np.int64)
+        study_ids = self.study_ids[candidates]
+        keys = self.rank_table[study_ids, found]
+        order = np.argsort(keys)
+        order = order[keys[order] >= 0][-num_returns:]
+        return candidates[order], \
+            self.study.freespace_table[study_ids[order], found]
+
+
+def rank_streets(study):
+    """
+    Return a (street, hour) table of the position of each street in the
+    order ParkingRecommender.recommend ranks the streets at that hour: by
+    free spaces, NaN last, ties in the order the streets appear in the
+    dataset. -1 where the street has no observations at that hour.
+    """
+    table = np.full(study.freespace_table.shape, -1,
+                    dtype=index_dtype(len(study.street_names)))
+    for hour in range(HOURS_PER_DAY):
+        observed = np.flatnonzero(study.observed_table[:, hour])
+        free_spaces = study.freespace_table[observed, hour]
+        missing = np.isnan(free_spaces)
+        order = np.lexsort((study.first_row_table[observed, hour],
+                            np.where(missing, 0, free_spaces), missing))
+        table[observed[order], hour] = np.arange(len(observed))
+    return table
+
+
+def top_streets(street_ids, study_ids, study, rank_table, num_returns):
+    """
+    Return the tile of each hour of the given streets: the num_returns
+    streets the recommender recommends among them, padded with -1 at the
+    start, followed by the hour of their free spaces, -1 if there is no
+    street and NOT_TILED if the recommender would fall back to the closest
+    streets.
+    """
+    tiles = np.full((HOURS_PER_DAY, num_returns + 1), -1, dtype=np.int32)
+    if len(street_ids) == 0:
+        return tiles
+    study_ids = study_ids[street_ids]
+    if (study_ids < 0).any():
+        # InvalidStreetError
+        tiles[:, -1] = NOT_TILED
+        return tiles
+
+    # the first fallback hour of any street, as ParkingRecommender.find_hour
+    effective = study.effective_hour_table[study_ids]
+    hours = np.full(HOURS_PER_DAY, NOT_TILED)
+    for offset in reversed(FALLBACK_OFFSETS):
+        fallback = (np.arange(HOURS_PER_DAY) + offset) % HOURS_PER_DAY
+        hours = np.where((effective == fallback).any(axis=0), fallback,
+                         hours)
+
+    keys = rank_table[study_ids[:, np.newaxis], np.maximum(hours, 0)]
+    top = np.argsort(keys, axis=0)[-num_returns:]
+    chosen = np.where(np.take_along_axis(keys, top, axis=0) >= 0,
+                      street_ids[top], -1)
+    tiles[:, num_returns - len(top):num_returns] = chosen.T
+    tiles[:, -1] = hours
+    return tiles
+
+
+def index_dtype(n):
+    """
+    Return the smallest signed integer type holding -1 and every index
+    below n.
+    """
+    return np.int16 if n < np.iinfo(np.int16).max else np.int32
+
+
+def tiles_path(study_path):
+    """
+    Return the location of the tiles of the study csv file at study_path.
+    """
+    return os.path.splitext(study_path)[0] + '.tiles.npz'
+
+
+if __name__ == '__main__':
+    # the study csv and the json file to build the tiles of, the shipped
+    # ones by default
+    study = ParkingStudy(*sys.argv[1:2])
+    streets = StreetGeometry(*sys.argv[2:3])
+    tiles = RecommendationTiles.build(streets, study)
+    tiles.save(streets)
+    print('%d cells of %g degrees, %d distinct tiles, written to %s' % (
+        len(tiles), tiles.cell_size, len(tiles.row_hours),
+        tiles_path(study.study_path)))
@@ -0,0 +1,128 @@
+import datetime
+import time
+
+from geocode_cache import normalize_address
+from lru_cache import LRUCache
+
+
+class ResponseCache:
+    """
+    This class caches the recommendations of recent requests.
+
+    Recommendations only depend on the destination, the acceptable distance
+    and the hour of the request, so a response is kept under the normalized
+    destination, the distance and the hour, until the end of that hour.
+    Requests typing the destination differently share a response, which
+    therefore holds nothing derived from the destination text.
+
+    Attributes
+    ----------
+    memory: Instance of LRUCache
+        the cached responses.
+
+    clock: function
+        returns the current time in seconds.
+
+    Methods
+    -------
+    key(destination, accept_distance)
+        Return the cache key of a request at the current time.
+
+    get(destination, accept_distance)
+        Return the cached response of a request, or None.
+
+    put(destination, accept_distance, response)
+        Cache the response of a request until the end of the hour.
+
+    clear()
+        Remove every response.
+
+    stats()
+        Return the hit and miss counters and the hit ratio of the cache.
+    """
+
+    def __init__(self, max_size=1024, clock=time.time):
+        """
+        Parameters
+        ----------
+        max_size: int, optional
+            the number of responses kept, 0 turns the cache off.
+
+        clock: function, optional
+            returns the current time in seconds, replaceable in tests.
+        """
+        self.clock = clock
+        self.memory = LRUCache(max_size, None, clock)
+
+    def hour(self):
+        """
+        Return the start of the current hour, in local time like the
+        datetime of the recommendations.
+        """
+        return datetime.datetime.fromtimestamp(self.clock()).replace(
+            minute=0, second=0, microsecond=0)
+
+    def key(self, destination, accept_distance, hour=None):
+        """
+        Return the cache key of a request, None if the distance is not a
+        number.
+        """
+        try:
+            distance = float(accept_distance)
+        except (TypeError, ValueError):
+            return None
+        hour = hour or self.hour()
+        return normalize_address(destination), distance, hour.hour
+
+    def get(self, destination, accept_distance):
+        """
+        Return the cached response of a request.
+
+        Parameters
+        ----------
+        destination: str, required
+            the destination address as the user typed it.
+
+        accept_distance: str or float, required
+            the acceptable walking distance.
+
+        Returns
+        -------
+        object
+            None if the request is not cached, otherwise the response.
+        """
+        key = self.key(destination, accept_distance)
+        if key is None:
+            return None
+        return self.memory.get(key)
+
+    def put(self, destination, accept_distance, response):
+        """
+        Cache the response of a request until the end of the current hour.
+        """
+        hour = self.hour()
+        key = self.key(destination, accept_distance, hour)
+        if key is not None:
+            expires_at = (hour + datetime.timedelta(hours=1)).timestamp()
+            self.memory.put(key, response, expires_at)
+
+    def clear(self):
+        """
+        Remove every response.
+        """
+        self.memory.clear()
+
+    def stats(self):
+        """
+        Return the hit and miss counters of the cache.
+
+        Returns
+        -------
+        dictionary
+            the number of hits and misses, the number of responses held and
+            the share of lookups answered from the cache.
+        """
+        stats = self.memory.stats()
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
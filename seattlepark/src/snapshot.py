@@ -0,0 +1,234 @@
+# Binary snapshots of the source data files.
+#
+# Parsing the csv and json resources is the slowest part of starting the
+# app. A snapshot stores the parsed data as numpy arrays in an .npz file
+# next to its source file, together with the size, modification time and
+# sha1 of the source it was built from. load_snapshot only returns the
+# arrays while they still describe the source file, so editing or
+# replacing the source rebuilds the snapshot on next start.
+#
+# The arrays can also be loaded as read-only memory maps of .npy files,
+# extracted once per snapshot into a directory named after the snapshot
+# version and the sha1 of the .npz file, so a snapshot rebuilt from the
+# same source, for example with other parameters, gets new maps. Every
+# process that maps them, forked or not, then shares one copy of the
+# arrays in the page cache instead of holding its own.
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+
+
+def snapshot_path(source_path):
+    """
+    Return the location of the snapshot of source_path.
+    """
+    return os.path.splitext(source_path)[0] + '.npz'
+
+
+def shared_path(path):
+    """
+    Return the directory of the memory mapped arrays of the snapshot at
+    path.
+    """
+    return os.path.splitext(path)[0] + '.arrays'
+
+
+def file_digest(path):
+    """
+    Return the sha1 hex digest of the file at path.
+    """
+    with open(path, 'rb') as handle:
+        return _handle_digest(handle)
+
+
+def _handle_digest(handle):
+    digest = hashlib.sha1()
+    for chunk in iter(lambda: handle.read(1 << 20), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_snapshot(source_path, path=None, mmap=False):
+    """
+    Return the arrays stored in the snapshot of source_path.
+
+    Parameters
+    ----------
+    source_path: str, required
+        the location of the source file.
+
+    path: str, optional
+        the location of the snapshot, defaults to snapshot_path().
+
+    mmap: bool, optional
+        whether to return read-only memory maps shared with the other
+        processes, see map_arrays(). The arrays are read into memory
+        instead when the maps can't be written.
+
+    Returns
+    -------
+    dictionary
+        None if there is no usable snapshot, otherwise a dictionary with
+        the key as array name and value the stored array.
+    """
+    path = path or snapshot_path(source_path)
+    try:
+        stat = os.stat(source_path)
+        with open(path, 'rb') as handle:
+            # named from the file that is read, not the one at path by the
+            # time the maps are written
+            name = mapped_name(handle) if mmap else None
+            handle.seek(0)
+            with np.load(handle, allow_pickle=False) as stored:
+                metadata = {key: stored[key] for key in stored.files
+                            if key.startswith('__')}
+                if metadata.get('__version__') != SNAPSHOT_VERSION:
+                    return None
+                digest = str(metadata['__sha1__'])
+                touched = metadata['__mtime__'] != stat.st_mtime_ns or \
+                    metadata['__size__'] != stat.st_size
+                # the file was touched, it only needs rebuilding if its
+                # content changed
+                if touched and digest != file_digest(source_path):
+                    return None
+
+                keys = [key for key in stored.files
+                        if not key.startswith('__')]
+                arrays = None
+                if mmap and not touched:
+                    arrays = map_arrays(path, name, stored, keys)
+                if arrays is None:
+                    arrays = {key: stored[key] for key in keys}
+    except (OSError, ValueError):
+        return None
+
+    if touched:
+        save_snapshot(source_path, arrays, path)
+    return arrays
+
+
+def mapped_name(handle):
+    """
+    Return the name of the directory of the memory mapped arrays of the
+    snapshot open in handle: the snapshot version and the sha1 of the
+    snapshot file.
+    """
+    return '%d-%s' % (SNAPSHOT_VERSION, _handle_digest(handle))
+
+
+def map_arrays(path, name, stored, keys):
+    """
+    Return the arrays of the snapshot at path as read-only memory maps.
+
+    Each array is a .npy file in the directory name, see mapped_name(), of
+    shared_path(path), written the first time a process maps that
+    snapshot. The directories of other snapshots are removed; processes
+    still mapping their files keep reading them.
+
+    Returns
+    -------
+    dictionary
+        None if the files can't be written, otherwise a dictionary with the
+        key as array name and value the mapped array.
+    """
+    root = shared_path(path)
+    directory = os.path.join(root, name)
+    arrays = {}
+    try:
+        for key in keys:
+            array_path = os.path.join(directory, key + '.npy')
+            if not os.path.exists(array_path):
+                os.makedirs(directory, exist_ok=True)
+                _save_array(array_path, stored[key])
+            try:
+                # a plain ndarray view, the memmap subclass would leak into
+                # every result computed from the array
+                arrays[key] = np.asarray(np.load(
+                    array_path, mmap_mode='r', allow_pickle=False))
+            except ValueError:
+                # some numpy versions can't map an empty array
+                arrays[key] = stored[key]
+    except OSError:
+        return None
+
+    for other in os.listdir(root):
+        if other != name:
+            shutil.rmtree(os.path.join(root, other), ignore_errors=True)
+    return arrays
+
+
+def _umask_mode(path):
+    # mkstemp creates files only the owner can read, give them the mode a
+    # plain open() would before they replace the public name
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(path, 0o666 & ~umask)
+
+
+def _save_array(path, array):
+    # written under a temporary name, a reader never maps a partial file
+    handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                        suffix='.npy')
+    try:
+        with os.fdopen(handle, 'wb') as tmp:
+            np.save(tmp, array, allow_pickle=False)
+        _umask_mode(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def save_snapshot(source_path, arrays, path=None):
+    """
+    Write arrays to the snapshot of source_path.
+
+    The snapshot is written to a temporary file first and then renamed, so
+    a reader never sees a partially written snapshot. Failing to write it,
+    for example in a read-only install, is not an error.
+
+    Parameters
+    ----------
+    source_path: str, required
+        the location of the source file.
+
+    arrays: dictionary, required
+        a dictionary with the key as array name and value a numpy array
+        that can be stored without pickling.
+
+    path: str, optional
+        the location of the snapshot, defaults to snapshot_path().
+
+    Returns
+    -------
+    bool
+        True if the snapshot was written.
+    """
+    path = path or snapshot_path(source_path)
+    try:
+        stat = os.stat(source_path)
+        metadata = {
+            '__version__': np.array(SNAPSHOT_VERSION),
+            '__mtime__': np.array(stat.st_mtime_ns),
+            '__size__': np.array(stat.st_size),
+            '__sha1__': np.array(file_digest(source_path)),
+        }
+        handle, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(path)), suffix='.npz')
+        try:
+            with os.fdopen(handle, 'wb') as tmp:
+                np.savez(tmp, **arrays, **metadata)
+            _umask_mode(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except (OSError, ValueError):
+        return False
+    return True
@@ -0,0 +1,163 @@
+import math
+
+import numpy as np
+
+# Mean earth radius in miles, the same radius haversine uses for unit="mi"
+EARTH_RADIUS_MI = 6371.0088 * 0.621371192
+
+# The latitude of the equirectangular projection of the street segments.
+# Over the few miles of a request in Seattle, distances on it are within
+# 0.1% of the haversine distances
+SEATTLE_LATITUDE = 47.62
+
+
+class GridIndex:
+    """
+    This class is a uniform grid index over latitude/longitude points, used
+    to find the points that may lie within a distance of a location without
+    measuring the distance to every point.
+
+    The points are bucketed into square cells of cell_size degrees and
+    sorted by cell, row by row, so the cells of one grid row that overlap a
+    query are a single contiguous slice of the sorted points.
+
+    Attributes
+    ----------
+    latitudes: ndarray
+        the latitude of each indexed point.
+
+    longitudes: ndarray
+        the longitude of each indexed point.
+
+    cell_size: float
+        the width and height of a cell in degrees.
+
+    Methods
+    -------
+    query(coordinates, distance)
+        Return the indices of the points that may be within distance miles
+        of coordinates.
+    """
+
+    def __init__(self, latitudes, longitudes, cell_size=0.005):
+        """
+        Parameters
+        ----------
+        latitudes: ndarray, required
+            the latitude of each point.
+
+        longitudes: ndarray, required
+            the longitude of each point.
+
+        cell_size: float, optional
+            the width and height of a cell in degrees.
+        """
+        self.latitudes = np.asarray(latitudes, dtype=float)
+        self.longitudes = np.asarray(longitudes, dtype=float)
+        self.cell_size = cell_size
+
+        n = len(self.latitudes)
+        if n == 0:
+            self.lat_min = self.lon_min = 0.0
+        else:
+            self.lat_min = self.latitudes.min()
+            self.lon_min = self.longitudes.min()
+        rows = self._cells(self.latitudes, self.lat_min)
+        cols = self._cells(self.longitudes, self.lon_min)
+        self.n_rows = int(rows.max()) + 1 if n else 0
+        self.n_cols = int(cols.max()) + 1 if n else 0
+
+        cell_ids = rows * self.n_cols + cols
+        # points sorted by cell, and where each cell starts in that order
+        self.order = np.argsort(cell_ids, kind='stable')
+        self.cell_starts = np.searchsorted(
+            cell_ids[self.order], np.arange(self.n_rows * self.n_cols + 1))
+
+    def _cells(self, values, minimum):
+        return np.floor((values - minimum) / self.cell_size).astype(np.int64)
+
+    def query(self, coordinates, distance):
+        """
+        Return the indices of the points that may be within distance miles
+        of coordinates.
+
+        The result contains every point whose haversine distance to
+        coordinates is at most distance, and may contain points slightly
+        further away, so callers still measure the candidates exactly.
+
+        Parameters
+        ----------
+        coordinates: list, required
+            a list of latitude and longitude.
+
+        distance: float, required
+            the search radius in miles.
+
+        Returns
+        -------
+        ndarray
+            the sorted indices of the candidate points. Every index when
+            coordinates is not a valid location, so that the exact
+            distance decides, and none for a negative distance.
+        """
+        n = len(self.order)
+        try:
+            lat, lon = (float(c) for c in coordinates)
+            lat_rad = math.radians(lat)
+        except (TypeError, ValueError):
+            return np.arange(n)
+        if not distance >= 0:
+            return np.arange(0)
+
+        angle = distance / EARTH_RADIUS_MI
+        if not math.isfinite(lat_rad + lon + angle) or \
+                angle + abs(lat_rad) >= math.pi / 2:
+            # the circle reaches a pole, every longitude may be within it
+            return np.arange(n)
+
+        # latitude/longitude bounding box of the circle on the sphere
+        d_lat = math.degrees(angle)
+        d_lon = math.degrees(
+            math.asin(min(1.0, math.sin(angle) / math.cos(lat_rad))))
+        if abs(lon) + d_lon >= 180:
+            # the box wraps around the antimeridian
+            return np.arange(n)
+        row_lo, row_hi = self._cell_range(lat, d_lat, self.lat_min,
+                                          self.n_rows)
+        col_lo, col_hi = self._cell_range(lon, d_lon, self.lon_min,
+                                          self.n_cols)
+        if row_lo > row_hi or col_lo > col_hi:
+            return np.arange(0)
+        if row_lo == 0 and col_lo == 0 and \
+                row_hi == self.n_rows - 1 and col_hi == self.n_cols - 1:
+            return np.arange(n)
+
+        # the overlapping cells of each row are contiguous in self.order
+        row_starts = np.arange(row_lo, row_hi + 1) * self.n_cols
+        starts = self.cell_starts[row_starts + col_lo]
+        ends = self.cell_starts[row_starts + col_hi + 1]
+        candidates = np.concatenate(
+            [self.order[start:end] for start, end in zip(starts, ends)])
+        candidates.sort()
+        return candidates
+
+    def _cell_range(self, center, half_width, minimum, n_cells):
+        # widen by a tiny margin so rounding never drops a boundary point
+        margin = half_width * 1e-9 + 1e-12
+        lo = math.floor((center - half_width - margin - minimum) /
+                        self.cell_size)
+        hi = math.floor((center + half_width + margin - minimum) /
+                        self.cell_size)
+        return max(lo, 0), min(hi, n_cells - 1)
+
+
+def haversine(latitude, longitude, latitudes, longitudes):
+    """
+    Return the haversine distance in miles between the points given by
+    latitude and longitude and the points given by latitudes and longitudes.
+    """
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(latitudes)
+    d = np.sin((lat2 - lat1) * 0.5) ** 2 + np.cos(lat1) * np.cos(lat2) * \
+        np.sin(np.radians(np.subtract(longitudes, longitude)) * 0.5) ** 2
+    return 2 * EARTH_RADIUS_MI * np.arcsin(np.sqrt(d))
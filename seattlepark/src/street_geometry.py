@@ -0,0 +1,156 @@
+import json
+import os
+
+import numpy as np
+
+import snapshot
+
+
+class StreetGeometry:
+    """
+    This class holds the location of every street of the street dataset as
+    contiguous arrays, one entry per street.
+
+    The json file is parsed once and the arrays are written to a binary
+    snapshot next to it, so later processes map them from the snapshot
+    instead of parsing the json file, until the file changes.
+
+    Attributes
+    ----------
+    json_path: str
+        the location of the Midpoints_and_LineCoords json file.
+
+    street_names: ndarray
+        the street name (UNITDESC) of each street, in the order of the json
+        file.
+
+    start_latitudes: ndarray
+        the latitude of the start of each street.
+
+    start_longitudes: ndarray
+        the longitude of the start of each street.
+
+    end_latitudes: ndarray
+        the latitude of the end of each street.
+
+    end_longitudes: ndarray
+        the longitude of the end of each street.
+
+    mid_latitudes: ndarray
+        the latitude of the middle point of each street.
+
+    mid_longitudes: ndarray
+        the longitude of the middle point of each street.
+
+    coordinates: ndarray
+        a (6, street) array holding the arrays above, one row per field.
+
+    Methods
+    -------
+    line_coordinates()
+        Return the coordinates of the start and end of every street.
+
+    to_mapping()
+        Return the streets as the coordinates_mapping of CoordinatesUtil.
+    """
+
+    default_path = os.path.join(os.path.dirname(__file__),
+                                'resources/Midpoints_and_LineCoords.json')
+
+    fields = ('start_latitudes', 'start_longitudes', 'end_latitudes',
+              'end_longitudes', 'mid_latitudes', 'mid_longitudes')
+
+    def __init__(self, json_path=None, use_snapshot=True):
+        """
+        Parameters
+        ----------
+        json_path: str, optional
+            the location of the json file, defaults to the file shipped in
+            the resources folder.
+
+        use_snapshot: bool, optional
+            whether to load and write the binary snapshot of the json file.
+        """
+        self.json_path = json_path or self.default_path
+
+        arrays = None
+        if use_snapshot:
+            arrays = snapshot.load_snapshot(self.json_path, mmap=True)
+        if arrays is None:
+            arrays = self.read_json(self.json_path)
+            if use_snapshot:
+                snapshot.save_snapshot(self.json_path, arrays)
+
+        self.street_names = arrays['street_names'].astype(object)
+        # one contiguous row per field
+        self.coordinates = arrays['coordinates']
+        for i, field in enumerate(self.fields):
+            setattr(self, field, self.coordinates[i])
+
+    def __len__(self):
+        return len(self.street_names)
+
+    @classmethod
+    def read_json(cls, json_path):
+        """
+        Parse the json file into a name table and a (6, street) array of
+        the start, end and middle point of every street, in the order of
+        fields.
+        """
+        with open(json_path) as json_data:
+            features = json.load(json_data)["features"]
+
+        streets = {}
+        for feature in features:
+            coordinates = feature["geometry"]["coordinates"]
+            mid_point = feature["geometry"]["midpoint"]
+            # a repeated street keeps its first position and last location
+            streets[feature["properties"]["UNITDESC"]] = (
+                coordinates[0][1], coordinates[0][0],
+                coordinates[1][1], coordinates[1][0],
+                mid_point[1], mid_point[0])
+
+        return {
+            'street_names': np.array(list(streets), dtype=str),
+            'coordinates': np.ascontiguousarray(
+                np.array(list(streets.values()), dtype=float).reshape(
+                    -1, len(cls.fields)).T),
+        }
+
+    def line_coordinates(self):
+        """
+        Return a (street, 2, 2) array of the latitudes and the longitudes of
+        the start and end of every street.
+        """
+        coordinates = self.coordinates
+        if coordinates.strides[0] == len(self) * coordinates.strides[1]:
+            # a view of the start and end rows of coordinates, in the order
+            # of fields: [i, j, k] is row j + 2 * k, column i
+            row, column = coordinates.strides
+            return np.lib.stride_tricks.as_strided(
+                coordinates, shape=(len(self), 2, 2),
+                strides=(column, row, 2 * row), writeable=False)
+        return np.stack([
+            np.stack([self.start_latitudes, self.end_latitudes], axis=1),
+            np.stack([self.start_longitudes, self.end_longitudes], axis=1),
+        ], axis=1)
+
+    def to_mapping(self):
+        """
+        Return the streets as the coordinates_mapping of CoordinatesUtil.
+
+        Returns
+        -------
+        dictionary
+            a dictionary with the key as street name, and value is a list of
+            1) a list of coordinates of start and end of a street
+            2) mid-point of a street
+        """
+        rows = zip(self.street_names, self.start_latitudes.tolist(),
+                   self.start_longitudes.tolist(),
+                   self.end_latitudes.tolist(), self.end_longitudes.tolist(),
+                   self.mid_latitudes.tolist(), self.mid_longitudes.tolist())
+        return {name: [[[lat_start, lat_end], [lon_start, lon_end]],
+                       [lat_mid, lon_mid]]
+                for name, lat_start, lon_start, lat_end, lon_end, lat_mid,
+                lon_mid in rows}
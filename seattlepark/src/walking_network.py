@@ -0,0 +1,346 @@
+# The walking network of the street dataset.
+#
+# The straight-line distance to a street ignores what lies in between, so a
+# street across a freeway or the water looks as close as one across the
+# road. The walking network joins the streets at their shared endpoints,
+# the intersections, and measures distances along the streets instead.
+#
+# The shortest paths between every pair of intersections within radius
+# miles of each other are computed once, when the network is built, and
+# stored in a snapshot next to the json file. A query then only combines
+# the precomputed paths of the few intersections around the destination.
+#
+# Build the network ahead of time with:
+#
+#   python seattlepark/src/walking_network.py
+
+import heapq
+import os
+import sys
+
+import numpy as np
+
+import snapshot
+from spatial_index import GridIndex, haversine
+from street_geometry import StreetGeometry
+
+# endpoints closer than this many decimal degrees (about 0.1m) are the same
+# intersection
+NODE_DECIMALS = 6
+
+
+class WalkingNetwork:
+    """
+    This class is the walking network of the street dataset: a graph whose
+    nodes are the street endpoints, shared endpoints being one node, and
+    whose edges are the streets, and the index of the shortest paths of at
+    most radius miles between its nodes.
+
+    The streets of the dataset don't cover every walkway, so nodes within
+    link_distance miles of each other are also joined, in a straight line.
+    This crosses a road between two block faces, but not a freeway or the
+    water between two neighbourhoods.
+
+    Attributes
+    ----------
+    radius: float
+        the longest path, in miles, in the shortest path index. Queries of
+        a longer distance are not answered.
+
+    link_distance: float
+        the distance in miles under which two nodes are joined in a
+        straight line.
+
+    access_distance: float
+        the distance in miles the destination can be from a node, or from
+        the mid-point of a street, to walk to it directly.
+
+    access_nodes: int
+        the number of nodes, the nearest ones, the destination walks to
+        directly.
+
+    node_latitudes: ndarray
+        the latitude of each node.
+
+    node_longitudes: ndarray
+        the longitude of each node.
+
+    start_nodes: ndarray
+        the node of the start of each street of the geometry.
+
+    end_nodes: ndarray
+        the node of the end of each street of the geometry.
+
+    half_lengths: ndarray
+        half the length of each street, from an endpoint to its mid-point.
+
+    indptr, indices, distances: ndarray
+        the shortest path index, in compressed sparse row format: the nodes
+        within radius of node i are indices[indptr[i]:indptr[i + 1]], at the
+        distances of the same slice of distances.
+
+    Methods
+    -------
+    build(geometry, radius, link_distance)
+        Return the arrays of the network of geometry.
+
+    node_distances(coordinates)
+        Return the walking distance from coordinates to every node.
+
+    walking_distances(coordinates, street_ids, straight_distances,
+                      distance)
+        Return the walking distance from coordinates to the mid-point of
+        the given streets.
+    """
+
+    def __init__(self, geometry=None, radius=1.0, link_distance=0.07,
+                 access_distance=0.1, access_nodes=4, use_snapshot=True):
+        """
+        Parameters
+        ----------
+        geometry: StreetGeometry, optional
+            the streets of the network, defaults to the file shipped in the
+            resources folder.
+
+        radius: float, optional
+            the longest path in the shortest path index, in miles.
+
+        link_distance: float, optional
+            the distance under which two nodes are joined, in miles.
+
+        access_distance: float, optional
+            the distance from the destination to the nodes and streets it
+            reaches directly, in miles.
+
+        access_nodes: int, optional
+            the number of nodes the destination walks to directly.
+
+        use_snapshot: bool, optional
+            whether to load and write the snapshot of the network.
+        """
+        geometry = geometry if geometry is not None else StreetGeometry()
+        self.radius = radius
+        self.link_distance = link_distance
+        self.access_distance = access_distance
+        self.access_nodes = access_nodes
+
+        parameters = np.array([radius, link_distance])
+        path = network_path(geometry.json_path)
+        arrays = None
+        if use_snapshot:
+            arrays = snapshot.load_snapshot(geometry.json_path, path,
+                                            mmap=True)
+            if arrays is not None and not np.array_equal(
+                    arrays.get('parameters'), parameters):
+                arrays = None
+        if arrays is None:
+            arrays = self.build(geometry, radius, link_distance)
+            arrays['parameters'] = parameters
+            if use_snapshot:
+                snapshot.save_snapshot(geometry.json_path, arrays, path)
+
+        for name in ('node_latitudes', 'node_longitudes', 'start_nodes',
+                     'end_nodes', 'half_lengths', 'indptr', 'indices',
+                     'distances'):
+            setattr(self, name, arrays[name])
+        self.node_index = GridIndex(self.node_latitudes, self.node_longitudes)
+
+    def __len__(self):
+        return len(self.node_latitudes)
+
+    @classmethod
+    def build(cls, geometry, radius=1.0, link_distance=0.07):
+        """
+        Return the arrays of the walking network of geometry and of its
+        shortest path index.
+        """
+        n_streets = len(geometry)
+        points = np.concatenate([
+            np.stack([geometry.start_latitudes, geometry.start_longitudes],
+                     axis=1),
+            np.stack([geometry.end_latitudes, geometry.end_longitudes],
+                     axis=1),
+        ])
+        nodes, node_ids = np.unique(np.round(points, NODE_DECIMALS), axis=0,
+                                    return_inverse=True)
+        node_ids = node_ids.reshape(-1)
+        latitudes, longitudes = nodes[:, 0], nodes[:, 1]
+        start_nodes = node_ids[:n_streets]
+        end_nodes = node_ids[n_streets:]
+        lengths = haversine(geometry.start_latitudes,
+                            geometry.start_longitudes,
+                            geometry.end_latitudes, geometry.end_longitudes)
+
+        neighbours = [{} for _ in range(len(nodes))]
+
+        def join(node1, node2, length):
+            if node1 != node2 and length < neighbours[node1].get(
+                    node2, np.inf):
+                neighbours[node1][node2] = neighbours[node2][node1] = length
+
+        for node1, node2, length in zip(start_nodes.tolist(),
+                                        end_nodes.tolist(), lengths.tolist()):
+            join(node1, node2, length)
+        index = GridIndex(latitudes, longitudes)
+        for node in range(len(nodes)):
+            near = index.query((latitudes[node], longitudes[node]),
+                               link_distance)
+            gaps = haversine(latitudes[node], longitudes[node],
+                             latitudes[near], longitudes[near])
+            for other, gap in zip(near.tolist(), gaps.tolist()):
+                if gap <= link_distance:
+                    join(node, other, gap)
+
+        indptr = [0]
+        indices = []
+        distances = []
+        for node in range(len(nodes)):
+            reached = shortest_paths(neighbours, node, radius)
+            indices.extend(reached)
+            distances.extend(reached.values())
+            indptr.append(len(indices))
+
+        return {
+            'node_latitudes': latitudes,
+            'node_longitudes': longitudes,
+            'start_nodes': start_nodes.astype(np.int32),
+            'end_nodes': end_nodes.astype(np.int32),
+            'half_lengths': lengths / 2,
+            'indptr': np.array(indptr, dtype=np.int64),
+            'indices': np.array(indices, dtype=np.int32),
+            'distances': np.array(distances, dtype=np.float32),
+        }
+
+    def node_distances(self, coordinates):
+        """
+        Return the walking distance from coordinates to every node, through
+        the access_nodes nearest nodes within access_distance of
+        coordinates, or through the nearest node if there is none.
+
+        Parameters
+        ----------
+        coordinates: list, required
+            a list of the latitude and longitude of the destination.
+
+        Returns
+        -------
+        ndarray
+            the distance in miles to each node, inf for the nodes further
+            than radius from the nodes around coordinates.
+        """
+        latitude, longitude = coordinates
+        near = self.node_index.query(coordinates, self.access_distance)
+        access = haversine(latitude, longitude, self.node_latitudes[near],
+                           self.node_longitudes[near])
+        # the paths through the few nearest nodes are the shortest ones
+        # almost always, and combining fewer rows is what keeps a query fast
+        nearest = np.argsort(access)[:self.access_nodes]
+        nearest = nearest[access[nearest] <= self.access_distance]
+        near, access = near[nearest], access[nearest]
+        if len(near) == 0:
+            access = haversine(latitude, longitude, self.node_latitudes,
+                               self.node_longitudes)
+            near = np.argmin(access)[np.newaxis]
+            access = access[near]
+
+        distances = np.full(len(self), np.inf)
+        for node, gap in zip(near, access):
+            start, end = self.indptr[node], self.indptr[node + 1]
+            reached = self.indices[start:end]
+            distances[reached] = np.minimum(distances[reached],
+                                            gap + self.distances[start:end])
+        return distances
+
+    def walking_distances(self, coordinates, street_ids, straight_distances,
+                          distance):
+        """
+        Return the walking distance from coordinates to the mid-point of
+        the given streets.
+
+        Parameters
+        ----------
+        coordinates: list, required
+            a list of the latitude and longitude of the destination.
+
+        street_ids: ndarray, required
+            the positions of the streets in the geometry.
+
+        straight_distances: ndarray, required
+            the straight-line distance from coordinates to the mid-point of
+            each of the streets.
+
+        distance: float, required
+            the acceptable walking distance in miles.
+
+        Returns
+        -------
+        ndarray
+            None if distance is longer than radius, otherwise the walking
+            distance to each street in miles, inf for a street that can't
+            be reached within radius.
+        """
+        if distance > self.radius:
+            return None
+        nodes = self.node_distances(coordinates)
+        walking = np.minimum(nodes[self.start_nodes[street_ids]],
+                             nodes[self.end_nodes[street_ids]]) + \
+            self.half_lengths[street_ids]
+        # a street next to the destination is reached directly, and no
+        # street is closer than in a straight line
+        straight_distances = np.asarray(straight_distances, dtype=float)
+        walking = np.maximum(walking, straight_distances)
+        return np.where(straight_distances <= self.access_distance,
+                        straight_distances, walking)
+
+
+def network_path(json_path):
+    """
+    Return the location of the snapshot of the walking network of the json
+    file at json_path.
+    """
+    return os.path.splitext(json_path)[0] + '.network.npz'
+
+
+def shortest_paths(neighbours, source, radius):
+    """
+    Return the length of the shortest path from source to every node within
+    radius of it, with Dijkstra's algorithm.
+
+    Parameters
+    ----------
+    neighbours: list, required
+        a dictionary per node, with the key as neighbouring node and value
+        the length of the edge to it.
+
+    source: int, required
+        the node the paths start from.
+
+    radius: float, required
+        the length of the longest path returned.
+
+    Returns
+    -------
+    dictionary
+        a dictionary with the key as node and value the length of the
+        shortest path to it, in the order the nodes were reached.
+    """
+    reached = {}
+    queue = [(0.0, source)]
+    while queue:
+        length, node = heapq.heappop(queue)
+        if node in reached:
+            continue
+        reached[node] = length
+        for other, edge in neighbours[node].items():
+            if other not in reached and length + edge <= radius:
+                heapq.heappush(queue, (length + edge, other))
+    return reached
+
+
+if __name__ == '__main__':
+    # the json file to build the network of, the shipped one by default
+    streets = StreetGeometry(*sys.argv[1:2])
+    network = WalkingNetwork(streets)
+    print('%d nodes, %d shortest paths within %g miles, written to %s' % (
+        len(network), len(network.indices), network.radius,
+        network_path(streets.json_path)))
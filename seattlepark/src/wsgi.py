@@ -0,0 +1,60 @@
+# WSGI entry point of seattlepark for pre-fork servers, for example:
+#
+#   gunicorn --preload --workers 4 seattlepark.src.wsgi:server
+#
+# Importing this module loads everything the requests read but never
+# change: the street geometry and its spatial index, the intersection
+# geocoder, the walking network when it is used, the recommendation tiles
+# when they were built, the parking study tables and the map layout, and
+# builds the Dash app. With --preload this happens once in the master
+# process, and the forked workers share those pages copy-on-write instead
+# of each loading its own copy. What a worker must not share, the
+# connections of the Google Map geocoder and of the geocode database, is
+# opened by each worker on first use (see CoordinatesUtil.geo_locator and
+# GeocodeCache.connection).
+import gc
+import os
+import sys
+
+# the modules of seattlepark/src import each other by bare name
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import parking_app  # noqa: E402
+from coordinates_util import CoordinatesUtil  # noqa: E402
+from geocode_cache import GeocodeCache  # noqa: E402
+from parking_study import ParkingStudy  # noqa: E402
+
+
+def preload():
+    """
+    Load the data shared by every worker and return the Dash app.
+
+    Returns
+    -------
+    Dash
+        the Dash app of seattlepark.
+    """
+    cu = CoordinatesUtil(
+        geocode_cache=GeocodeCache(
+            db_path=os.environ.get('SEATTLEPARK_GEOCODE_DB')),
+        walking_distance=parking_app.env_flag('SEATTLEPARK_WALKING_DISTANCE'),
+        segment_distance=parking_app.env_flag('SEATTLEPARK_SEGMENT_DISTANCE'))
+    # built lazily otherwise, by the first request of every worker
+    cu.local_geocoder
+    if cu.walking_distance:
+        cu.data.walking_network
+    if cu.use_tiles:
+        cu.data.tiles
+    ParkingStudy.get_instance()
+    parking_app.map_layout()
+    dash_app = parking_app.create_app(cu)
+
+    # keep the garbage collector of the workers from writing to the pages
+    # of the objects loaded so far, which would copy them
+    gc.collect()
+    gc.freeze()
+    return dash_app
+
+
+application = preload()
+server = application.server
@@ -0,0 +1,68 @@
+# Fake clocks and small data files shared by the test modules.
+
+import json
+import os
+
+import pandas as pd
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def write_study_csv(directory):
+    """Write a small parking study csv and return its path"""
+    df = pd.DataFrame({
+        'Unitdesc': ['STREET A', 'STREET A', 'STREET A', 'STREET B',
+                     'STREET B', 'STREET C'],
+        'Side': ['E', 'W', 'E', 'N', 'N', 'S'],
+        'Hour': [12, 12, 13, 12, 12, 9],
+        'Free_Spaces': [2.0, 4.0, 1.0, 3.0, 5.0, 7.0],
+    })
+    path = os.path.join(directory, 'study.csv')
+    df.to_csv(path, index=False)
+    return path
+
+
+def write_geometry_json(directory):
+    """Write a small street geometry json and return its path"""
+    features = [
+        {'properties': {'UNITDESC': 'STREET A'},
+         'geometry': {'coordinates': [[-122.1, 47.1], [-122.2, 47.2]],
+                      'midpoint': [-122.15, 47.15]}},
+        {'properties': {'UNITDESC': 'STREET B'},
+         'geometry': {'coordinates': [[-122.3, 47.3], [-122.4, 47.4],
+                                      [-122.5, 47.5]],
+                      'midpoint': [-122.35, 47.35]}},
+    ]
+    path = os.path.join(directory, 'streets.json')
+    with open(path, 'w') as handle:
+        json.dump({'features': features}, handle)
+    return path
+
+
+def write_network_json(directory):
+    """
+    Write the json of two streets in a row and of a third street across a
+    gap, and return its path
+    """
+    streets = {
+        'STREET A': [[-122.300, 47.600], [-122.300, 47.602]],
+        'STREET B': [[-122.300, 47.602], [-122.300, 47.604]],
+        'STREET C': [[-122.296, 47.600], [-122.296, 47.604]],
+    }
+    features = [
+        {'properties': {'UNITDESC': name},
+         'geometry': {'coordinates': line,
+                      'midpoint': [(line[0][0] + line[1][0]) / 2,
+                                   (line[0][1] + line[1][1]) / 2]}}
+        for name, line in streets.items()]
+    path = os.path.join(directory, 'streets.json')
+    with open(path, 'w') as handle:
+        json.dump({'features': features}, handle)
+    return path
@@ -1,10 +1,21 @@
+import asyncio
 import unittest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 from coordinates_util import CoordinatesUtil
+from helpers import write_network_json
+from metrics import Metrics
+from parking_data import ParkingData
+from parking_recommender import InvalidStreetError
+from street_geometry import StreetGeometry
 import haversine as hs
 import base64
+import datetime
 import os
+import shutil
+import subprocess
 import sys
+import tempfile
+import numpy as np
 import pandas as pd
 
 
@@ -68,6 +79,187 @@ class CoordinatesUtilTest(unittest.TestCase):
         self.assertEqual(self.cu.cal_distance("(1, 2)", (1, 2)),
                          sys.maxsize)
 
+    def test_cal_distances(self):
+        """Vectorized distances match cal_distance"""
+        destination = [47.6101, -122.3421]
+        lats = self.cu.mid_latitudes
+        lons = self.cu.mid_longitudes
+        distances = self.cu.cal_distances(destination, lats, lons)
+        self.assertEqual(distances.shape, lats.shape)
+        for i in range(0, len(lats), 50):
+            self.assertAlmostEqual(
+                distances[i],
+                self.cu.cal_distance(destination, [lats[i], lons[i]]),
+                places=9)
+
+    def test_cal_distances_catches_exception(self):
+        """Returns sys.maxsize for every point on invalid coordinates"""
+        lats = np.array([47.6, 47.7])
+        lons = np.array([-122.3, -122.4])
+        for destination in [(1, 2, 3), ('1', '2'), "(1, 2)", None,
+                            (91, 0)]:
+            np.testing.assert_array_equal(
+                self.cu.cal_distances(destination, lats, lons),
+                [sys.maxsize, sys.maxsize])
+
+    def test_cal_distance_matrix(self):
+        """Each row of the matrix matches cal_distances"""
+        destinations = [[47.6101, -122.3421], (91, 0), [47.66, -122.31]]
+        lats = self.cu.mid_latitudes
+        lons = self.cu.mid_longitudes
+        matrix = self.cu.cal_distance_matrix(destinations, lats, lons)
+        self.assertEqual(matrix.shape, (3, len(lats)))
+        for destination, row in zip(destinations, matrix):
+            np.testing.assert_array_equal(
+                row, self.cu.cal_distances(destination, lats, lons))
+
+    def test_cal_segment_distance_matrix(self):
+        """Distances to the nearest point of each segment"""
+        # a street along a meridian, and a street of length 0
+        line_coordinates = np.array([[[47.60, 47.61], [-122.33, -122.33]],
+                                     [[47.60, 47.60], [-122.33, -122.33]]])
+        destinations = [[47.605, -122.32], [47.62, -122.33], (91, 0)]
+        matrix = self.cu.cal_segment_distance_matrix(destinations,
+                                                     line_coordinates)
+        self.assertEqual(matrix.shape, (3, 2))
+        # beside the street, its nearest point is level with the destination,
+        # the projection is within 0.1% of the haversine distance
+        self.assertAlmostEqual(matrix[0, 0], self.cu.cal_distance(
+            [47.605, -122.32], [47.605, -122.33]), places=3)
+        # beyond its end, the end is the nearest point
+        self.assertAlmostEqual(matrix[1, 0], self.cu.cal_distance(
+            [47.62, -122.33], [47.61, -122.33]), places=3)
+        self.assertAlmostEqual(matrix[1, 1], self.cu.cal_distance(
+            [47.62, -122.33], [47.60, -122.33]), places=3)
+        np.testing.assert_array_equal(matrix[2], [sys.maxsize, sys.maxsize])
+        np.testing.assert_array_equal(
+            self.cu.cal_segment_distances(destinations[0], line_coordinates),
+            matrix[0])
+
+    def test_rank_parking_spots_segment_distance(self):
+        """A long street is within distance of a destination by its end"""
+        tmpdir = tempfile.mkdtemp()
+        try:
+            data = ParkingData(geometry=StreetGeometry(
+                write_network_json(tmpdir)))
+        finally:
+            shutil.rmtree(tmpdir)
+        destination = [47.6035, -122.2965]
+        with patch.object(CoordinatesUtil, 'recommend_streets') as recommend:
+            CoordinatesUtil(remote_geocoding=False, data=data) \
+                .rank_parking_spots(destination, 0.05)
+            CoordinatesUtil(remote_geocoding=False, data=data,
+                            segment_distance=True) \
+                .rank_parking_spots(destination, 0.05)
+        self.assertEqual(list(recommend.call_args_list[0][0][0]), [])
+        self.assertEqual(list(recommend.call_args_list[1][0][0]), [2])
+        self.assertAlmostEqual(recommend.call_args_list[1][0][1][0], 0.023,
+                               places=3)
+
+    def test_get_parking_spots_batch(self):
+        """The batch returns what get_parking_spots returns per request"""
+        cu = CoordinatesUtil()
+        cu.geo_locator = Mock()
+        locations = {'A': TestCoordinate(47.6101, -122.3421),
+                     'B': TestCoordinate(47.6205, -122.3493)}
+        cu.geo_locator.geocode.side_effect = locations.get
+        when = datetime.datetime(2021, 1, 1, 13, 30)
+        requests = [('A', 0.3, when), ('B', '0.5', when), ('A', 0.1, when),
+                    ('Nowhere', 1, when)]
+
+        results = cu.get_parking_spots_batch(requests)
+
+        self.assertEqual(cu.geo_locator.geocode.call_count, 3)
+        self.assertEqual(len(results), len(requests))
+        self.assertEqual(results[3], ([], None))
+        with patch('coordinates_util.datetime') as mock_datetime:
+            mock_datetime.datetime.now.return_value = when
+            for (address, distance, _), (spots, coords) in \
+                    zip(requests[:3], results):
+                expected, expected_coords = cu.get_parking_spots(
+                    address, distance)
+                self.assertEqual(coords, expected_coords)
+                self.assertEqual([ps.street_name for ps in spots],
+                                 [ps.street_name for ps in expected])
+
+    def test_get_parking_spots_batch_num_returns(self):
+        """num_returns spots are returned per destination"""
+        cu = CoordinatesUtil(remote_geocoding=False)
+        results = cu.get_parking_spots_batch(
+            [('1st Ave & Pike St', 1), ('Dexter Ave N', 1, None)],
+            num_returns=12)
+        for spots, coords in results:
+            self.assertEqual(len(spots), 12)
+            self.assertIsNotNone(coords)
+
+    def test_get_parking_spots_within_distance(self):
+        """get_parking_spots passes every street within the distance"""
+        destination = [47.6101, -122.3421]
+        self.cu.geo_locator = Mock()
+        self.cu.geo_locator.geocode.return_value = TestCoordinate(
+            *destination)
+        distances = {street: self.cu.cal_distance(destination, coords[1])
+                     for street, coords in
+                     self.cu.sea_parking_geocode().items()}
+        expected = [street for street, distance in distances.items()
+                    if distance <= 0.3]
+
+        with patch('coordinates_util.ParkingRecommender') as pr:
+            pr.return_value.recommend.side_effect = InvalidStreetError
+            spots, coords = self.cu.get_parking_spots('Pike Place', '0.3')
+            passed = pr.call_args[0][0]
+
+        self.assertEqual(coords, destination)
+        self.assertEqual(list(passed.street_names), expected)
+        # the fallback returns the closest streets
+        self.assertEqual([ps.street_name for ps in spots],
+                         sorted(expected, key=distances.get)[0:5])
+        self.assertTrue((passed.distances <= 0.3).all())
+
+    def test_get_parking_spots_metrics(self):
+        """get_parking_spots times its stages and counts failures"""
+        previous = Metrics._instance
+        metrics = Metrics()
+        Metrics.set_instance(metrics)
+        self.cu.geo_locator = Mock()
+        self.cu.geo_locator.geocode.side_effect = [
+            TestCoordinate(47.6101, -122.3421),
+            TestCoordinate(38.8977, -77.0365),
+            Exception]
+        try:
+            with patch('coordinates_util.ParkingRecommender') as pr:
+                pr.side_effect = InvalidStreetError
+                spots, _ = self.cu.get_parking_spots('Pike Place', '0.3')
+            self.cu.get_parking_spots('White House', '1')
+            self.cu.get_parking_spots('Not an address', '1')
+        finally:
+            Metrics.set_instance(previous)
+
+        # a street missing from the study falls back to the closest streets
+        self.assertEqual(len(spots), 5)
+        text = metrics.render()
+        self.assertIn('seattlepark_requests_total 3\n', text)
+        self.assertIn('seattlepark_fallbacks_total'
+                      '{reason="InvalidStreetError"} 1\n', text)
+        self.assertIn('seattlepark_empty_results_total 1\n', text)
+        self.assertIn('seattlepark_errors_total{stage="geocode"} 1\n', text)
+        self.assertIn('seattlepark_stage_seconds_count{stage="geocode"} 3\n',
+                      text)
+        self.assertIn(
+            'seattlepark_stage_seconds_count{stage="radius_scan"} 2\n', text)
+        self.assertIn(
+            'seattlepark_stage_seconds_count{stage="recommend"} 1\n', text)
+
+    def test_get_parking_spots_raises_other_errors(self):
+        """Only errors about the streets fall back to the closest streets"""
+        self.cu.geo_locator = Mock()
+        self.cu.geo_locator.geocode.return_value = TestCoordinate(
+            47.6101, -122.3421)
+        with patch('coordinates_util.ParkingRecommender') as pr:
+            pr.return_value.recommend.side_effect = TypeError
+            with self.assertRaises(TypeError):
+                self.cu.get_parking_spots('Pike Place', '0.3')
+
     def test_get_parking_spots_returns_none(self):
         """get_parking_spots returns empty list when nothing meets critera"""
         spots, white_house = self.cu.get_parking_spots(
@@ -130,6 +322,97 @@ class CoordinatesUtilTest(unittest.TestCase):
             self.cu.get_destination_coordinates(self.uw_suzallo_address)
         )
 
+    def test_get_destination_coordinates_cached(self):
+        """A repeated destination is only geocoded once"""
+        cu = CoordinatesUtil()
+        cu.geo_locator = Mock()
+        cu.geo_locator.geocode.return_value = TestCoordinate(1.1, 1.2)
+
+        self.assertEqual(cu.get_destination_coordinates("Some Address"),
+                         [1.1, 1.2])
+        self.assertEqual(cu.get_destination_coordinates("some address "),
+                         [1.1, 1.2])
+        cu.geo_locator.geocode.assert_called_once_with("Some Address")
+        self.assertEqual(cu.geocode_cache.stats()['hits'], 1)
+
+    def test_get_destination_coordinates_local(self):
+        """Intersections of the street dataset are geocoded offline"""
+        cu = CoordinatesUtil(remote_geocoding=False)
+        self.assertIsNone(cu.geo_locator)
+        coordinates = cu.get_destination_coordinates(
+            '1st Ave & Pike St, Seattle')
+        self.assertAlmostEqual(coordinates[0], 47.6088, places=3)
+        self.assertAlmostEqual(coordinates[1], -122.3400, places=3)
+        self.assertRaises(LookupError, cu.get_destination_coordinates,
+                          self.uw_suzallo_address)
+
+    def test_geo_locator_per_process(self):
+        """The geocoder is created on first use, again after a fork"""
+        with patch.object(CoordinatesUtil, 'create_geo_locator',
+                          side_effect=lambda: Mock()) as create:
+            cu = CoordinatesUtil()
+            geo_locator = cu.geo_locator
+            self.assertIs(cu.geo_locator, geo_locator)
+            with patch('coordinates_util.os.getpid', return_value=-1):
+                self.assertIsNot(cu.geo_locator, geo_locator)
+            self.assertEqual(create.call_count, 2)
+
+            # a geocoder set by the caller is kept
+            cu.geo_locator = geo_locator
+            with patch('coordinates_util.os.getpid', return_value=-2):
+                self.assertIs(cu.geo_locator, geo_locator)
+            self.assertEqual(create.call_count, 2)
+
+    def test_aget_parking_spots(self):
+        """aget_parking_spots returns the same spots as get_parking_spots"""
+        self.cu.geo_locator = Mock()
+        self.cu.geo_locator.geocode.return_value = TestCoordinate(
+            47.6101, -122.3421)
+        spots, coords = asyncio.run(
+            self.cu.aget_parking_spots('Pike Place', 0.3))
+        expected, expected_coords = self.cu.get_parking_spots(
+            'Pike Place', 0.3)
+        self.assertEqual(coords, expected_coords)
+        self.assertEqual([ps.street_name for ps in spots],
+                         [ps.street_name for ps in expected])
+
+    def test_aget_parking_spots_handles_exception(self):
+        """aget_parking_spots returns empty list on invalid address"""
+        cu = CoordinatesUtil(remote_geocoding=False)
+        spots, coords = asyncio.run(
+            cu.aget_parking_spots(self.uw_suzallo_address, 1))
+        self.assertEqual([], spots)
+        self.assertEqual(None, coords)
+
+    def test_aget_destination_coordinates_concurrent(self):
+        """Concurrent lookups are all answered"""
+        cu = CoordinatesUtil()
+        cu.geo_locator = Mock()
+        cu.geo_locator.geocode.side_effect = \
+            lambda address: TestCoordinate(1.1, float(len(address)))
+
+        async def lookup_all():
+            return await asyncio.gather(
+                *(cu.aget_destination_coordinates('x' * n)
+                  for n in range(1, 21)))
+
+        results = asyncio.run(lookup_all())
+        self.assertEqual(results, [[1.1, float(n)] for n in range(1, 21)])
+
+    def test_import_is_lazy(self):
+        """Importing coordinates_util stays cheap: geopy, haversine, asyncio
+        and pandas are only imported on first use. The benchmarks time the
+        import."""
+        src = os.path.join(os.path.dirname(__file__), '../src')
+        result = subprocess.run(
+            [sys.executable, '-c',
+             'import sys, coordinates_util; '
+             'print(sorted(m for m in ("geopy", "haversine", "asyncio", '
+             '"pandas") if m in sys.modules))'],
+            env=dict(os.environ, PYTHONPATH=src),
+            stdout=subprocess.PIPE, check=True)
+        self.assertEqual(result.stdout.decode().strip(), '[]')
+
     def test_decode_data(self):
         path = os.path.join(os.path.dirname(__file__), "data/test_key.key")
         key = self.cu.decode_data("../tests/data/test_key.key")
@@ -0,0 +1,95 @@
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from data_reloader import DataReloader
+from helpers import FakeClock, write_geometry_json, write_study_csv
+from metrics import Metrics
+from parking_data import InvalidDataError, ParkingData
+from parking_study import ParkingStudy
+
+
+class TestDataReloader(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.study_path = write_study_csv(self.tmpdir)
+        self.json_path = write_geometry_json(self.tmpdir)
+        self.previous = ParkingData._instance, ParkingStudy._instance
+        self.data = ParkingData.load(self.study_path, self.json_path)
+        ParkingData.set_instance(self.data)
+        Metrics.set_instance(Metrics())
+        self.clock = FakeClock()
+        self.reloader = DataReloader(self.study_path, self.json_path,
+                                     interval=10, clock=self.clock)
+
+    def tearDown(self):
+        ParkingData.set_instance(self.previous[0])
+        ParkingStudy.set_instance(self.previous[1])
+        Metrics.set_instance(None)
+        shutil.rmtree(self.tmpdir)
+
+    def add_street(self, name='STREET D'):
+        df = pd.read_csv(self.study_path)
+        df.loc[len(df)] = [name, 'E', 12, 2.0]
+        df.to_csv(self.study_path, index=False)
+
+    def test_reload(self):
+        self.assertFalse(self.reloader.changed())
+        self.add_street()
+        self.assertTrue(self.reloader.changed())
+        swapped = []
+        self.reloader.add_listener(swapped.append)
+
+        self.assertTrue(self.reloader.reload())
+        data = ParkingData.get_instance()
+        self.assertIsNot(data, self.data)
+        self.assertEqual(swapped, [data])
+        self.assertFalse(self.reloader.changed())
+        self.assertIn('STREET D', ParkingStudy.get_instance().unitdescs)
+        # the requests still reading the old version are unaffected
+        self.assertNotIn('STREET D', self.data.study.unitdescs)
+        self.assertIn('seattlepark_reloads_total{result="swapped"} 1\n',
+                      Metrics.get_instance().render())
+
+    def test_invalid_data_is_not_served(self):
+        with open(self.study_path, 'w') as handle:
+            handle.write('Unitdesc,Side,Hour,Free_Spaces\n')
+
+        self.assertFalse(self.reloader.reload())
+        self.assertIs(ParkingData.get_instance(), self.data)
+        self.assertIsInstance(self.reloader.last_error, InvalidDataError)
+        self.assertFalse(self.reloader.changed())
+        self.assertIn('seattlepark_reloads_total{result="failed"} 1\n',
+                      Metrics.get_instance().render())
+
+        with open(self.study_path, 'w') as handle:
+            handle.write('not, a parking study\n')
+        self.assertFalse(self.reloader.reload())
+        self.assertIs(ParkingData.get_instance(), self.data)
+
+    def test_poll(self):
+        self.add_street()
+        # the files are checked once every interval
+        self.assertIsNone(self.reloader.poll())
+        self.clock.now += 10
+        thread = self.reloader.poll()
+        self.assertIsNotNone(thread)
+        thread.join()
+        self.assertIsNot(ParkingData.get_instance(), self.data)
+        self.assertIsNone(self.reloader.last_error)
+
+        self.clock.now += 10
+        self.assertIsNone(self.reloader.poll())
+
+    def test_poll_turned_off(self):
+        reloader = DataReloader(self.study_path, self.json_path, interval=0,
+                                clock=self.clock)
+        self.add_street()
+        self.clock.now += 1000
+        self.assertIsNone(reloader.poll())
+
+
+if __name__ == "__main__":
+    unittest.main()
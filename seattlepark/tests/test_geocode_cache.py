@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from geocode_cache import GeocodeCache, normalize_address
+from helpers import FakeClock
+
+
+class TestNormalizeAddress(unittest.TestCase):
+    def test_normalize_address(self):
+        self.assertEqual(normalize_address('4000 15th Ave NE,  Seattle.'),
+                         '4000 15th ave ne seattle')
+        self.assertEqual(normalize_address(' 1ST AVE & Pike St '),
+                         '1st ave & pike st')
+
+
+class TestGeocodeCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'geocode.db')
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_memory_tier(self):
+        cache = GeocodeCache(clock=self.clock)
+        self.assertIsNone(cache.get('Space Needle'))
+        cache.put('Space Needle', [47.62, -122.35])
+        self.assertEqual(cache.get('space   needle!'), [47.62, -122.35])
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1,
+                                         'disk_hits': 0, 'size': 1})
+
+    def test_returns_copy(self):
+        cache = GeocodeCache()
+        cache.put('Space Needle', [47.62, -122.35])
+        cache.get('Space Needle').append(0)
+        self.assertEqual(cache.get('Space Needle'), [47.62, -122.35])
+
+    def test_ttl(self):
+        cache = GeocodeCache(ttl=10, db_path=self.db_path, clock=self.clock)
+        cache.put('Space Needle', [47.62, -122.35])
+        self.clock.now += 10
+        self.assertIsNone(cache.get('Space Needle'))
+
+    def test_disk_tier_survives_restart(self):
+        cache = GeocodeCache(db_path=self.db_path, clock=self.clock)
+        cache.put('Space Needle', [47.62, -122.35])
+
+        restarted = GeocodeCache(db_path=self.db_path, clock=self.clock)
+        self.assertEqual(restarted.get('Space Needle'), [47.62, -122.35])
+        self.assertEqual(restarted.get('Space Needle'), [47.62, -122.35])
+        self.assertEqual(restarted.stats(), {'hits': 2, 'misses': 0,
+                                             'disk_hits': 1, 'size': 1})
+
+    def test_forked_process_reconnects(self):
+        """A forked process opens its own database connection"""
+        cache = GeocodeCache(db_path=self.db_path, clock=self.clock)
+        cache.put('Space Needle', [47.62, -122.35])
+        connection = cache.connection()
+        self.assertIs(cache.connection(), connection)
+        with patch('geocode_cache.os.getpid', return_value=-1):
+            self.assertIsNot(cache.connection(), connection)
+            cache.memory.clear()
+            self.assertEqual(cache.get('Space Needle'), [47.62, -122.35])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from intersection_geocoder import IntersectionGeocoder, normalize_street, \
+    street_core
+
+
+def segment(start, end):
+    """coordinates_mapping value of a street from start to end"""
+    return [[[start[0], end[0]], [start[1], end[1]]],
+            [(start[0] + end[0]) / 2, (start[1] + end[1]) / 2]]
+
+
+class TestIntersectionGeocoder(unittest.TestCase):
+    def setUp(self):
+        # 1ST AVE crosses PIKE ST at (1, 0) and PINE ST at (2, 0); the
+        # PINE ST segment is stored from UNION ST to 1ST AVE
+        self.mapping = {
+            '1ST AVE BETWEEN UNION ST AND PIKE ST':
+                segment((0.0, 0.0), (1.0, 0.0)),
+            '1ST AVE BETWEEN PIKE ST AND PINE ST':
+                segment((1.0, 0.0), (2.0, 0.0)),
+            'PINE ST BETWEEN 1ST AVE AND 2ND AVE':
+                segment((2.0, 1.0), (2.0, 0.0)),
+            'E PINE ST BETWEEN BROADWAY AND 10TH AVE':
+                segment((2.0, 5.0), (2.0, 6.0)),
+        }
+        self.geocoder = IntersectionGeocoder(self.mapping)
+
+    def test_normalize_street(self):
+        self.assertEqual(normalize_street('1st Avenue North'), '1ST AVE N')
+        self.assertEqual(normalize_street('Pike  St.'), 'PIKE ST')
+        self.assertEqual(street_core('E PIKE ST'), 'PIKE')
+
+    def test_intersections(self):
+        self.assertEqual(
+            self.geocoder.intersections[frozenset(('1ST AVE', 'PIKE ST'))],
+            (1.0, 0.0))
+        # the reversed PINE ST segment is oriented by its neighbours
+        self.assertEqual(
+            self.geocoder.intersections[frozenset(('1ST AVE', 'PINE ST'))],
+            (2.0, 0.0))
+
+    def test_geocode_intersection(self):
+        for query in ['1st Ave & Pike St', '1ST AVENUE AND PIKE STREET',
+                      'pike st / 1st ave, Seattle, WA',
+                      '1st Ave at Pike']:
+            location = self.geocoder.geocode(query)
+            self.assertEqual((location.latitude, location.longitude),
+                             (1.0, 0.0), query)
+
+    def test_geocode_street(self):
+        location = self.geocoder.geocode('E Pine Street')
+        self.assertEqual(location.address, 'E PINE ST')
+        self.assertEqual((location.latitude, location.longitude),
+                         (2.0, 5.5))
+
+    def test_geocode_miss(self):
+        for query in ['400 1st Ave', '1st Ave & Madison St',
+                      'Space Needle', '', '1st & Pike & Pine']:
+            self.assertIsNone(self.geocoder.geocode(query), query)
+
+
+if __name__ == "__main__":
+    unittest.main()
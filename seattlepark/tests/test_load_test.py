@@ -0,0 +1,62 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'benchmarks'))
+
+import load_test  # noqa: E402
+from helpers import write_network_json  # noqa: E402
+from street_geometry import StreetGeometry  # noqa: E402
+
+
+class TestLoadTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_geocoder_places_addresses_on_streets(self):
+        geometry = StreetGeometry(write_network_json(self.tmpdir))
+        geocoder = load_test.GeoJsonGeocoder(geometry, latency=0)
+        location = geocoder.geocode('1 Load Test Ave')
+        self.assertEqual(location, geocoder.geocode('1 Load Test Ave'))
+        self.assertIn((location.latitude, location.longitude),
+                      set(zip(geometry.mid_latitudes,
+                              geometry.mid_longitudes)))
+
+    def test_saves_every_level(self):
+        output = os.path.join(self.tmpdir, 'results.json')
+        with contextlib.redirect_stdout(io.StringIO()):
+            load_test.main(['--concurrency', '1,2', '--requests', '4',
+                            '--latency', '0', '--warmup', '1',
+                            '--output', output])
+        with open(output) as handle:
+            results = json.load(handle)
+
+        self.assertEqual([level['concurrency']
+                          for level in results['levels']], [1, 2])
+        for level in results['levels']:
+            self.assertEqual(level['requests'], 4)
+            self.assertEqual(level['error_rate'], 0)
+            self.assertEqual(level['invalid_rate'], 0)
+            self.assertGreater(level['throughput_rps'], 0)
+            self.assertLessEqual(level['p50_ms'], level['p95_ms'])
+            self.assertLessEqual(level['p95_ms'], level['p99_ms'])
+
+    def test_failed_requests_are_errors(self):
+        # nothing listens on port 1
+        latency, outcome = load_test.submit('http://127.0.0.1:1',
+                                            '1 Load Test Ave', '0.5')
+        self.assertEqual(outcome, 'error')
+        self.assertGreaterEqual(latency, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
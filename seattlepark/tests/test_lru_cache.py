@@ -0,0 +1,54 @@
+import unittest
+
+from helpers import FakeClock
+from lru_cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = LRUCache(max_size=2, ttl=60, clock=self.clock)
+
+    def test_get_and_put(self):
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.put('a', 1)
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual(self.cache.stats(),
+                         {'hits': 1, 'misses': 1, 'size': 1})
+
+    def test_evicts_least_recently_used(self):
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.cache.get('a')
+        self.cache.put('c', 3)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual(self.cache.get('c'), 3)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_ttl(self):
+        self.cache.put('a', 1)
+        self.clock.now += 59
+        self.assertEqual(self.cache.get('a'), 1)
+        self.clock.now += 1
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_explicit_expiry(self):
+        self.cache.put('a', 1, expires_at=self.clock.now + 5)
+        self.clock.now += 5
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_disabled(self):
+        cache = LRUCache(max_size=0)
+        cache.put('a', 1)
+        self.assertIsNone(cache.get('a'))
+
+    def test_clear(self):
+        self.cache.put('a', 1)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('a'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+from metrics import Metrics, format_labels
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.metrics = Metrics(buckets=(0.1, 1.0), clock=self.clock)
+
+    def test_counters(self):
+        self.metrics.increment('requests')
+        self.metrics.increment('requests', 2)
+        self.metrics.increment('fallbacks', reason='NoSearchResultsError')
+        text = self.metrics.render()
+        self.assertIn('# TYPE seattlepark_requests_total counter', text)
+        self.assertIn('seattlepark_requests_total 3\n', text)
+        self.assertIn('seattlepark_fallbacks_total'
+                      '{reason="NoSearchResultsError"} 1\n', text)
+        # counters never incremented are exported as zero
+        self.assertIn('seattlepark_empty_results_total 0\n', text)
+
+    def test_time(self):
+        with self.metrics.time('geocode'):
+            self.clock.now += 0.5
+        with self.assertRaises(ValueError):
+            with self.metrics.time('geocode'):
+                self.clock.now += 0.05
+                raise ValueError
+        text = self.metrics.render()
+        self.assertIn('# TYPE seattlepark_stage_seconds histogram', text)
+        self.assertIn('seattlepark_stage_seconds_bucket'
+                      '{stage="geocode",le="0.1"} 1\n', text)
+        self.assertIn('seattlepark_stage_seconds_bucket'
+                      '{stage="geocode",le="1.0"} 2\n', text)
+        self.assertIn('seattlepark_stage_seconds_bucket'
+                      '{stage="geocode",le="+Inf"} 2\n', text)
+        self.assertIn('seattlepark_stage_seconds_count{stage="geocode"} 2\n',
+                      text)
+        self.assertIn('seattlepark_stage_seconds_sum{stage="geocode"} 0.55',
+                      text)
+
+    def test_add_cache(self):
+        self.metrics.add_cache('geocode', lambda: {'hits': 4, 'misses': 1,
+                                                   'size': 3})
+        text = self.metrics.render()
+        self.assertIn('seattlepark_cache_hits_total{cache="geocode"} 4\n',
+                      text)
+        self.assertIn('seattlepark_cache_misses_total{cache="geocode"} 1\n',
+                      text)
+        self.assertIn('# TYPE seattlepark_cache_entries gauge', text)
+        self.assertIn('seattlepark_cache_entries{cache="geocode"} 3\n', text)
+
+    def test_instance(self):
+        previous = Metrics._instance
+        try:
+            Metrics.set_instance(self.metrics)
+            self.assertIs(Metrics.get_instance(), self.metrics)
+            Metrics.set_instance(None)
+            self.assertIsNot(Metrics.get_instance(), self.metrics)
+        finally:
+            Metrics.set_instance(previous)
+
+    def test_format_labels(self):
+        self.assertEqual(format_labels(()), '')
+        self.assertEqual(format_labels((('a', 'x"y\\'),)), '{a="x\\"y\\\\"}')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,13 @@
+import os
+import subprocess
+import sys
 import unittest
 from unittest.mock import Mock
-from parking_spot import ParkingSpot
-from parking_app import create_parking_spots
+from coordinates_util import CoordinatesUtil
+from metrics import Metrics
+from parking_spot import ParkingSpot, ParkingSpotArray
+from response_cache import ResponseCache
+from parking_app import create_app, create_parking_spots, street_trace
 
 
 class StreetParkingUITest(unittest.TestCase):
@@ -50,6 +56,74 @@ class StreetParkingUITest(unittest.TestCase):
         lon3 = data[2]["lon"][0]
         self.assertEqual([lat3, lon3], [3.1, 3.2])
 
+    def test_create_parking_spots_single_trace(self):
+        """Every parking spot is drawn in one trace"""
+        cu = Mock()
+        ps1 = ParkingSpot(0.504, [[1.1, 1.2], [1.3, 1.4]], "Street Name1",
+                          1.5, 1.6)
+        ps1.spaceavail = 3.7
+        ps2 = ParkingSpot(1.5, [[2.1, 2.2], [2.3, 2.4]], "Street Name2",
+                          2.5, 2.6)
+        cu.get_parking_spots.return_value = ([ps1, ps2], [3.1, 3.2])
+
+        streets, notification = create_parking_spots(
+            1, "Street0", "0.2", cu, single_trace=True)
+
+        data = streets["data"]
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data[0]["lat"], [1.1, 1.2, None, 2.1, 2.2, None])
+        self.assertEqual(data[0]["lon"], [1.3, 1.4, None, 2.3, 2.4, None])
+        self.assertEqual(data[0]["customdata"][:3], [
+            [1.5, 1.6, "Street Name1", 0.5, 3.0],
+            [1.5, 1.6, "Street Name1", 0.5, 3.0],
+            [None] * 5])
+        self.assertEqual(data[0]["customdata"][4],
+                         [2.5, 2.6, "Street Name2", 1.5, 0.0])
+        self.assertIn("%{customdata[2]}", data[0]["hovertemplate"])
+        self.assertEqual([data[1]["lat"], data[1]["lon"]], [[3.1], [3.2]])
+        self.assertEqual(notification, "")
+
+    def test_street_trace_spot_array(self):
+        """A ParkingSpotArray draws the same trace as its ParkingSpots"""
+        spots = ParkingSpotArray(
+            ["Street Name1", "Street Name2"], [0.5, 1.5],
+            [[[1.1, 1.2], [1.3, 1.4]], [[2.1, 2.2], [2.3, 2.4]]],
+            [1.5, 2.5], [1.6, 2.6], spaceavail=[3.0, float('nan')])
+        trace = street_trace(spots)
+        self.assertEqual(trace, street_trace(spots.to_spots()))
+        self.assertIsNone(trace["customdata"][4][4])
+
+    def test_create_parking_spots_response_cache(self):
+        """Repeated requests within the hour are answered from the cache"""
+        cu = Mock()
+        cu.get_parking_spots.return_value = (
+            [ParkingSpot(0.5, [[1.1, 1.2], [1.3, 1.4]], "Street Name1",
+                         1.5, 1.6)], [3.1, 3.2])
+        response_cache = ResponseCache()
+
+        Metrics.set_instance(Metrics())
+        self.addCleanup(Metrics.set_instance, None)
+
+        first = create_parking_spots(1, "Street0", "0.2", cu, response_cache)
+        second = create_parking_spots(2, "street0", "0.20", cu,
+                                      response_cache)
+        self.assertEqual(second[0]["data"][:-1], first[0]["data"][:-1])
+        self.assertEqual(cu.get_parking_spots.call_count, 1)
+        # the destination is drawn as typed
+        self.assertIn(">Street0</a>", first[0]["data"][-1]["hovertemplate"])
+        self.assertIn(">street0</a>", second[0]["data"][-1]["hovertemplate"])
+        self.assertEqual(second[0]["data"][-1]["lat"], [3.1])
+        # get_parking_spots counts the requests it answers, the cache hit
+        # is counted too
+        self.assertIn('seattlepark_requests_total 1\n',
+                      Metrics.get_instance().render())
+
+        # invalid addresses are not cached
+        cu.get_parking_spots.return_value = ([], None)
+        create_parking_spots(1, "Nowhere", "0.2", cu, response_cache)
+        create_parking_spots(1, "Nowhere", "0.2", cu, response_cache)
+        self.assertEqual(cu.get_parking_spots.call_count, 3)
+
     def test_create_parking_spots_button_not_clicked(self):
         n_clicks = 0
         destination = "I love sushi seattle"
@@ -141,5 +215,46 @@ class StreetParkingUITest(unittest.TestCase):
         self.assertEqual([lat, lon], [[], []])
 
 
+class CreateAppTest(unittest.TestCase):
+
+    def test_import_has_no_side_effects(self):
+        """Importing parking_app builds nothing and loads no web stack"""
+        src = os.path.join(os.path.dirname(__file__), '../src')
+        output = subprocess.run(
+            [sys.executable, '-c',
+             'import sys, parking_app; '
+             'print(sorted(m for m in ("dash", "plotly", "pandas", "geopy") '
+             'if m in sys.modules))'],
+            env=dict(os.environ, PYTHONPATH=src),
+            stdout=subprocess.PIPE, check=True).stdout.decode()
+        self.assertEqual(output.strip(), '[]')
+
+    def test_create_app(self):
+        cu = CoordinatesUtil(remote_geocoding=False)
+        app = create_app(cu)
+        response = app.server.test_client().get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('seattle_street_map', str(app.layout))
+
+    def test_metrics_route(self):
+        previous = Metrics._instance
+        Metrics.set_instance(Metrics())
+        try:
+            cu = CoordinatesUtil(remote_geocoding=False)
+            app = create_app(cu)
+            create_parking_spots(1, 'Nowhere', '0.5', cu)
+            response = app.server.test_client().get('/metrics')
+        finally:
+            Metrics.set_instance(previous)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        text = response.get_data(as_text=True)
+        self.assertIn('seattlepark_requests_total 1\n', text)
+        self.assertIn('seattlepark_errors_total{stage="geocode"} 1\n', text)
+        self.assertIn('seattlepark_cache_misses_total{cache="geocode"} 1\n',
+                      text)
+        self.assertIn('seattlepark_cache_hit_ratio{cache="response"}', text)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import math
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from coordinates_util import CoordinatesUtil
+from parking_asgi import ParkingASGIApp, spot_to_dict
+from parking_spot import ParkingSpot
+
+
+def call(app, scope, messages=()):
+    """Run an ASGI app on scope, return the messages it sent"""
+    sent = []
+    inbox = list(messages)
+
+    async def receive():
+        return inbox.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent
+
+
+def get(app, path, query_string=b''):
+    scope = {'type': 'http', 'method': 'GET', 'path': path,
+             'query_string': query_string}
+    start, body = call(app, scope)
+    return start['status'], json.loads(body['body'])
+
+
+class ParkingASGIAppTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cu = CoordinatesUtil(remote_geocoding=False)
+        self.app = ParkingASGIApp(self.cu, max_workers=4)
+
+    def tearDown(self):
+        self.app.executor.shutdown()
+
+    def test_parking(self):
+        """GET /parking answers with the spots of the destination"""
+        status, body = get(
+            self.app, '/parking',
+            b'destination=1st+Ave+%26+Pike+St&distance=0.3')
+        self.assertEqual(status, 200)
+        spots, coords = self.cu.get_parking_spots('1st Ave & Pike St', 0.3)
+        self.assertEqual(body['destination'], coords)
+        self.assertEqual([spot['street_name'] for spot in body['spots']],
+                         [ps.street_name for ps in spots])
+
+    def test_parking_unknown_destination(self):
+        """An address that can't be geocoded has no spots"""
+        status, body = get(self.app, '/parking',
+                           b'destination=Not+an+address&distance=1')
+        self.assertEqual(status, 200)
+        self.assertEqual(body, {'destination': None, 'spots': []})
+
+    def test_parking_bad_request(self):
+        """destination and a numeric distance are required"""
+        for query in [b'', b'destination=Pike', b'distance=1',
+                      b'destination=Pike&distance=far']:
+            status, body = get(self.app, '/parking', query)
+            self.assertEqual(status, 400)
+
+    def test_not_found(self):
+        status, _ = get(self.app, '/other')
+        self.assertEqual(status, 404)
+
+    def test_method_not_allowed(self):
+        scope = {'type': 'http', 'method': 'POST', 'path': '/parking',
+                 'query_string': b''}
+        start, _ = call(self.app, scope)
+        self.assertEqual(start['status'], 405)
+
+    def test_lifespan(self):
+        sent = call(self.app, {'type': 'lifespan'},
+                    [{'type': 'lifespan.startup'},
+                     {'type': 'lifespan.shutdown'}])
+        self.assertEqual([message['type'] for message in sent],
+                         ['lifespan.startup.complete',
+                          'lifespan.shutdown.complete'])
+
+    def test_creates_coordinates_util(self):
+        """The app creates its CoordinatesUtil on the first request"""
+        app = ParkingASGIApp(max_workers=4)
+        self.assertIsNone(app.cu)
+
+        async def aget_parking_spots(*args):
+            return [], None
+
+        async def first_requests():
+            scope = {'type': 'http', 'method': 'GET', 'path': '/parking',
+                     'query_string': b'destination=Pike&distance=1'}
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+            await asyncio.gather(*(app(scope, None, send)
+                                   for _ in range(8)))
+            return sent
+
+        def create():
+            # slow enough for the first requests to overlap
+            time.sleep(0.05)
+            return cu
+        cu = Mock()
+        cu.aget_parking_spots = aget_parking_spots
+        with patch('parking_asgi.CoordinatesUtil',
+                   side_effect=create) as cu_class:
+            sent = asyncio.run(first_requests())
+            get(app, '/parking', b'destination=Pike&distance=1')
+        cu_class.assert_called_once_with()
+        self.assertIs(app.cu, cu)
+        self.assertEqual([message['status'] for message in sent
+                          if 'status' in message], [200] * 8)
+        app.executor.shutdown()
+
+    def test_lifespan_creates_coordinates_util(self):
+        """The app creates its CoordinatesUtil when the server starts it"""
+        app = ParkingASGIApp(max_workers=1)
+        with patch('parking_asgi.CoordinatesUtil') as cu_class:
+            sent = call(app, {'type': 'lifespan'},
+                        [{'type': 'lifespan.startup'},
+                         {'type': 'lifespan.shutdown'}])
+        cu_class.assert_called_once_with()
+        self.assertIs(app.cu, cu_class.return_value)
+        self.assertEqual(sent[0]['type'], 'lifespan.startup.complete')
+
+        app = ParkingASGIApp(max_workers=1)
+        with patch('parking_asgi.CoordinatesUtil',
+                   side_effect=OSError('no data')):
+            sent = call(app, {'type': 'lifespan'},
+                        [{'type': 'lifespan.startup'}])
+        self.assertEqual(sent[0]['type'], 'lifespan.startup.failed')
+        app.executor.shutdown()
+
+    def test_spot_to_dict(self):
+        ps = ParkingSpot(0.25, [[47.6, 47.7], [-122.3, -122.4]],
+                         'PIKE ST', 47.65, -122.35)
+        ps.spaceavail = 3.7
+        spot = spot_to_dict(ps)
+        self.assertEqual(spot['spaces_available'], 3)
+        self.assertEqual(spot['distance'], 0.25)
+        self.assertEqual(spot['mid_point'], [47.65, -122.35])
+        ps.spaceavail = math.nan
+        self.assertIsNone(spot_to_dict(ps)['spaces_available'])
+        json.dumps(spot_to_dict(ps))
+
+
+if __name__ == "__main__":
+    unittest.main()
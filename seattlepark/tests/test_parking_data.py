@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from coordinates_util import CoordinatesUtil
+from helpers import write_geometry_json, write_study_csv
+from parking_data import InvalidDataError, ParkingData
+from parking_study import ParkingStudy
+
+
+class TestParkingData(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.study_path = write_study_csv(self.tmpdir)
+        self.json_path = write_geometry_json(self.tmpdir)
+        self.previous = ParkingData._instance, ParkingStudy._instance
+
+    def tearDown(self):
+        ParkingData.set_instance(self.previous[0])
+        ParkingStudy.set_instance(self.previous[1])
+        shutil.rmtree(self.tmpdir)
+
+    def test_load(self):
+        data = ParkingData.load(self.study_path, self.json_path)
+        self.assertEqual(list(data.street_names), ['STREET A', 'STREET B'])
+        self.assertEqual(data.line_coordinates.shape, (2, 2, 2))
+        self.assertEqual(list(data.spatial_index.query([47.15, -122.15],
+                                                       0.1)), [0])
+        self.assertEqual(set(data.coordinates_mapping),
+                         {'STREET A', 'STREET B'})
+        self.assertIsNotNone(data._local_geocoder)
+        self.assertEqual(data.study.unitdescs,
+                         {'STREET A', 'STREET B', 'STREET C'})
+        data.validate()
+
+    def test_validate(self):
+        features = [{'properties': {'UNITDESC': 'STREET Z'},
+                     'geometry': {'coordinates': [[-122.1, 47.1],
+                                                  [-122.2, 47.2]],
+                                  'midpoint': [-122.15, 47.15]}}]
+        with open(self.json_path, 'w') as handle:
+            json.dump({'features': features}, handle)
+        with self.assertRaisesRegex(InvalidDataError, 'No street'):
+            ParkingData.load(self.study_path, self.json_path).validate()
+
+        features[0]['geometry']['midpoint'] = [-122.15, 147.15]
+        with open(self.json_path, 'w') as handle:
+            json.dump({'features': features}, handle)
+        with self.assertRaisesRegex(InvalidDataError, 'coordinates'):
+            ParkingData.load(self.study_path, self.json_path).validate()
+
+    def test_set_instance(self):
+        """The new version is read by the requests that start after it"""
+        data = ParkingData.load(self.study_path, self.json_path)
+        cu = CoordinatesUtil(remote_geocoding=False)
+        old = cu.data
+        ParkingData.set_instance(data)
+        self.assertIs(cu.data, data)
+        self.assertIs(ParkingStudy.get_instance(), data.study)
+        self.assertEqual(list(cu.street_names), ['STREET A', 'STREET B'])
+        self.assertIsNot(old, data)
+
+        pinned = CoordinatesUtil(remote_geocoding=False, data=old)
+        self.assertIs(pinned.data, old)
+
+    def test_request_reads_one_version(self):
+        """A version swapped in during a request is not read by it"""
+        data = ParkingData.load(self.study_path, self.json_path)
+        ParkingData.set_instance(data)
+        cu = CoordinatesUtil(remote_geocoding=False)
+        new_path = os.path.join(self.tmpdir, 'new')
+        os.mkdir(new_path)
+        new_data = ParkingData.load(write_study_csv(new_path),
+                                    write_geometry_json(new_path))
+
+        recommend_streets = cu.recommend_streets
+
+        def swap_then_recommend(*args, **kwargs):
+            ParkingData.set_instance(new_data)
+            self.assertIs(kwargs['data'], data)
+            return recommend_streets(*args, **kwargs)
+
+        cu.recommend_streets = swap_then_recommend
+        spots, _ = cu.rank_parking_spots([47.15, -122.15], 0.5)
+        self.assertEqual([spot.street_name for spot in spots], ['STREET A'])
+        self.assertIs(cu.data, new_data)
+
+
+if __name__ == "__main__":
+    unittest.main()
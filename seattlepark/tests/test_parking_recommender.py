@@ -1,12 +1,15 @@
 import unittest
 import os
+import numpy as np
 import pandas as pd
 from dateutil.parser._parser import ParserError
 from pandas.testing import assert_frame_equal
 
+from metrics import Metrics
 from parking_recommender import NoParkingSpotsInListError, \
-    NoSearchResultsError, InvalidStreetError, ParkingRecommender
-from parking_spot import ParkingSpot
+    NoSearchResultsError, InvalidStreetError, ParkingRecommender, \
+    largest_indices
+from parking_spot import ParkingSpot, ParkingSpotArray
 
 
 class TestParkingRecommender(unittest.TestCase):
@@ -164,6 +167,74 @@ class TestRecommend(unittest.TestCase):
         return_list = test_pr2.recommend()
         self.assertEqual(return_list, inp_list[1:])
 
+    def test_recommend_counts_fallback(self):
+        """recommend() counts the fallbacks to the closest streets"""
+        previous = Metrics._instance
+        metrics = Metrics()
+        Metrics.set_instance(metrics)
+        try:
+            ParkingRecommender([self.test_ps2],
+                               '2021-01-01 04:00:00').recommend()
+            self.test_pr.recommend()
+        finally:
+            Metrics.set_instance(previous)
+        self.assertIn('seattlepark_fallbacks_total'
+                      '{reason="NoSearchResultsError"} 1\n', metrics.render())
+
+    def test_recommend_many(self):
+        """num_returns in the hundreds returns the streets with the most
+        free spaces, in ascending order"""
+        study_df = self.test_df[self.test_df['Hour'] == 12]
+        streets = list(study_df['Unitdesc'].unique())
+        inp_list = [ParkingSpot(1, [[1, 3], [2, 4]], street, 1, 1)
+                    for street in streets]
+        test_pr = ParkingRecommender(inp_list, '2021-01-01 12:00:00')
+        all_streets, free_spaces = test_pr.max_freespace()
+
+        return_list = test_pr.recommend(num_returns=300)
+
+        self.assertEqual(len(return_list), min(300, len(all_streets)))
+        expected = sorted(free_spaces, key=lambda x: (np.isnan(x), x))
+        returned = [spot.spaceavail for spot in return_list]
+        np.testing.assert_array_equal(returned, expected[-len(returned):])
+        names = [spot.street_name for spot in return_list]
+        self.assertEqual(len(set(names)), len(names))
+
+    def test_recommend_spot_array(self):
+        """A ParkingSpotArray gets the same recommendations as a list"""
+        streets = list(self.test_df['Unitdesc'].unique()[:40])
+        distances = np.linspace(1, 0, len(streets))
+        coordinates = np.zeros((len(streets), 2, 2))
+        spot_list = [ParkingSpot(d, c.tolist(), street, 0, 0)
+                     for d, c, street in zip(distances, coordinates,
+                                             streets)]
+        spot_array = ParkingSpotArray(streets, distances, coordinates,
+                                      np.zeros(len(streets)),
+                                      np.zeros(len(streets)))
+        for when in ['2021-01-01 12:00:00', '2021-01-01 04:00:00']:
+            expected = ParkingRecommender(spot_list, when).recommend(10)
+            returned = ParkingRecommender(spot_array, when).recommend(10)
+            self.assertEqual([ps.street_name for ps in returned],
+                             [ps.street_name for ps in expected])
+            np.testing.assert_array_equal(
+                [ps.spaceavail for ps in returned],
+                [ps.spaceavail for ps in expected])
+
+
+class TestLargestIndices(unittest.TestCase):
+    def test_largest_indices(self):
+        """Matches the tail of a stable ascending sort"""
+        values = np.array([3, np.nan, 1, 3, 5, np.nan, 3, 0, 5])
+        order = np.argsort(values, kind='stable')
+        for k in range(len(values) + 2):
+            np.testing.assert_array_equal(
+                largest_indices(values, k),
+                order[len(order) - min(k, len(values)):] if k else [])
+
+    def test_largest_indices_empty(self):
+        self.assertEqual(len(largest_indices([], 5)), 0)
+        self.assertEqual(len(largest_indices([1, 2], 0)), 0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,6 @@
 import unittest
-from parking_spot import ParkingSpot
+import numpy as np
+from parking_spot import ParkingSpot, ParkingSpotArray
 
 
 class TestParkingSpotInit(unittest.TestCase):
@@ -23,6 +24,45 @@ class TestParkingSpotInit(unittest.TestCase):
         # Write test here about being passed empty street string?
         pass
 
+    def test_parking_spot_has_no_dict(self):
+        test_ps = ParkingSpot(1, [[1, 3], [2, 4]], "STREET", 1, 1)
+        self.assertFalse(hasattr(test_ps, '__dict__'))
+        with self.assertRaises(AttributeError):
+            test_ps.other = 1
+
+
+class TestParkingSpotArray(unittest.TestCase):
+    def setUp(self):
+        self.spots = ParkingSpotArray(
+            ['STREET A', 'STREET B', 'STREET C'], [0.1, 0.2, 0.3],
+            [[[1, 3], [2, 4]], [[5, 7], [6, 8]], [[9, 11], [10, 12]]],
+            [2, 6, 10], [3, 7, 11], street_ids=[4, 8, 15])
+
+    def test_parking_spot_array(self):
+        self.assertEqual(len(self.spots), 3)
+        self.assertEqual(self.spots.coordinates.shape, (3, 2, 2))
+        np.testing.assert_array_equal(self.spots.spaceavail, [0, 0, 0])
+
+    def test_take(self):
+        taken = self.spots.take([2, 0])
+        self.assertEqual(list(taken.street_names), ['STREET C', 'STREET A'])
+        np.testing.assert_array_equal(taken.street_ids, [15, 4])
+        np.testing.assert_array_equal(taken.distances, [0.3, 0.1])
+
+    def test_to_spots(self):
+        self.spots.spaceavail[1] = 2.5
+        spots = self.spots.to_spots([1])
+        self.assertEqual(len(spots), 1)
+        self.assertIsInstance(spots[0], ParkingSpot)
+        self.assertEqual(spots[0].street_name, 'STREET B')
+        self.assertEqual(spots[0].calculated_distance, 0.2)
+        self.assertEqual(spots[0].street_meet_expect_coordinates,
+                         [[5, 7], [6, 8]])
+        self.assertEqual(spots[0].street_lat_mid, 6)
+        self.assertEqual(spots[0].street_lon_mid, 7)
+        self.assertEqual(spots[0].spaceavail, 2.5)
+        self.assertEqual(len(self.spots.to_spots()), 3)
+
 
 if __name__ == "__main__":
     unittest.main()
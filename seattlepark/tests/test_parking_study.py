@@ -0,0 +1,155 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+import snapshot
+from helpers import write_study_csv
+from parking_recommender import NoSearchResultsError, ParkingRecommender
+from parking_spot import ParkingSpot
+from parking_study import ParkingStudy, arrays_to_frame, effective_hours, \
+    frame_to_arrays
+
+
+class TestParkingStudy(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = write_study_csv(self.tmpdir)
+        ParkingStudy.set_instance(None)
+
+    def tearDown(self):
+        ParkingStudy.set_instance(None)
+        shutil.rmtree(self.tmpdir)
+
+    def test_loads_study(self):
+        study = ParkingStudy(self.path)
+        self.assertEqual(study.study_df.shape[0], 6)
+        self.assertEqual(study.unitdescs,
+                         {'STREET A', 'STREET B', 'STREET C'})
+
+    def test_get_instance_reads_file_once(self):
+        """get_instance parses the csv on first use only"""
+        with patch.object(ParkingStudy, 'default_path', self.path), \
+                patch.object(pd, 'read_csv',
+                             wraps=pd.read_csv) as read_csv:
+            first = ParkingStudy.get_instance()
+            second = ParkingStudy.get_instance()
+        self.assertIs(first, second)
+        self.assertEqual(read_csv.call_count, 1)
+
+    def test_slice_by_street(self):
+        study = ParkingStudy(self.path)
+        sliced = study.slice_by_street(['STREET A', 'STREET C'])
+        self.assertEqual(set(sliced['Unitdesc']), {'STREET A', 'STREET C'})
+        self.assertEqual(sliced.shape[0], 4)
+
+    def test_freespace_tables(self):
+        """Side means are summed per street and hour"""
+        study = ParkingStudy(self.path)
+        a = study.street_index['STREET A']
+        b = study.street_index['STREET B']
+        self.assertEqual(study.street_names[a], 'STREET A')
+        self.assertEqual(study.freespace_table[a, 12], 6)
+        self.assertEqual(study.freespace_table[a, 13], 1)
+        self.assertEqual(study.freespace_table[b, 12], 4)
+        self.assertTrue(study.observed_table[a, 12])
+        self.assertFalse(study.observed_table[b, 13])
+        self.assertLess(study.first_row_table[a, 12],
+                        study.first_row_table[b, 12])
+
+    def test_max_freespace_from_tables(self):
+        """max_freespace reads the tables, falling back an hour later"""
+        ParkingStudy.set_instance(ParkingStudy(self.path))
+        spots = [ParkingSpot(0, 0, 'STREET B', 0, 0),
+                 ParkingSpot(0, 0, 'STREET A', 0, 0)]
+        pr = ParkingRecommender(spots, '2021-01-01 12:00:00')
+        streets, free_spaces = pr.max_freespace()
+        self.assertEqual(list(streets), ['STREET A', 'STREET B'])
+        np.testing.assert_array_equal(free_spaces, [6, 4])
+
+        pr = ParkingRecommender(spots, '2021-01-01 11:00:00')
+        streets, free_spaces = pr.max_freespace()
+        self.assertEqual(list(streets), ['STREET A', 'STREET B'])
+        self.assertEqual(pr.find_hour(11), 12)
+        self.assertEqual(pr.find_hour(14), 13)
+
+    def test_effective_hours(self):
+        """Each hour falls back one hour later, then one hour earlier"""
+        observed = np.zeros((3, 24), dtype=bool)
+        observed[0, [0, 12, 14]] = True
+        observed[1, 23] = True
+        table = effective_hours(observed)
+        self.assertEqual(table.dtype, np.int8)
+        self.assertEqual(list(table[0, [0, 11, 12, 13, 15, 16, 23]]),
+                         [0, 12, 12, 14, 14, -1, 0])
+        self.assertEqual(list(table[1, [0, 22, 23, 1]]), [23, 23, 23, -1])
+        self.assertTrue((table[2] == -1).all())
+
+    def test_find_hour_from_table(self):
+        """The hour of a street set is the first any street falls back to"""
+        ParkingStudy.set_instance(ParkingStudy(self.path))
+        spots = [ParkingSpot(0, 0, 'STREET B', 0, 0),
+                 ParkingSpot(0, 0, 'STREET A', 0, 0)]
+        pr = ParkingRecommender(spots, '2021-01-01 12:00:00')
+        self.assertEqual(pr.find_hour(12), 12)
+        self.assertEqual(pr.find_hour(13), 13)
+        self.assertRaises(NoSearchResultsError, pr.find_hour, 3)
+        self.assertEqual(set(pr.slice_by_hour(14)['Hour']), {13})
+
+    def test_frame_arrays_round_trip(self):
+        df = pd.DataFrame({'name': ['a', None, 'b', 'a'],
+                           'count': [1, 2, 3, 4],
+                           'value': [0.5, np.nan, 1.5, 2.5]})
+        pd.testing.assert_frame_equal(df,
+                                      arrays_to_frame(frame_to_arrays(df)))
+
+    def test_frame_arrays_mixed_column(self):
+        """Columns mixing text and other objects are not stored"""
+        df = pd.DataFrame({'mixed': ['a', 1, 2.5]}, dtype=object)
+        self.assertIsNone(frame_to_arrays(df))
+
+    def test_second_load_uses_snapshot(self):
+        first = ParkingStudy(self.path)
+        self.assertTrue(os.path.exists(snapshot.snapshot_path(self.path)))
+        with patch.object(pd, 'read_csv') as read_csv:
+            second = ParkingStudy(self.path)
+            pd.testing.assert_frame_equal(first.study_df, second.study_df)
+        read_csv.assert_not_called()
+        np.testing.assert_array_equal(first.freespace_table,
+                                      second.freespace_table)
+        self.assertEqual(first.street_index, second.street_index)
+
+    def test_snapshot_rebuilt_when_csv_changes(self):
+        ParkingStudy(self.path)
+        df = pd.read_csv(self.path)
+        df.loc[0, 'Free_Spaces'] = 10.0
+        df.to_csv(self.path, index=False)
+        study = ParkingStudy(self.path)
+        a = study.street_index['STREET A']
+        self.assertEqual(study.freespace_table[a, 12], 14)
+        self.assertEqual(study.study_df.loc[0, 'Free_Spaces'], 10.0)
+
+    def test_without_snapshot(self):
+        ParkingStudy(self.path, use_snapshot=False)
+        self.assertFalse(os.path.exists(snapshot.snapshot_path(self.path)))
+
+    def test_recommenders_share_instance(self):
+        """ParkingRecommender filters the shared study instead of the csv"""
+        study = ParkingStudy(self.path)
+        ParkingStudy.set_instance(study)
+        spots = [ParkingSpot(0, 0, 'STREET B', 0, 0)]
+        with patch.object(pd, 'read_csv') as read_csv:
+            pr1 = ParkingRecommender(spots, '2021-01-01 12:00:00')
+            pr2 = ParkingRecommender(spots, '2021-01-01 12:00:00')
+        read_csv.assert_not_called()
+        self.assertIs(pr1.study, study)
+        self.assertIs(pr2.study, study)
+        self.assertEqual(pr1.initial_df.shape[0], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import datetime
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from coordinates_util import CoordinatesUtil
+from helpers import write_network_json, write_study_csv
+from metrics import Metrics
+from parking_data import ParkingData
+from parking_study import ParkingStudy
+from recommendation_tiles import RecommendationTiles, tiles_path
+from street_geometry import StreetGeometry
+
+
+class TestRecommendationTiles(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.study_path = write_study_csv(self.tmpdir)
+        self.geometry = StreetGeometry(write_network_json(self.tmpdir))
+        self.study = ParkingStudy(self.study_path)
+        self.data = ParkingData(self.study, self.geometry)
+        self.tiles = RecommendationTiles.build(
+            self.geometry, self.study, cell_size=0.0005, radii=(0.1, 0.3))
+        self.cu = CoordinatesUtil(remote_geocoding=False, data=self.data,
+                                  use_tiles=False)
+        Metrics.set_instance(Metrics())
+
+    def tearDown(self):
+        Metrics.set_instance(None)
+        shutil.rmtree(self.tmpdir)
+
+    def live_streets(self, destination, distance, hour):
+        distances = self.cu.cal_distances(destination,
+                                          self.data.mid_latitudes,
+                                          self.data.mid_longitudes)
+        street_ids = np.flatnonzero(distances <= distance)
+        spots = self.cu.recommend_streets(
+            street_ids, distances[street_ids], destination,
+            datetime.datetime(2021, 1, 1, hour, 30), data=self.data)[0]
+        return [(spot.street_name, spot.spaceavail) for spot in spots]
+
+    def test_lookup_matches_recommender(self):
+        answered = 0
+        # the tiles cover the box of the mid-points
+        for latitude in np.linspace(47.6008, 47.6032, 12):
+            for longitude in np.linspace(-122.2998, -122.2962, 12):
+                destination = [latitude, longitude]
+                for distance in (0.1, 0.3):
+                    for hour in (8, 9, 12, 13, 14, 20):
+                        found = self.tiles.lookup(
+                            destination, distance, hour,
+                            cal_distances=self.cu.cal_distances)
+                        if found is None:
+                            continue
+                        answered += 1
+                        street_ids, free_spaces = found
+                        self.assertEqual(
+                            list(zip(self.geometry.street_names[street_ids],
+                                     free_spaces)),
+                            self.live_streets(destination, distance, hour))
+        self.assertGreater(answered, 500)
+
+        # no observations within an hour, the recommender falls back to the
+        # closest streets
+        self.assertIsNone(self.tiles.lookup([47.601, -122.2995], 0.3, 3))
+        # a distance or a location without tiles
+        self.assertIsNone(self.tiles.lookup([47.601, -122.2995], 0.2, 12))
+        self.assertIsNone(self.tiles.lookup([47.7, -122.2995], 0.3, 12))
+        self.assertIsNone(self.tiles.lookup([None, -122.2995], 0.3, 12))
+
+    def test_save_and_load(self):
+        self.assertIsNone(RecommendationTiles.load(self.geometry,
+                                                   self.study))
+        self.assertTrue(self.tiles.save(self.geometry))
+        tiles = RecommendationTiles.load(self.geometry, self.study)
+        np.testing.assert_array_equal(tiles.tile_rows, self.tiles.tile_rows)
+        self.assertEqual(tiles.cell_size, 0.0005)
+
+        # the tiles of an older study are ignored
+        write_study_csv(self.tmpdir)
+        with open(self.study_path, 'a') as handle:
+            handle.write('STREET C,S,10,1.0\n')
+        self.assertIsNone(RecommendationTiles.load(
+            self.geometry, ParkingStudy(self.study_path)))
+        self.assertEqual(tiles_path(self.study_path),
+                         self.study_path[:-len('.csv')] + '.tiles.npz')
+
+    def test_rank_parking_spots(self):
+        self.tiles.save(self.geometry)
+        cu = CoordinatesUtil(remote_geocoding=False,
+                             data=ParkingData(self.study, self.geometry))
+        destination = [47.601, -122.2995]
+        with patch('coordinates_util.datetime') as mock_datetime:
+            mock_datetime.datetime.now.return_value = \
+                datetime.datetime(2021, 1, 1, 12, 30)
+            with patch('coordinates_util.ParkingRecommender') as pr:
+                spots, coordinates = cu.rank_parking_spots(destination, 0.3)
+            pr.assert_not_called()
+            self.assertEqual(coordinates, destination)
+            self.assertEqual([(spot.street_name, spot.spaceavail)
+                              for spot in spots],
+                             self.live_streets(destination, 0.3, 12))
+            self.assertAlmostEqual(spots[0].calculated_distance,
+                                   self.cu.cal_distance(
+                                       destination,
+                                       [spots[0].street_lat_mid,
+                                        spots[0].street_lon_mid]))
+
+            # the live path answers what the tiles don't
+            cu.rank_parking_spots(destination, 0.2)
+        rendered = Metrics.get_instance().render()
+        self.assertIn('seattlepark_tiles_total{result="hit"} 1\n', rendered)
+        self.assertIn('seattlepark_tiles_total{result="miss"} 1\n', rendered)
+
+
+if __name__ == "__main__":
+    unittest.main()
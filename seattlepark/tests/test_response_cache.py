@@ -0,0 +1,63 @@
+import datetime
+import unittest
+
+from response_cache import ResponseCache
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = datetime.datetime(2021, 1, 1, 12, 30).timestamp()
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = ResponseCache(max_size=2, clock=self.clock)
+
+    def test_get_and_put(self):
+        self.assertIsNone(self.cache.get('Pike Place', '0.5'))
+        self.cache.put('Pike Place', '0.5', 'figure')
+        self.assertEqual(self.cache.get('Pike Place', '0.5'), 'figure')
+        # the same request typed differently
+        self.assertEqual(self.cache.get(' pike  PLACE,', 0.50), 'figure')
+        self.assertIsNone(self.cache.get('Pike Place', '1'))
+
+    def test_key(self):
+        self.assertEqual(self.cache.key('Pike Place', '0.5'),
+                         ('pike place', 0.5, 12))
+        self.assertIsNone(self.cache.key('Pike Place', 'far'))
+        self.cache.put('Pike Place', 'far', 'figure')
+        self.assertEqual(len(self.cache.memory), 0)
+
+    def test_expires_at_end_of_hour(self):
+        self.cache.put('Pike Place', '0.5', 'figure')
+        self.clock.now = datetime.datetime(2021, 1, 1, 12, 59, 59).timestamp()
+        self.assertEqual(self.cache.get('Pike Place', '0.5'), 'figure')
+        self.clock.now = datetime.datetime(2021, 1, 1, 13, 0).timestamp()
+        self.assertIsNone(self.cache.get('Pike Place', '0.5'))
+
+    def test_turned_off(self):
+        cache = ResponseCache(max_size=0, clock=self.clock)
+        cache.put('Pike Place', '0.5', 'figure')
+        self.assertIsNone(cache.get('Pike Place', '0.5'))
+
+    def test_stats(self):
+        self.assertEqual(self.cache.stats()['hit_ratio'], 0.0)
+        self.cache.put('Pike Place', '0.5', 'figure')
+        self.cache.get('Pike Place', '0.5')
+        self.cache.get('Pike Place', '0.5')
+        self.cache.get('Space Needle', '0.5')
+        self.cache.clear()
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['size'], 0)
+        self.assertAlmostEqual(stats['hit_ratio'], 2 / 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'benchmarks'))
+
+import run_benchmarks  # noqa: E402
+
+
+class TestRunBenchmarks(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_saves_every_stage(self):
+        output = os.path.join(self.tmpdir, 'results.json')
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_benchmarks.main(['--repeat', '2', '--output', output])
+        with open(output) as handle:
+            results = json.load(handle)
+
+        self.assertEqual(results['repeat'], 2)
+        for name in ('import_coordinates_util', 'sea_parking_geocode',
+                     'get_parking_spots_0.5mi', 'recommender_init',
+                     'slice_by_hour', 'max_freespace', 'recommend',
+                     'create_parking_spots'):
+            self.assertIn(name, results['stages'])
+        for stage in results['stages'].values():
+            self.assertEqual(stage['runs'], 2)
+            self.assertLessEqual(stage['min_ms'], stage['median_ms'])
+            self.assertLessEqual(stage['median_ms'], stage['max_ms'])
+            self.assertGreater(stage['peak_memory_kb'], 0)
+
+    def test_compare(self):
+        baseline = os.path.join(self.tmpdir, 'baseline.json')
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_benchmarks.main(['--repeat', '1', '--stage', 'recommend',
+                                 '--output', baseline])
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            results = run_benchmarks.main(['--repeat', '1', '--stage',
+                                           'recommend', '--compare',
+                                           baseline])
+
+        self.assertEqual(list(results['stages']), ['recommend'])
+        self.assertIn('vs baseline', out.getvalue())
+        self.assertIn('%', out.getvalue().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
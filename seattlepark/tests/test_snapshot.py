@@ -0,0 +1,133 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import snapshot
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.source = os.path.join(self.tmpdir, 'source.csv')
+        with open(self.source, 'w') as handle:
+            handle.write('a,b\n1,2\n')
+        self.arrays = {'a': np.arange(3), 'b': np.array(['x', 'y'])}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def mapped_versions(self):
+        return os.listdir(snapshot.shared_path(
+            snapshot.snapshot_path(self.source)))
+
+    def mapped_name(self):
+        with open(snapshot.snapshot_path(self.source), 'rb') as handle:
+            return snapshot.mapped_name(handle)
+
+    def test_snapshot_path(self):
+        self.assertEqual(snapshot.snapshot_path('/data/study.csv'),
+                         '/data/study.npz')
+
+    def test_missing_snapshot(self):
+        self.assertIsNone(snapshot.load_snapshot(self.source))
+
+    def test_round_trip(self):
+        self.assertTrue(snapshot.save_snapshot(self.source, self.arrays))
+        loaded = snapshot.load_snapshot(self.source)
+        self.assertEqual(set(loaded), {'a', 'b'})
+        np.testing.assert_array_equal(loaded['a'], self.arrays['a'])
+        np.testing.assert_array_equal(loaded['b'], self.arrays['b'])
+
+    def test_mode_follows_umask(self):
+        umask = os.umask(0o027)
+        try:
+            snapshot.save_snapshot(self.source, self.arrays)
+        finally:
+            os.umask(umask)
+        mode = os.stat(snapshot.snapshot_path(self.source)).st_mode
+        self.assertEqual(mode & 0o777, 0o640)
+
+    def test_stale_when_source_changes(self):
+        snapshot.save_snapshot(self.source, self.arrays)
+        with open(self.source, 'a') as handle:
+            handle.write('3,4\n')
+        self.assertIsNone(snapshot.load_snapshot(self.source))
+
+    def test_valid_when_source_only_touched(self):
+        """A new mtime with the same content keeps the snapshot"""
+        snapshot.save_snapshot(self.source, self.arrays)
+        stat = os.stat(self.source)
+        os.utime(self.source, ns=(stat.st_atime_ns,
+                                  stat.st_mtime_ns + 10 ** 9))
+        self.assertIsNotNone(snapshot.load_snapshot(self.source))
+
+    def test_unwritable_snapshot(self):
+        """Failing to write a snapshot is not an error"""
+        path = os.path.join(self.tmpdir, 'missing_dir', 'source.npz')
+        self.assertFalse(
+            snapshot.save_snapshot(self.source, self.arrays, path))
+
+    def test_corrupt_snapshot(self):
+        with open(snapshot.snapshot_path(self.source), 'w') as handle:
+            handle.write('not a snapshot')
+        self.assertIsNone(snapshot.load_snapshot(self.source))
+
+    def test_mmap(self):
+        """Mapped arrays are read-only views of files shared by version"""
+        snapshot.save_snapshot(self.source, self.arrays)
+        loaded = snapshot.load_snapshot(self.source, mmap=True)
+        np.testing.assert_array_equal(loaded['a'], self.arrays['a'])
+        np.testing.assert_array_equal(loaded['b'], self.arrays['b'])
+        self.assertIs(type(loaded['a']), np.ndarray)
+        self.assertFalse(loaded['a'].flags['WRITEABLE'])
+        self.assertEqual(self.mapped_versions(), [self.mapped_name()])
+
+    def test_mmap_replaces_old_version(self):
+        snapshot.save_snapshot(self.source, self.arrays)
+        snapshot.load_snapshot(self.source, mmap=True)
+        with open(self.source, 'a') as handle:
+            handle.write('3,4\n')
+        snapshot.save_snapshot(self.source, {'a': np.arange(5)})
+        loaded = snapshot.load_snapshot(self.source, mmap=True)
+        np.testing.assert_array_equal(loaded['a'], np.arange(5))
+        self.assertEqual(self.mapped_versions(), [self.mapped_name()])
+
+    def test_mmap_replaces_rebuilt_snapshot(self):
+        """A snapshot rebuilt from the same source gets new maps"""
+        snapshot.save_snapshot(self.source, self.arrays)
+        snapshot.load_snapshot(self.source, mmap=True)
+        snapshot.save_snapshot(self.source, {'a': np.arange(5)})
+        loaded = snapshot.load_snapshot(self.source, mmap=True)
+        np.testing.assert_array_equal(loaded['a'], np.arange(5))
+        self.assertEqual(self.mapped_versions(), [self.mapped_name()])
+        self.assertTrue(self.mapped_name().startswith(
+            '%d-' % snapshot.SNAPSHOT_VERSION))
+
+    def test_mmap_mode_follows_umask(self):
+        snapshot.save_snapshot(self.source, self.arrays)
+        umask = os.umask(0o027)
+        try:
+            snapshot.load_snapshot(self.source, mmap=True)
+        finally:
+            os.umask(umask)
+        array_path = os.path.join(
+            snapshot.shared_path(snapshot.snapshot_path(self.source)),
+            self.mapped_name(), 'a.npy')
+        self.assertEqual(os.stat(array_path).st_mode & 0o777, 0o640)
+
+    def test_mmap_unwritable(self):
+        """The arrays are read into memory if they can't be mapped"""
+        snapshot.save_snapshot(self.source, self.arrays)
+        # a file where the directory of the maps should be
+        with open(snapshot.shared_path(
+                snapshot.snapshot_path(self.source)), 'w'):
+            pass
+        loaded = snapshot.load_snapshot(self.source, mmap=True)
+        np.testing.assert_array_equal(loaded['a'], self.arrays['a'])
+
+
+if __name__ == "__main__":
+    unittest.main()
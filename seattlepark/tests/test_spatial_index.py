@@ -0,0 +1,62 @@
+import unittest
+
+import haversine as hs
+import numpy as np
+
+from spatial_index import GridIndex
+
+
+class TestGridIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.lats = 47.5 + rng.random(2000) * 0.2
+        self.lons = -122.4 + rng.random(2000) * 0.15
+        self.index = GridIndex(self.lats, self.lons)
+
+    def brute_force(self, coordinates, distance):
+        return [i for i in range(len(self.lats))
+                if hs.haversine(coordinates, (self.lats[i], self.lons[i]),
+                                unit="mi") <= distance]
+
+    def test_query_contains_points_within_distance(self):
+        for coordinates, distance in [((47.6, -122.33), 0.3),
+                                      ((47.55, -122.3), 0.05),
+                                      ((47.7, -122.4), 1.0),
+                                      ((47.5, -122.25), 0.5),
+                                      ((47.4, -122.33), 5.0)]:
+            candidates = self.index.query(coordinates, distance)
+            self.assertTrue(
+                set(self.brute_force(coordinates, distance)) <=
+                set(candidates))
+            # candidates come back sorted and without duplicates
+            self.assertTrue(np.all(np.diff(candidates) > 0))
+
+    def test_query_skips_far_points(self):
+        candidates = self.index.query((47.6, -122.33), 0.1)
+        self.assertLess(len(candidates), len(self.lats) / 10)
+
+    def test_query_far_away(self):
+        self.assertEqual(len(self.index.query((38.9, -77.0), 1)), 0)
+
+    def test_query_large_distance(self):
+        np.testing.assert_array_equal(
+            self.index.query((47.6, -122.33), 50), np.arange(2000))
+        np.testing.assert_array_equal(
+            self.index.query((47.6, -122.33), float('inf')),
+            np.arange(2000))
+
+    def test_query_invalid_coordinates(self):
+        """Invalid coordinates return every point for an exact check"""
+        for coordinates in [(1, 2, 3), None, "(1, 2)", (float('nan'), 0)]:
+            self.assertEqual(len(self.index.query(coordinates, 1)), 2000)
+
+    def test_query_negative_distance(self):
+        self.assertEqual(len(self.index.query((47.6, -122.33), -1)), 0)
+
+    def test_empty_index(self):
+        index = GridIndex([], [])
+        self.assertEqual(len(index.query((47.6, -122.33), 1)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
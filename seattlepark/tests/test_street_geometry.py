@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+import snapshot
+import street_geometry
+from helpers import write_geometry_json
+from street_geometry import StreetGeometry
+
+
+class TestStreetGeometry(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = write_geometry_json(self.tmpdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_loads_geometry(self):
+        geometry = StreetGeometry(self.path)
+        self.assertEqual(len(geometry), 2)
+        self.assertEqual(list(geometry.street_names),
+                         ['STREET A', 'STREET B'])
+        np.testing.assert_array_equal(geometry.start_latitudes, [47.1, 47.3])
+        np.testing.assert_array_equal(geometry.start_longitudes,
+                                      [-122.1, -122.3])
+        np.testing.assert_array_equal(geometry.end_latitudes, [47.2, 47.4])
+        np.testing.assert_array_equal(geometry.end_longitudes,
+                                      [-122.2, -122.4])
+        np.testing.assert_array_equal(geometry.mid_latitudes, [47.15, 47.35])
+        np.testing.assert_array_equal(geometry.mid_longitudes,
+                                      [-122.15, -122.35])
+        self.assertTrue(geometry.mid_latitudes.flags['C_CONTIGUOUS'])
+
+    def test_to_mapping(self):
+        """The mapping has the layout of CoordinatesUtil.coordinates_mapping"""
+        mapping = StreetGeometry(self.path).to_mapping()
+        self.assertEqual(mapping, {
+            'STREET A': [[[47.1, 47.2], [-122.1, -122.2]], [47.15, -122.15]],
+            'STREET B': [[[47.3, 47.4], [-122.3, -122.4]], [47.35, -122.35]],
+        })
+
+    def test_line_coordinates(self):
+        line_coordinates = StreetGeometry(self.path).line_coordinates()
+        self.assertEqual(line_coordinates.shape, (2, 2, 2))
+        self.assertEqual(line_coordinates[1].tolist(),
+                         [[47.3, 47.4], [-122.3, -122.4]])
+
+    def test_snapshot_is_used(self):
+        """The json file is only parsed when there is no snapshot"""
+        StreetGeometry(self.path)
+        self.assertTrue(os.path.exists(snapshot.snapshot_path(self.path)))
+        with patch.object(street_geometry.json, 'load') as load:
+            geometry = StreetGeometry(self.path)
+        load.assert_not_called()
+        self.assertEqual(list(geometry.street_names),
+                         ['STREET A', 'STREET B'])
+
+    def test_without_snapshot(self):
+        StreetGeometry(self.path, use_snapshot=False)
+        self.assertFalse(os.path.exists(snapshot.snapshot_path(self.path)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from coordinates_util import CoordinatesUtil
+from helpers import write_network_json
+from parking_data import ParkingData
+from street_geometry import StreetGeometry
+from walking_network import WalkingNetwork, network_path, shortest_paths
+
+
+class TestWalkingNetwork(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.geometry = StreetGeometry(write_network_json(self.tmpdir))
+        self.network = WalkingNetwork(self.geometry)
+        self.destination = [47.601, -122.2995]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_build(self):
+        """Shared endpoints are one node"""
+        self.assertEqual(len(self.network), 5)
+        self.assertEqual(self.network.end_nodes[0],
+                         self.network.start_nodes[1])
+        self.assertAlmostEqual(self.network.half_lengths[0], 0.069, places=3)
+        # every node reaches itself
+        for node in range(len(self.network)):
+            start = self.network.indptr[node]
+            self.assertEqual(self.network.indices[start], node)
+            self.assertEqual(self.network.distances[start], 0)
+
+    def test_shortest_paths(self):
+        neighbours = [{1: 1.0, 2: 5.0}, {0: 1.0, 2: 1.0}, {0: 5.0, 1: 1.0},
+                      {}]
+        self.assertEqual(shortest_paths(neighbours, 0, 10),
+                         {0: 0.0, 1: 1.0, 2: 2.0})
+        self.assertEqual(shortest_paths(neighbours, 0, 1.5),
+                         {0: 0.0, 1: 1.0})
+
+    def test_walking_distances(self):
+        street_ids = np.arange(3)
+        straight = CoordinatesUtil().cal_distances(
+            self.destination, self.geometry.mid_latitudes,
+            self.geometry.mid_longitudes)
+        walking = self.network.walking_distances(
+            self.destination, street_ids, straight, 0.5)
+        # the street next to the destination is reached directly
+        self.assertEqual(walking[0], straight[0])
+        self.assertGreaterEqual(walking[1], straight[1])
+        self.assertLess(walking[1], 0.5)
+        # no walk crosses the gap
+        self.assertEqual(walking[2], np.inf)
+
+        self.assertIsNone(self.network.walking_distances(
+            self.destination, street_ids, straight, 2.0))
+
+    def test_snapshot(self):
+        self.assertTrue(os.path.exists(network_path(self.geometry.json_path)))
+        with patch.object(WalkingNetwork, 'build') as build:
+            network = WalkingNetwork(self.geometry)
+        build.assert_not_called()
+        np.testing.assert_array_equal(network.indices, self.network.indices)
+
+        # a network of other parameters is built again
+        network = WalkingNetwork(self.geometry, radius=0.1)
+        self.assertLess(len(network.indices), len(self.network.indices))
+
+    def test_rank_parking_spots(self):
+        data = ParkingData(geometry=self.geometry)
+        straight = CoordinatesUtil(remote_geocoding=False, data=data)
+        walking = CoordinatesUtil(remote_geocoding=False, data=data,
+                                  walking_distance=True)
+        with patch.object(CoordinatesUtil, 'recommend_streets') as recommend:
+            straight.rank_parking_spots(self.destination, 0.5)
+            walking.rank_parking_spots(self.destination, 0.5)
+        self.assertEqual(list(recommend.call_args_list[0][0][0]), [0, 1, 2])
+        self.assertEqual(list(recommend.call_args_list[1][0][0]), [0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
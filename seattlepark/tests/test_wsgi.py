@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+import unittest
+
+
+class WSGITest(unittest.TestCase):
+
+    def test_preloads_shared_data(self):
+        """Importing wsgi loads the shared data but no geocoder"""
+        root = os.path.join(os.path.dirname(__file__), '../..')
+        output = subprocess.run(
+            [sys.executable, '-c',
+             'import sys, seattlepark.src.wsgi as wsgi; '
+             'from parking_data import ParkingData; '
+             'from parking_study import ParkingStudy; '
+             'print(type(wsgi.server).__name__, '
+             'wsgi.server.test_client().get("/").status_code, '
+             'len(ParkingData._instance.street_names) > 0, '
+             'ParkingData._instance._local_geocoder is not None, '
+             'ParkingStudy._instance is not None, '
+             '"geopy" in sys.modules)'],
+            cwd=root, stdout=subprocess.PIPE, check=True).stdout.decode()
+        self.assertEqual(output.strip().splitlines()[-1],
+                         'Flask 200 True True True False')
+
+
+if __name__ == "__main__":
+    unittest.main()